@@ -1,3 +1,109 @@
 class Config:
     MONGO_URI = "mongodb://localhost:27017/"
-    MONGO_DBNAME = "LD_education"  # Replace with your database name
\ No newline at end of file
+    MONGO_DBNAME = "LD_education"  # Replace with your database name
+    MONGO_ENSURE_INDEXES = True  # Create missing indexes (app/Helpers/indexHelper.py) in the background at startup
+
+    # Model loading: models load on first use; warm-up loads them in a background thread at startup
+    MODEL_WARMUP = True
+    MODEL_WARMUP_NAMES = None  # None = every registered model
+    # Models /ready waits for (None = every registered model); the rest load on first use and
+    # a failed load (e.g. Whisper weights unreachable offline) only shows up in the status
+    READY_REQUIRED_MODELS = ["fer_models", "fer_batcher", "face_mesh_pool"]
+
+    # Face-emotion inference batching (/users/facedetection)
+    FER_MAX_BATCH_SIZE = 16  # Max face crops per ResNet50/LSTM forward
+    FER_MAX_WAIT_MS = 15  # Max time the first queued crop waits for a batch to fill
+    FER_SESSION_TTL_SECONDS = 600  # Evict a student's temporal emotion state after this much idle time
+    FER_STATE_ANCHOR_INTERVAL = 50  # Rebuild LSTM state from the frame buffer every N frames
+    FER_INFER_TIMEOUT_SECONDS = 5  # A face-emotion request gives up waiting for its batch after this long
+    FER_BACKEND = "torch"  # torch | onnx (ONNX Runtime CPU execution provider)
+    FER_ONNX_DIR = "app/models/onnx"  # Exported graphs; created on first use when missing
+    FER_ONNX_THREADS = 0  # ORT intra-op threads, 0 = library default
+    FER_INFERENCE_MODE = "fused"  # eager | fused (BatchNorm folded into the convolutions)
+    FER_BOX_MARGIN = 0.0  # Pad the landmark face box by this fraction of its width/height
+
+    # Per-student emotion history (facedetection results used by audio tasks and /users/rl_action)
+    EMOTION_STORE_BACKEND = "memory"  # memory (single worker) | mongo (shared by all worker processes)
+    EMOTION_HISTORY_SIZE = 120  # Detections kept per student (ring buffer)
+    EMOTION_SESSION_TTL_SECONDS = 1800  # A student's history is dropped after this much idle time
+    EMOTION_WINDOWS = {  # Aggregates kept up to date on every detection (/users/emotions/aggregates)
+        "last10Frames": {"frames": 10},
+        "lastMinute": {"seconds": 60},
+        "session": {},
+    }
+    EMOTION_RL_WINDOW = "last10Frames"  # Window whose dominant emotion is the RL agent's state
+    EMOTION_TELEMETRY = True  # Persist every detection to the emotion_telemetry time-series collection
+    EMOTION_TELEMETRY_BATCH_SIZE = 500  # Documents per insert_many
+    EMOTION_TELEMETRY_FLUSH_MS = 1000  # Max time a detection waits in memory before it is written
+    EMOTION_TELEMETRY_MAX_BUFFERED = 20000  # Detections held while MongoDB is slow; further ones are dropped
+    EMOTION_TELEMETRY_BLOCK_MS = 0  # How long a request may wait for buffer room before dropping its detection
+    EMOTION_TELEMETRY_RETENTION_SECONDS = None  # None = keep forever; otherwise expire old measurements
+
+    # MediaPipe FaceMesh pool; size it to the number of request-handling threads per worker
+    FACE_MESH_POOL_SIZE = 8
+
+    # EasyOCR readers (dysgraphia uploads); one shared Reader per language/settings configuration
+    OCR_LANGUAGES = ["en"]
+    OCR_GPU = False
+    OCR_READER_MAX_CONFIGS = 3  # Cached configurations besides the default one are evicted beyond this
+    OCR_READER_IDLE_SECONDS = 1800  # ...or after this long unused
+
+    # Pre-OCR stage for handwriting photos (downscale, grayscale, adaptive binarisation, crop)
+    OCR_PREPROCESS = True
+    OCR_MAX_SIDE = 1600  # Longest image side in pixels after downscaling
+    OCR_GRAYSCALE = True
+    OCR_BINARIZE = False  # The EasyOCR recogniser was trained on grayscale crops; only the crop uses the binary mask
+    OCR_CROP = True  # Crop to the sheet of paper and the ink on it
+
+    # Assessment task storage (one document per user and collection)
+    DYSLEXIA_MAX_TASKS = 200  # Most recent audio tasks kept per user
+    DYSGRAPHIA_MAX_TASKS = 200  # Most recent writing tasks kept per user
+
+    # Learning-disability identification (Gemini)
+    LD_JOB_WORKERS = 2  # Background threads running identification jobs
+    LD_JOB_MAX_QUEUED = 50  # Queued + running jobs before submissions are rejected
+    LD_JOB_HEARTBEAT_SECONDS = 15  # How often a process refreshes the jobs it is running
+    LD_JOB_LEASE_SECONDS = 60  # Unrefreshed queued/running jobs (process restarted) are marked failed
+    LD_JOB_TTL_SECONDS = 24 * 3600  # Finished jobs are deleted this long after they finish
+    LD_MAX_CONCURRENT_MODEL_CALLS = 4  # Concurrent outbound generations per process
+    LD_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Cached identification results expire after a week
+    LD_CACHE_MAX_ENTRIES = 5000  # Oldest cached results are evicted beyond this
+    LD_CACHE_EVICT_EVERY = 50  # Puts between size checks (the TTL index already bounds entry age)
+    LD_PROMPT_COMPACTION = True  # Reduce raw tasks to per-task features before building the prompt
+    LD_PROMPT_TOKEN_BUDGET = 3000  # Estimated tokens for the compacted assessment (summary + kept tasks)
+    LD_PROMPT_RECENCY_WEIGHT = 0.5  # How much recency adds to a task's informativeness (low accuracy = 1.0)
+    LD_PROMPT_MAX_ERROR_WORDS = 8  # Missed/extra words kept per task
+    LD_SPECULATIVE = True  # Start identification in the background once all assessment data is stored
+    LD_SPECULATIVE_DEBOUNCE_SECONDS = 20  # Quiet period after the last upload before the run starts
+    LD_SPECULATIVE_WORKERS = 1  # Background threads for speculative runs
+    GEMINI_BASE_URL = None  # None = Google's endpoint; e.g. "http://127.0.0.1:8765" for a local stand-in server
+    GEMINI_TIMEOUT_MS = 120000  # Per-request HTTP timeout of the shared Gemini client
+
+    # Dyslexia audio uploads (decoded in memory to 16 kHz mono)
+    FFMPEG_PATH = None  # None = first ffmpeg on PATH; used for WebM/MP3 (WAV is decoded with the wave module)
+    AUDIO_PERSIST_UPLOADS = True  # Save the original upload to static/uploads/audio in the background
+    AUDIO_VAD_TRIM = True  # Send only the detected speech span to ASR
+    AUDIO_VAD_THRESHOLD_DB = 12.0  # Speech = frame level this far above the recording's noise floor
+    AUDIO_VAD_PAD_MS = 150  # Kept around the speech span so word onsets are not clipped
+    AUDIO_MIN_PAUSE_MS = 250  # Shorter silences inside the speech span are not counted as pauses
+    AUDIO_STREAM_PARTIAL_INTERVAL_SECONDS = 1.0  # New audio needed before the next partial transcript, 0 = off
+    AUDIO_STREAM_SEGMENT_PAUSE_MS = 400  # A pause this long closes a segment; later partials skip it
+    AUDIO_STREAM_TTL_SECONDS = 120  # Streamed uploads idle for longer are discarded
+    AUDIO_STREAM_MAX_OPEN = 64  # Open streams per process (each webm stream runs an ffmpeg process)
+    AUDIO_STREAM_MAX_OPEN_PER_USER = 2  # Open streams per userID
+    AUDIO_STREAM_FINISH_TIMEOUT_SECONDS = 60  # finish answers 503 if transcription takes longer
+
+    # Speech recognition for dyslexia recordings
+    # google (Web Speech API, network) | whisper (local CPU, faster-whisper/CTranslate2). whisper
+    # downloads ASR_WHISPER_MODEL from Hugging Face on first load unless it is a local path;
+    # fetch it ahead of time on offline hosts
+    ASR_ENGINE = "google"
+    ASR_WHISPER_MODEL = "base.en"  # faster-whisper model name or path to a converted model
+    ASR_WHISPER_COMPUTE_TYPE = "int8"  # CTranslate2 weight type on CPU
+    ASR_CPU_THREADS = 0  # CTranslate2 threads per decode, 0 = library default
+    ASR_BEAM_SIZE = 1  # 1 = greedy decoding
+    ASR_WORKERS = 4  # Threads calling the engine; 1 is enough for whisper (it batches and uses every core)
+    ASR_MAX_BATCH_SIZE = 4  # Utterances decoded in one forward pass
+    ASR_MAX_WAIT_MS = 50  # Max time the first queued utterance waits for a batch to fill
+    ASR_MAX_QUEUED = 32  # Utterances waiting before uploads are rejected
+    ASR_MAX_QUEUED_PARTIALS = 4  # Streamed partial transcripts waiting (low priority; skipped when full)
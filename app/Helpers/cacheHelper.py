@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+from app.Config.config import Config
+from app.Helpers.userHelper import db
+from app.Helpers.indexHelper import ensure_ttl_index
+
+
+def assessment_cache_key(assessment_data, model, prompt_version):
+    """
+    Stable hash of the canonicalised assessment payload (sorted keys, no whitespace)
+    together with the model name and prompt version.
+    """
+    canonical = json.dumps(assessment_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, canonical):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LDResultCache:
+    """
+    Content-addressed cache of parsed identification responses in MongoDB.
+    Entries expire through a TTL index on `createdAt`, and the oldest entries are
+    removed once the collection holds more than `max_entries`. The size is checked
+    every `evict_every` puts rather than on each one, so the collection can briefly
+    hold up to that many extra entries.
+    """
+    def __init__(self, collection, ttl_seconds=7 * 24 * 3600, max_entries=5000, evict_every=50):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_every = max(1, int(evict_every))
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        try:
+            # Also adjusts an existing index after LD_CACHE_TTL_SECONDS changed
+            ensure_ttl_index(self.collection, "createdAt", self.ttl_seconds)
+        except PyMongoError as e:
+            print(f"❌ Could not ensure the identification cache TTL index: {e}")
+        self._indexes_ready = True
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, key):
+        self._ensure_indexes()
+        entry = self.collection.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"hits": 1}, "$set": {"lastHitAt": datetime.now(timezone.utc)}},
+            projection={"response": True}
+        )
+        self._count("hits" if entry else "misses")
+        return entry["response"] if entry else None
+
+    def record_bypass(self):
+        self._count("bypasses")
+
+    def put(self, key, response, user_id=None):
+        self._ensure_indexes()
+        self.collection.replace_one(
+            {"_id": key},
+            {"response": response, "userID": user_id, "createdAt": datetime.now(timezone.utc), "hits": 0},
+            upsert=True
+        )
+        with self._lock:
+            self._puts += 1
+            check = self._puts % self.evict_every == 0
+        if check:
+            self._evict_overflow()
+
+    def _evict_overflow(self):
+        excess = self.collection.estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return
+        oldest = self.collection.find({}, {"_id": True}).sort("createdAt", ASCENDING).limit(excess)
+        self.collection.delete_many({"_id": {"$in": [doc["_id"] for doc in oldest]}})
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+ld_result_cache = LDResultCache(
+    db.ld_result_cache,
+    ttl_seconds=Config.LD_CACHE_TTL_SECONDS,
+    max_entries=Config.LD_CACHE_MAX_ENTRIES,
+    evict_every=Config.LD_CACHE_EVICT_EVERY
+)
@@ -0,0 +1,241 @@
+import json
+import threading
+import time
+from collections import Counter, deque
+from difflib import SequenceMatcher
+
+from app.Config.config import Config
+
+
+def estimate_tokens(text):
+    """Rough token count for Gemini-style tokenisers (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _words(text):
+    return [w.strip(".,!?;:\"'()").lower() for w in (text or "").split() if w.strip(".,!?;:\"'()")]
+
+
+def compare_text(expected, recognized, max_error_words=8):
+    """
+    Word-level comparison of the expected and recognised text: similarity ratio plus the
+    expected words that were missed or misread and the words that were added instead.
+    """
+    expected_words, recognized_words = _words(expected), _words(recognized)
+    matcher = SequenceMatcher(None, expected_words, recognized_words, autojunk=False)
+    missed, extra = [], []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op in ("replace", "delete"):
+            missed.extend(expected_words[i1:i2])
+        if op in ("replace", "insert"):
+            extra.extend(recognized_words[j1:j2])
+    return {
+        "accuracy": round(matcher.ratio(), 3) if expected_words or recognized_words else 1.0,
+        "missedWords": missed[:max_error_words],
+        "extraWords": extra[:max_error_words],
+    }
+
+
+def summarize_task(task, kind, max_error_words=8):
+    """Per-task features that replace the raw task (texts, emotion list, ISO timestamp)."""
+    features = {"kind": kind}
+    if task.get("task"):
+        features["task"] = task["task"]
+    features["expected"] = task.get("originalText") or ""
+    comparison = compare_text(task.get("originalText"), task.get("recognizedText"), max_error_words)
+    features["accuracy"] = comparison["accuracy"]
+    for key in ("missedWords", "extraWords"):
+        if comparison[key]:
+            features[key] = comparison[key]
+    fluency = task.get("fluency")
+    if fluency:
+        # Stored at ingest by the audio pipeline; nothing is recomputed here
+        features["wordsPerMinute"] = fluency["wordsPerMinute"]
+        features["pauses"] = fluency["pauseCount"]
+        features["wer"] = fluency["alignment"]["wer"]
+    emotions = task.get("emotions")
+    if emotions:
+        features["emotions"] = dict(Counter(emotions).most_common())
+    if task.get("timestamp"):
+        features["date"] = str(task["timestamp"])[:10]
+    return features
+
+
+def _aggregate(features):
+    if not features:
+        return None
+    missed = Counter(w for f in features for w in f.get("missedWords", ()))
+    return {
+        "tasks": len(features),
+        "meanAccuracy": round(sum(f["accuracy"] for f in features) / len(features), 3),
+        "lowestAccuracy": min(f["accuracy"] for f in features),
+        "frequentMissedWords": [w for w, _ in missed.most_common(10)],
+    }
+
+
+def compact_assessment(assessment_data, token_budget=None, recency_weight=None, max_error_words=None):
+    """
+    Reduce the output of get_user_assessment_data to what the model needs, so the prompt
+    stays bounded however many tasks a student has done.
+
+    Every audio/writing task becomes a feature dict (expected text, accuracy ratio,
+    missed/extra words, stored fluency features, emotion counts, date). Aggregates over *all* tasks (mean/lowest accuracy, frequent
+    missed words, total emotion counts) are always included; individual tasks are then
+    added in order of informativeness - low accuracy first, ties broken towards recent
+    tasks by `recency_weight` - until `token_budget` (estimated tokens) is reached.
+    Returns (compact_data, stats).
+    """
+    token_budget = Config.LD_PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    recency_weight = Config.LD_PROMPT_RECENCY_WEIGHT if recency_weight is None else recency_weight
+    max_error_words = Config.LD_PROMPT_MAX_ERROR_WORDS if max_error_words is None else max_error_words
+
+    data = assessment_data.get("data") or {}
+    raw_tasks = []
+    if data.get("dyslexia"):
+        raw_tasks += [(t, "reading") for t in data["dyslexia"].get("audioTask") or []]
+    if data.get("dysgraphia"):
+        raw_tasks += [(t, "writing") for t in data["dysgraphia"].get("writingTasks") or []]
+    raw_tasks.sort(key=lambda item: str(item[0].get("timestamp") or ""))
+
+    features = [summarize_task(t, kind, max_error_words) for t, kind in raw_tasks]
+    emotion_totals = Counter()
+    for f in features:
+        emotion_totals.update(f.get("emotions") or {})
+
+    compact = {
+        "status": assessment_data.get("status", True),
+        "data": {
+            "history": data.get("history"),
+            "summary": {
+                "reading": _aggregate([f for f in features if f["kind"] == "reading"]),
+                "writing": _aggregate([f for f in features if f["kind"] == "writing"]),
+                "emotionOccurrences": dict(emotion_totals.most_common()),
+            },
+            "readingTasks": [],
+            "writingTasks": [],
+            "tasksOmitted": 0,
+        }
+    }
+
+    # Most informative first: 1 - accuracy, plus up to `recency_weight` for the newest task
+    count = len(features)
+    ranked = sorted(
+        range(count),
+        key=lambda i: (1.0 - features[i]["accuracy"]) + recency_weight * (i + 1) / count,
+        reverse=True
+    )
+    used = estimate_tokens(json.dumps(compact, separators=(",", ":")))
+    kept = []
+    for i in ranked:
+        cost = estimate_tokens(json.dumps(features[i], separators=(",", ":")))
+        if used + cost > token_budget:
+            continue
+        used += cost
+        kept.append(i)
+    for i in sorted(kept):  # Chronological in the prompt
+        task = dict(features[i])
+        compact["data"][task.pop("kind") + "Tasks"].append(task)
+    compact["data"]["tasksOmitted"] = count - len(kept)
+
+    return compact, {"tasksTotal": count, "tasksKept": len(kept)}
+
+
+class PromptStats:
+    """Prompt size before/after compaction and model latency of the last `window` calls."""
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.calls = 0
+
+    def record(self, sizes, model_seconds=None, first_chunk_seconds=None):
+        """`sizes` is the dict returned by build_prompt."""
+        with self._lock:
+            self.calls += 1
+            self._recent.append({
+                "rawTokens": sizes["rawTokens"],
+                "promptTokens": sizes["promptTokens"],
+                "compactionMs": sizes["compactionMs"],
+                "modelSeconds": model_seconds,
+                "firstChunkSeconds": first_chunk_seconds,
+            })
+
+    def snapshot(self):
+        with self._lock:
+            recent = list(self._recent)
+
+        def mean(key):
+            values = [r[key] for r in recent if r[key] is not None]
+            return round(sum(values) / len(values), 3) if values else None
+
+        raw, prompt = mean("rawTokens"), mean("promptTokens")
+        return {
+            "calls": self.calls,
+            "meanRawTokens": raw,
+            "meanPromptTokens": prompt,
+            "reduction": round(1.0 - prompt / raw, 3) if raw else None,
+            "meanCompactionMs": mean("compactionMs"),
+            "meanModelSeconds": mean("modelSeconds"),
+            "meanFirstChunkSeconds": mean("firstChunkSeconds"),
+        }
+
+
+prompt_stats = PromptStats()
+
+
+def build_prompt(assessment_data):
+    """
+    Serialise the assessment for the model, compacting it first when
+    Config.LD_PROMPT_COMPACTION is on. Returns (prompt_text, payload, sizes), where
+    `payload` is what the prompt was built from (and what the result cache keys on).
+    """
+    started = time.perf_counter()
+    raw_text = json.dumps(assessment_data)
+    if not Config.LD_PROMPT_COMPACTION:
+        tokens = estimate_tokens(raw_text)
+        return raw_text, assessment_data, {"rawTokens": tokens, "promptTokens": tokens, "compactionMs": 0.0}
+
+    payload, task_stats = compact_assessment(assessment_data)
+    prompt_text = json.dumps(payload, separators=(",", ":"))
+    sizes = {
+        "rawTokens": estimate_tokens(raw_text),
+        "promptTokens": estimate_tokens(prompt_text),
+        "compactionMs": round((time.perf_counter() - started) * 1000.0, 3),
+        **task_stats,
+    }
+    print(f"🗜️ Prompt compacted: ~{sizes['rawTokens']} -> ~{sizes['promptTokens']} tokens "
+          f"({task_stats['tasksKept']}/{task_stats['tasksTotal']} tasks)")
+    return prompt_text, payload, sizes
+
+
+if __name__ == "__main__":
+    # Prompt size with and without compaction for a student with an ever-growing task history
+    import random
+
+    random.seed(0)
+    sentences = ["The cat sat on the mat", "A big brown dog ran fast", "She sells sea shells by the sea shore"]
+    emotions = ["Neutral", "Happiness", "Sadness", "Fear"]
+
+    def sample(tasks):
+        def task(i, kind):
+            expected = random.choice(sentences)
+            words = expected.split()
+            recognized = " ".join(w for w in words if random.random() > 0.2)
+            entry = {"originalText": expected, "recognizedText": recognized,
+                     "timestamp": f"2025-01-{1 + i % 28:02d}T10:{i % 60:02d}:00"}
+            if kind == "reading":
+                entry["emotions"] = [random.choice(emotions) for _ in range(10)]
+            else:
+                entry["task"] = f"Task {i}"
+            return entry
+
+        return {"status": True, "data": {
+            "history": {"name": "Test", "age": 9},
+            "dyslexia": {"audioTask": [task(i, "reading") for i in range(tasks)]},
+            "dysgraphia": {"writingTasks": [task(i, "writing") for i in range(tasks)]},
+        }}
+
+    print(f"{'tasks':>6} {'raw tokens':>11} {'prompt tokens':>14} {'kept':>6} {'ms':>7}")
+    for n in (5, 20, 100, 500):
+        _, _, sizes = build_prompt(sample(n))
+        print(f"{2 * n:6d} {sizes['rawTokens']:11d} {sizes['promptTokens']:14d} {sizes.get('tasksKept', 2 * n):6d} "
+              f"{sizes['compactionMs']:7.2f}")
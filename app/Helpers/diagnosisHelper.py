@@ -0,0 +1,255 @@
+import threading
+import time
+from json import JSONDecodeError
+
+from app.Config.config import Config
+from app.Model.LD_Identification import identify, stream_identify, markdown_to_json, MODEL_NAME, PROMPT_VERSION
+from app.Helpers.userHelper import (
+    get_user_assessment_data, save_model_response,
+    start_partial_result, save_partial_section, finish_partial_result
+)
+from app.Helpers.cacheHelper import ld_result_cache, assessment_cache_key
+from app.Helpers.jsonStream import IncrementalJSONSections
+from app.Helpers.singleFlight import SingleFlight
+from app.Helpers.compactionHelper import build_prompt, prompt_stats
+
+# Limits concurrent outbound Gemini generations across request threads and job workers
+model_call_slots = threading.BoundedSemaphore(Config.LD_MAX_CONCURRENT_MODEL_CALLS)
+
+# Duplicate identification requests for the same user share the run already in flight
+ld_flights = SingleFlight()
+
+
+class SupersededError(Exception):
+    """Raised from an on_progress callback to abandon a run whose input data changed."""
+
+
+def build_result_document(user_id, model_response):
+    # Transform JSON into a structured MongoDB document
+    return {
+        "userID": user_id,
+        "name": model_response["studentProfile"]["name"],
+        "age": model_response["studentProfile"]["age"],
+        "relationship": model_response["studentProfile"]["relationship"],
+        "preferredLearningStyle": model_response["studentProfile"]["preferredLearningStyle"],
+        "strengths": model_response["studentProfile"]["strengths"],
+        "struggles": model_response["studentProfile"]["struggles"],
+        "previousDiagnosis": model_response["studentProfile"]["previousDiagnosis"],
+        "mainConcerns": model_response["studentProfile"]["mainConcerns"],
+        "previousSupport": model_response["studentProfile"]["previousSupport"],
+        "learningDisabilities": [
+            {
+                "type": key,
+                "confidenceScore": model_response["learningDisabilities"][key]["confidenceScore"],
+                "indicators": model_response["learningDisabilities"][key]["indicators"]
+            } for key in model_response["learningDisabilities"]
+        ],
+        "emotionAnalysis": {
+            "dominantEmotions": model_response["emotionAnalysis"]["dominantEmotions"],
+            "emotionOccurrences": model_response["emotionAnalysis"]["emotionOccurrences"],
+            "graphData": model_response["emotionAnalysis"]["graphData"]
+        }
+    }
+
+
+def run_ld_identification(user_id, on_progress=None, refresh=False, persist=True):
+    """
+    Run the full learning-disability identification for one user: load the assessment
+    data, call the model, and save the structured result.
+
+    The model is only called when the result cache has no entry for the same assessment
+    payload, model and prompt version, or when `refresh` asks for a re-diagnosis.
+    A call made while an identical one (same user and `refresh`) is in flight waits for
+    it and reuses its result; only the caller that started the run sees `on_progress`.
+    If that run is abandoned (its on_progress raised SupersededError), the waiting
+    callers start or join a fresh run instead of failing.
+    `on_progress(characters, chunks)` is called as the model streams its answer.
+    With `persist=False` the result only warms the cache and nothing is saved for the
+    user (speculative runs). Returns a (response_dict, http_status) pair shared by the
+    synchronous route and the background job workers.
+    """
+    superseded_here = []
+
+    def progress(characters, chunks):
+        try:
+            on_progress(characters, chunks)
+        except SupersededError:
+            superseded_here.append(True)
+            raise
+
+    while True:
+        try:
+            (data, error), shared = ld_flights.do(
+                (user_id, bool(refresh)), _run_ld_identification, user_id,
+                progress if on_progress is not None else None, refresh
+            )
+            break
+        except SupersededError:
+            if superseded_here:
+                raise
+            print(f"🔁 Joined identification for user {user_id} was superseded; running again")
+    if shared:
+        print(f"🔗 Shared in-flight identification for user {user_id}")
+    if error is not None:
+        return error
+
+    if not persist:
+        return {"status": True, "message": "Identification result cached"}, 200
+    # Save the model response to MongoDB
+    try:
+        return save_model_response(user_id, data), 200
+    except Exception as e:
+        print(f"❌ Unexpected Error: {e}")
+        return {'error': 'An error occurred while processing the request'}, 500
+
+
+def _run_ld_identification(user_id, on_progress=None, refresh=False):
+    # Returns (result document, None) or (None, (error response, http status))
+    assessment_data = get_user_assessment_data(user_id)
+    if not assessment_data or not assessment_data.get("status"):
+        print("❌ No assessment data found for user")
+        return None, ({'error': 'No assessment data found'}, 404)
+
+    print(f"📊 Assessment Data: {assessment_data}")
+    try:
+        assessment_json_str, prompt_payload, prompt_sizes = build_prompt(assessment_data)
+    except TypeError as e:
+        print(f"❌ JSON Serialize Error: {e}")
+        return None, ({'error': 'Assessment data contains non-serializable values'}, 500)
+
+    # Call AI model for learning disability analysis
+    try:
+        cache_key = assessment_cache_key(prompt_payload, MODEL_NAME, PROMPT_VERSION)
+        model_response = None
+        if refresh:
+            ld_result_cache.record_bypass()
+        else:
+            model_response = ld_result_cache.get(cache_key)
+
+        cached = model_response is not None
+        if cached:
+            print("♻️ Using cached identification result")
+        else:
+            with model_call_slots:
+                started = time.perf_counter()
+                first_chunk = []
+
+                def on_chunk(characters, chunks):
+                    if not first_chunk:
+                        first_chunk.append(time.perf_counter() - started)
+                    if on_progress is not None:
+                        on_progress(characters, chunks)
+
+                model_response = identify(assessment_json_str, on_chunk=on_chunk)
+                prompt_stats.record(prompt_sizes, time.perf_counter() - started,
+                                    first_chunk[0] if first_chunk else None)
+
+        print("\n=== Model Response Debug ===")
+        print(f"🔍 Response Type: {type(model_response)}")
+        print(f"📝 Raw Response: {repr(model_response)[:200]}...")  # Show first 200 chars
+
+        Data = build_result_document(user_id, model_response)
+        # Only cache responses that have the expected structure
+        if not cached:
+            ld_result_cache.put(cache_key, model_response, user_id)
+        return Data, None
+
+    except SupersededError:
+        raise
+    except JSONDecodeError as e:
+        print(f"❌ JSON Parsing Error from Model Response: {e}")
+        return None, ({'error': 'Invalid JSON response from AI model'}, 500)
+    except Exception as e:
+        print(f"❌ Unexpected Error: {e}")
+        return None, ({'error': 'An error occurred while processing the request'}, 500)
+
+
+def _sections(model_response):
+    # Same (path, value) pairs the incremental parser emits, for a complete response
+    for key, value in model_response.items():
+        if key == "learningDisabilities" and isinstance(value, dict):
+            for name, section in value.items():
+                yield f"learningDisabilities.{name}", section
+        else:
+            yield key, value
+
+
+def stream_ld_identification(user_id, refresh=False, progress_interval=0.5):
+    """
+    Streaming variant of run_ld_identification. Yields (event, data) pairs as the model
+    generates its answer:
+
+    - "started" immediately, before the model is called
+    - "section" for every top-level member of the answer (and every learning disability)
+      as soon as it is complete; each one is also stored in `ld_partial_results`
+    - "progress" with the characters received so far, at most every `progress_interval` s
+    - "done" with the saved result, or "error" with an `error` message and `httpStatus`
+    """
+    yield "started", {"userID": user_id}
+
+    assessment_data = get_user_assessment_data(user_id)
+    if not assessment_data or not assessment_data.get("status"):
+        print("❌ No assessment data found for user")
+        yield "error", {"error": "No assessment data found", "httpStatus": 404}
+        return
+
+    try:
+        assessment_json_str, prompt_payload, prompt_sizes = build_prompt(assessment_data)
+    except TypeError as e:
+        print(f"❌ JSON Serialize Error: {e}")
+        yield "error", {"error": "Assessment data contains non-serializable values", "httpStatus": 500}
+        return
+
+    try:
+        cache_key = assessment_cache_key(prompt_payload, MODEL_NAME, PROMPT_VERSION)
+        model_response = None
+        if refresh:
+            ld_result_cache.record_bypass()
+        else:
+            model_response = ld_result_cache.get(cache_key)
+
+        cached = model_response is not None
+        if cached:
+            print("♻️ Using cached identification result")
+            for path, value in _sections(model_response):
+                yield "section", {"path": path, "value": value}
+        else:
+            start_partial_result(user_id)
+            parser = IncrementalJSONSections()
+            parts = []
+            characters = 0
+            last_progress = 0.0
+            with model_call_slots:
+                started = time.perf_counter()
+                first_chunk = None
+                for text in stream_identify(assessment_json_str):
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - started
+                    parts.append(text)
+                    characters += len(text)
+                    for path, value in parser.feed(text):
+                        save_partial_section(user_id, path, value)
+                        yield "section", {"path": path, "value": value}
+                    now = time.monotonic()
+                    if now - last_progress >= progress_interval:
+                        last_progress = now
+                        yield "progress", {"characters": characters, "chunks": len(parts)}
+                prompt_stats.record(prompt_sizes, time.perf_counter() - started, first_chunk)
+            model_response = markdown_to_json("".join(parts))
+
+        Data = build_result_document(user_id, model_response)
+        if not cached:
+            ld_result_cache.put(cache_key, model_response, user_id)
+            finish_partial_result(user_id, "done")
+
+        response = save_model_response(user_id, Data)
+        yield "done", response
+
+    except Exception as e:
+        # Includes a None/incomplete model response failing build_result_document
+        print(f"❌ Streaming identification failed: {e}")
+        try:
+            finish_partial_result(user_id, "failed")
+        except Exception:
+            pass
+        yield "error", {"error": "An error occurred while processing the request", "httpStatus": 500}
@@ -0,0 +1,406 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.Config.config import Config
+from app.Helpers.indexHelper import ensure_ttl_index
+
+# Key used for frames/recordings that arrive without a userID
+ANONYMOUS_SESSION = "anonymous"
+
+
+def _entry(emotion, confidence=None, at=None):
+    return {
+        "emotion": emotion,
+        "confidence": float(confidence) if confidence is not None else None,
+        "at": at if at is not None else time.time()
+    }
+
+
+class EmotionWindow:
+    """
+    Label counts, mean confidence and an exponential moving average of confidence over
+    the last `frames` detections, the last `seconds`, or (neither) the whole session.
+    Each detection adds to the totals and subtracts whatever falls out of the window,
+    so updates are O(1) amortised and reads never rescan the history.
+
+    The EMA smoothing follows the window: alpha = 2 / (frames + 1) for frame windows,
+    a time constant of `seconds` for time windows, and 1 / n (the running mean) for
+    the whole session.
+    """
+    __slots__ = ("frames", "seconds", "items", "counts", "total", "confidence_sum", "confidence_n",
+                 "ema", "last_at")
+
+    def __init__(self, frames=None, seconds=None):
+        self.frames = frames
+        self.seconds = seconds
+        self.items = deque() if (frames or seconds) else None
+        self.counts = {}
+        self.total = 0
+        self.confidence_sum = 0.0
+        self.confidence_n = 0
+        self.ema = None
+        self.last_at = None
+
+    def _add(self, emotion, confidence, sign):
+        self.counts[emotion] = self.counts.get(emotion, 0) + sign
+        if not self.counts[emotion]:
+            del self.counts[emotion]
+        self.total += sign
+        if confidence is not None:
+            self.confidence_sum += sign * confidence
+            self.confidence_n += sign
+
+    def _expire(self, now):
+        items = self.items
+        if items is None:
+            return
+        while self.frames and len(items) > self.frames:
+            self._add(*items.popleft()[:2], -1)
+        while self.seconds and items and items[0][2] <= now - self.seconds:
+            self._add(*items.popleft()[:2], -1)
+        if not items:
+            self.confidence_sum = 0.0  # drop accumulated float error
+
+    def push(self, emotion, confidence, at):
+        if self.items is not None:
+            self.items.append((emotion, confidence, at))
+        self._add(emotion, confidence, 1)
+        self._expire(at)
+        if confidence is not None:
+            if self.ema is None:
+                self.ema = confidence
+            else:
+                if self.frames:
+                    alpha = 2.0 / (self.frames + 1)
+                elif self.seconds:
+                    alpha = 1.0 - math.exp(-max(0.0, at - self.last_at) / self.seconds)
+                else:
+                    alpha = 1.0 / self.confidence_n
+                self.ema += alpha * (confidence - self.ema)
+            self.last_at = at
+
+    def snapshot(self, now=None):
+        self._expire(now if now is not None else time.time())
+        dominant = max(self.counts, key=self.counts.get) if self.counts else None
+        snapshot = {
+            "frames": self.total,
+            "counts": dict(self.counts),
+            "dominant": dominant,
+            "dominantShare": round(self.counts[dominant] / self.total, 4) if dominant else 0.0,
+            "meanConfidence": round(self.confidence_sum / self.confidence_n, 4) if self.confidence_n else None,
+            "confidenceEma": round(self.ema, 4) if self.ema is not None and self.total else None,
+        }
+        if self.items is not None:
+            # Frame and time windows keep their items; the whole-session window only counts
+            snapshot["labels"] = [item[0] for item in self.items]
+        return snapshot
+
+    def to_state(self):
+        return {
+            "items": [list(item) for item in self.items] if self.items is not None else None,
+            "counts": self.counts,
+            "total": self.total,
+            "confidenceSum": self.confidence_sum,
+            "confidenceN": self.confidence_n,
+            "ema": self.ema,
+            "lastAt": self.last_at,
+        }
+
+    def load_state(self, state):
+        if self.items is not None:
+            self.items = deque(tuple(item) for item in state.get("items") or [])
+        self.counts = dict(state.get("counts") or {})
+        self.total = state.get("total", 0)
+        self.confidence_sum = state.get("confidenceSum", 0.0)
+        self.confidence_n = state.get("confidenceN", 0)
+        self.ema = state.get("ema")
+        self.last_at = state.get("lastAt")
+
+
+class EmotionAggregates:
+    """The configured set of EmotionWindow objects of one session, keyed by window name."""
+    __slots__ = ("windows",)
+
+    def __init__(self, spec=None):
+        spec = spec if spec is not None else Config.EMOTION_WINDOWS
+        self.windows = {name: EmotionWindow(**params) for name, params in spec.items()}
+
+    def push(self, emotion, confidence, at):
+        for window in self.windows.values():
+            window.push(emotion, confidence, at)
+
+    def snapshot(self, now=None):
+        now = now if now is not None else time.time()
+        return {name: window.snapshot(now) for name, window in self.windows.items()}
+
+    def to_state(self):
+        return {name: window.to_state() for name, window in self.windows.items()}
+
+    @classmethod
+    def from_state(cls, state, spec=None):
+        aggregates = cls(spec)
+        for name, window in aggregates.windows.items():
+            if state and name in state:
+                window.load_state(state[name])
+        return aggregates
+
+
+class _EmotionSession:
+    __slots__ = ("entries", "aggregates", "total", "last_seen")
+
+    def __init__(self, capacity, windows):
+        self.entries = deque(maxlen=capacity)
+        self.aggregates = EmotionAggregates(windows)
+        self.total = 0
+        self.last_seen = time.monotonic()
+
+
+class InProcessEmotionStore:
+    """
+    Per-student emotion history held in this process: one fixed-capacity ring buffer
+    per session, evicted after `ttl_seconds` without a new detection. Memory is bounded
+    by `capacity` x the number of active students, however long the service runs.
+    Use it with a single worker process; every worker has its own copy.
+    """
+    backend = "memory"
+
+    def __init__(self, capacity=120, ttl_seconds=1800, sweep_interval=60, windows=None):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.windows = windows
+        self.sweep_interval = sweep_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def append(self, session_id, emotion, confidence=None, at=None):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _EmotionSession(self.capacity, self.windows)
+            entry = _entry(emotion, confidence, at)
+            session.entries.append(entry)
+            session.aggregates.push(entry["emotion"], entry["confidence"], entry["at"])
+            session.total += 1
+            session.last_seen = now
+            if now - self._last_sweep >= self.sweep_interval:
+                self._evict_idle(now)
+
+    def recent(self, session_id, n=None):
+        """The last `n` entries (all kept entries when None), oldest first."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            entries = list(session.entries)
+        return entries[-n:] if n else entries
+
+    def count(self, session_id):
+        """Detections recorded for the session since it was created (not just the kept ones)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.total if session else 0
+
+    def aggregates(self, session_id, now=None):
+        """Windowed aggregates of the session ({} for an unknown session)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.aggregates.snapshot(now) if session else {}
+
+    def drop(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict_idle(self, now):
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.ttl_seconds]
+        for sid in expired:
+            del self._sessions[sid]
+        self._last_sweep = now
+        return len(expired)
+
+    def evict_idle(self):
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "capacity": self.capacity,
+                "sessions": len(self._sessions),
+                "entries": sum(len(s.entries) for s in self._sessions.values())
+            }
+
+
+class MongoEmotionStore:
+    """
+    Per-student emotion history shared by every worker process: one document per
+    session whose `entries` array is capped at `capacity` by `$push` with `$slice`.
+    The windowed aggregates are stored in the same document; an append reads them,
+    applies the detection and writes them back guarded by a `version` field, retrying
+    if another worker updated the session in between; a detection that still conflicts
+    after `max_retries` attempts is logged and skipped (counted in `dropped`) rather than
+    failing the request. Idle sessions are removed by a TTL index on `updatedAt`.
+
+    The version and aggregates this worker last wrote are cached for up to `cache_size`
+    sessions, so while no other worker touches a session an append is a single guarded
+    update_one; the session is only re-read when the guard misses.
+    """
+    backend = "mongo"
+
+    def __init__(self, collection, capacity=120, ttl_seconds=1800, windows=None, max_retries=5,
+                 cache_size=1024):
+        self.collection = collection
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.windows = windows
+        self.max_retries = max_retries
+        self.cache_size = cache_size
+        self.conflicts = 0
+        self.dropped = 0
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        try:
+            ensure_ttl_index(self.collection, "updatedAt", self.ttl_seconds)
+        except PyMongoError as e:
+            # Never fail a detection over index maintenance; indexHelper.ensure_indexes reports it
+            print(f"❌ Could not ensure the emotion session TTL index: {e}")
+        self._indexes_ready = True
+
+    def append(self, session_id, emotion, confidence=None, at=None):
+        self._ensure_indexes()
+        entry = _entry(emotion, confidence, at)
+        doc = self._cached(session_id)
+        cached = doc is not None
+        for _ in range(self.max_retries):
+            if not cached:
+                doc = self.collection.find_one({"_id": session_id}, {"aggregates": True, "version": True})
+            aggregates = EmotionAggregates.from_state(doc.get("aggregates") if doc else None, self.windows)
+            aggregates.push(entry["emotion"], entry["confidence"], entry["at"])
+            if doc is None:
+                try:
+                    self.collection.insert_one({
+                        "_id": session_id,
+                        "entries": [entry],
+                        "total": 1,
+                        "aggregates": aggregates.to_state(),
+                        "version": 1,
+                        "updatedAt": datetime.now(timezone.utc)
+                    })
+                    self._remember(session_id, 1, aggregates)
+                    return
+                except DuplicateKeyError:
+                    pass  # Another worker created the session first
+            else:
+                version = (doc.get("version") or 0) + 1
+                result = self.collection.update_one(
+                    {"_id": session_id, "version": doc.get("version")},
+                    {
+                        "$push": {"entries": {"$each": [entry], "$slice": -self.capacity}},
+                        "$inc": {"total": 1},
+                        "$set": {"aggregates": aggregates.to_state(), "version": version,
+                                 "updatedAt": datetime.now(timezone.utc)}
+                    }
+                )
+                if result.matched_count:
+                    self._remember(session_id, version, aggregates)
+                    return
+            if cached:
+                cached = False  # Stale cache (another worker wrote, or TTL expiry); not a conflict
+                continue
+            self.conflicts += 1
+        # Frames of one session batched together keep racing; losing one is better than a 500
+        self.dropped += 1
+        print(f"❌ Emotion session {session_id!r} kept changing; detection not recorded")
+
+    def _cached(self, session_id):
+        with self._cache_lock:
+            return self._cache.get(session_id)
+
+    def _remember(self, session_id, version, aggregates):
+        with self._cache_lock:
+            self._cache[session_id] = {"version": version, "aggregates": aggregates.to_state()}
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def recent(self, session_id, n=None):
+        self._ensure_indexes()
+        doc = self.collection.find_one(
+            {"_id": session_id},
+            {"entries": {"$slice": -n} if n else True, "_id": False}
+        )
+        return doc.get("entries", []) if doc else []
+
+    def count(self, session_id):
+        doc = self.collection.find_one({"_id": session_id}, {"total": True})
+        return doc.get("total", 0) if doc else 0
+
+    def aggregates(self, session_id, now=None):
+        doc = self.collection.find_one({"_id": session_id}, {"aggregates": True})
+        if not doc:
+            return {}
+        return EmotionAggregates.from_state(doc.get("aggregates"), self.windows).snapshot(now)
+
+    def drop(self, session_id):
+        with self._cache_lock:
+            self._cache.pop(session_id, None)
+        self.collection.delete_one({"_id": session_id})
+
+    def evict_idle(self):
+        # Expiry is done by MongoDB's TTL monitor
+        return 0
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "capacity": self.capacity,
+            "sessions": self.collection.estimated_document_count(),
+            "conflicts": self.conflicts,
+            "dropped": self.dropped
+        }
+
+
+def _check_rl_window():
+    # /users/rl_action reports the window's labels, which only bounded windows keep
+    params = Config.EMOTION_WINDOWS.get(Config.EMOTION_RL_WINDOW)
+    if params is None or not (params.get("frames") or params.get("seconds")):
+        raise ValueError(
+            f"EMOTION_RL_WINDOW {Config.EMOTION_RL_WINDOW!r} must name a frame or time window in EMOTION_WINDOWS"
+        )
+
+
+def create_emotion_store(backend=None):
+    """Build the store named by Config.EMOTION_STORE_BACKEND (or `backend`)."""
+    _check_rl_window()
+    backend = backend or Config.EMOTION_STORE_BACKEND
+    if backend == "memory":
+        return InProcessEmotionStore(
+            capacity=Config.EMOTION_HISTORY_SIZE,
+            ttl_seconds=Config.EMOTION_SESSION_TTL_SECONDS,
+            windows=Config.EMOTION_WINDOWS
+        )
+    if backend == "mongo":
+        from app.Helpers.userHelper import db
+
+        return MongoEmotionStore(
+            db.emotion_sessions,
+            capacity=Config.EMOTION_HISTORY_SIZE,
+            ttl_seconds=Config.EMOTION_SESSION_TTL_SECONDS,
+            windows=Config.EMOTION_WINDOWS
+        )
+    raise ValueError(f"Unknown emotion store backend {backend!r}; expected 'memory' or 'mongo'")
+
+
+emotion_store = create_emotion_store()
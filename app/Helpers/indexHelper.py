@@ -0,0 +1,233 @@
+import sys
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from app.Config.config import Config
+
+
+def declared_indexes():
+    """
+    Every index the helpers rely on, as {"collection", "keys", "options"}. Index names
+    are left to MongoDB's default ("field_1") unless a helper already creates the index
+    under another name, so creating them here and lazily in the helpers never conflicts.
+    """
+    indexes = [
+        # login / signup
+        {"collection": "users", "keys": [("email", ASCENDING)], "options": {"unique": True}},
+        # check_assessed, HistoryAssesment, get_user_assessment_data (one history per user)
+        {"collection": "history", "keys": [("userId", ASCENDING)], "options": {"unique": True}},
+        # Task ingestion upserts (see userHelper.push_tasks); duplicates from before the index
+        # must be merged first: python -m app.Helpers.indexHelper merge-duplicates
+        {"collection": "dyslexia_diagnosis", "keys": [("userID", ASCENDING)],
+         "options": {"unique": True, "name": "userID_unique"}},
+        {"collection": "dysgraphia_diagnosis", "keys": [("userID", ASCENDING)],
+         "options": {"unique": True, "name": "userID_unique"}},
+        # get_assessment_result (newest result; older data may hold several per user)
+        {"collection": "assessment_results_collection", "keys": [("userID", ASCENDING), ("_id", DESCENDING)],
+         "options": {}},
+        # Streamed identification sections, one document per user
+        {"collection": "ld_partial_results", "keys": [("userID", ASCENDING)], "options": {"unique": True}},
+        # Finished identification jobs expiry (see jobHelper.LDJobQueue)
+        {"collection": "ld_jobs", "keys": [("finishedAt", ASCENDING)],
+         "options": {"expireAfterSeconds": Config.LD_JOB_TTL_SECONDS}},
+        # Identification result cache expiry (see cacheHelper.LDResultCache)
+        {"collection": "ld_result_cache", "keys": [("createdAt", ASCENDING)],
+         "options": {"expireAfterSeconds": Config.LD_CACHE_TTL_SECONDS}},
+    ]
+    if Config.EMOTION_STORE_BACKEND == "mongo":
+        # Idle emotion sessions (see emotionHelper.MongoEmotionStore)
+        indexes.append({"collection": "emotion_sessions", "keys": [("updatedAt", ASCENDING)],
+                        "options": {"expireAfterSeconds": Config.EMOTION_SESSION_TTL_SECONDS}})
+    return indexes
+
+
+# IndexOptionsConflict / IndexKeySpecsConflict: same keys, different options
+_OPTIONS_CONFLICT_CODES = (85, 86)
+
+
+def ensure_ttl_index(collection, field, expire_after_seconds):
+    """
+    Create the TTL index on `field`, or change its expireAfterSeconds in place (collMod)
+    when it already exists with another value, e.g. after the configured TTL changed.
+    """
+    try:
+        collection.create_index([(field, ASCENDING)], expireAfterSeconds=expire_after_seconds)
+    except OperationFailure as e:
+        if e.code not in _OPTIONS_CONFLICT_CODES:
+            raise
+        collection.database.command(
+            "collMod", collection.name,
+            index={"keyPattern": {field: ASCENDING}, "expireAfterSeconds": expire_after_seconds}
+        )
+
+
+def _find_index(existing, spec):
+    return next((info for info in existing.values() if list(info["key"]) == list(spec["keys"])), None)
+
+
+def _has_index(existing, spec):
+    return _find_index(existing, spec) is not None
+
+
+def ensure_indexes(database):
+    """
+    Create every declared index that is missing. Safe to run repeatedly and from several
+    processes. A TTL index whose expireAfterSeconds differs from the configured value is
+    changed in place. Returns one row per index with status "exists", "created",
+    "updated" or "failed".
+    """
+    rows = []
+    for spec in declared_indexes():
+        collection = database[spec["collection"]]
+        row = {"collection": spec["collection"], "keys": [k for k, _ in spec["keys"]]}
+        ttl = spec["options"].get("expireAfterSeconds")
+        try:
+            existing = _find_index(collection.index_information(), spec)
+            if existing is not None and ttl is not None and existing.get("expireAfterSeconds") != ttl:
+                ensure_ttl_index(collection, spec["keys"][0][0], ttl)
+                row["status"] = "updated"
+            elif existing is not None:
+                row["status"] = "exists"
+            else:
+                row["name"] = collection.create_index(spec["keys"], **spec["options"])
+                row["status"] = "created"
+        except OperationFailure as e:
+            # e.g. duplicate values already stored under a field declared unique
+            row.update({"status": "failed", "error": str(e)})
+        rows.append(row)
+    return rows
+
+
+def missing_indexes(database):
+    """Declared indexes that do not exist yet (without creating anything)."""
+    missing = []
+    for spec in declared_indexes():
+        existing = database[spec["collection"]].index_information()
+        if not _has_index(existing, spec):
+            missing.append({"collection": spec["collection"], "keys": [k for k, _ in spec["keys"]]})
+    return missing
+
+
+def merge_duplicate_task_documents(database, collection_name, field, max_tasks, apply=False):
+    """
+    Documents created by the old find/insert race in the task collections: every user's
+    extra documents are folded into their oldest one (tasks appended in _id order, capped
+    at `max_tasks`). Nothing is written unless `apply`; returns one row per affected user.
+    """
+    collection = database[collection_name]
+    rows = []
+    duplicates = collection.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$userID", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ])
+    for group in duplicates:
+        keep, *extra = group["ids"]
+        tasks = []
+        for doc in collection.find({"_id": {"$in": extra}}, {field: True}).sort("_id", ASCENDING):
+            tasks.extend(doc.get(field, []))
+        if apply:
+            collection.update_one({"_id": keep}, {"$push": {field: {"$each": tasks, "$slice": -max_tasks}}})
+            collection.delete_many({"_id": {"$in": extra}})
+        rows.append({"collection": collection_name, "userID": group["_id"], "kept": keep,
+                     "removed": extra, "tasksMoved": len(tasks)})
+    return rows
+
+
+# The lookups done by the helpers as (label, collection, filter, projection, sort), with
+# placeholder values (plans do not depend on them)
+_SAMPLE_ID = "000000000000000000000000"
+HELPER_QUERIES = [
+    ("user_exists / login", "users", {"email": "student@example.com"}, None, None),
+    ("check_diagnosed", "users", {"_id": ObjectId(_SAMPLE_ID)}, None, None),
+    ("check_assessed / HistoryAssesment", "history", {"userId": _SAMPLE_ID}, None, None),
+    ("add_dylexia_data / get_user_assessment_data", "dyslexia_diagnosis", {"userID": _SAMPLE_ID}, None, None),
+    ("add_dysgraphia_image_data / get_user_assessment_data", "dysgraphia_diagnosis", {"userID": _SAMPLE_ID},
+     None, None),
+    ("has_complete_assessment (history)", "history", {"userId": _SAMPLE_ID}, {"_id": 1}, None),
+    ("has_complete_assessment (audio)", "dyslexia_diagnosis",
+     {"userID": _SAMPLE_ID, "audioTask.0": {"$exists": True}}, {"_id": 1}, None),
+    ("has_complete_assessment (writing)", "dysgraphia_diagnosis",
+     {"userID": _SAMPLE_ID, "writingTasks.0": {"$exists": True}}, {"_id": 1}, None),
+    ("get_assessment_result", "assessment_results_collection", {"userID": _SAMPLE_ID}, None,
+     [("_id", DESCENDING)]),
+    ("save_model_response", "assessment_results_collection", {"userID": _SAMPLE_ID}, {"_id": 1}, None),
+    ("save_partial_section", "ld_partial_results", {"userID": _SAMPLE_ID}, None, None),
+]
+
+
+def _plan_stages(node):
+    # Stage names anywhere in an explain() plan tree (classic or slot-based engine layout)
+    stages = []
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+        for value in node.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(node, list):
+        for value in node:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def check_query_plans(database):
+    """
+    explain() every helper query, with the projection and sort the helper uses, and report
+    whether its winning plan uses an index (IXSCAN, or the _id fast paths IDHACK /
+    EXPRESS_*) rather than a COLLSCAN, and whether it needs an in-memory SORT stage.
+    """
+    rows = []
+    for label, collection, query, projection, sort in HELPER_QUERIES:
+        cursor = database[collection].find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.limit(1).explain()
+        stages = _plan_stages(plan.get("queryPlanner", {}).get("winningPlan", {}))
+        rows.append({
+            "query": label,
+            "collection": collection,
+            "stages": stages,
+            "usesIndex": "COLLSCAN" not in stages and any(
+                "IXSCAN" in s or "IDHACK" in s or s.startswith("EXPRESS") for s in stages
+            ),
+            "blockingSort": "SORT" in stages,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    # python -m app.Helpers.indexHelper [ensure|report|explain|merge-duplicates [--apply]]
+    from app.Helpers.userHelper import db, TASK_COLLECTIONS
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+    if command == "ensure":
+        rows = ensure_indexes(db)
+        for row in rows:
+            print(f"{row['status']:8s} {row['collection']}.{','.join(row['keys'])} {row.get('error', '')}")
+        sys.exit(1 if any(row["status"] == "failed" for row in rows) else 0)
+    elif command == "report":
+        missing = missing_indexes(db)
+        for row in missing:
+            print(f"missing  {row['collection']}.{','.join(row['keys'])}")
+        print(f"{len(missing)} missing index(es)")
+        sys.exit(1 if missing else 0)
+    elif command == "explain":
+        rows = check_query_plans(db)
+        for row in rows:
+            ok = row["usesIndex"] and not row["blockingSort"]
+            print(f"{'ok  ' if ok else 'SCAN'} {row['query']:55s} {' > '.join(row['stages'])}")
+        sys.exit(0 if all(row["usesIndex"] and not row["blockingSort"] for row in rows) else 1)
+    elif command == "merge-duplicates":
+        apply = "--apply" in sys.argv[2:]
+        total = 0
+        for field, (name, max_tasks) in TASK_COLLECTIONS.items():
+            for row in merge_duplicate_task_documents(db, name, field, max_tasks, apply=apply):
+                total += len(row["removed"])
+                print(f"{'merged ' if apply else 'would merge'} {name} userID={row['userID']} keep={row['kept']} "
+                      f"remove={','.join(str(i) for i in row['removed'])} tasks={row['tasksMoved']}")
+        print(f"{total} duplicate document(s) {'removed' if apply else 'found; re-run with --apply to merge'}")
+    else:
+        print("usage: python -m app.Helpers.indexHelper [ensure|report|explain|merge-duplicates [--apply]]")
+        sys.exit(2)
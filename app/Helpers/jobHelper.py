@@ -0,0 +1,198 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from app.Config.config import Config
+from app.Helpers.userHelper import db
+from app.Helpers.diagnosisHelper import run_ld_identification
+from app.Helpers.indexHelper import ensure_ttl_index
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class LDJobQueue:
+    """
+    Submit/poll job queue for learning-disability identification.
+
+    Jobs run on a bounded pool of worker threads, so a long Gemini generation never holds
+    a web worker. Job state (queued/running/done/failed), streaming progress and the
+    final result are stored in the `ld_jobs` collection, which any worker process can poll.
+
+    The owning process refreshes `updatedAt` on its active jobs every `heartbeat_seconds`.
+    A queued/running job not refreshed for `lease_seconds` belonged to a process that
+    stopped (restart, crash) and is reported as failed instead of polling forever.
+    Finished jobs are removed `ttl_seconds` after `finishedAt` by a TTL index.
+    """
+    # Typical length of a complete answer, used to turn streamed characters into a fraction
+    EXPECTED_RESPONSE_CHARS = 3000
+
+    def __init__(self, collection, workers=2, max_queued=50, progress_interval=1.0, lease_seconds=60,
+                 heartbeat_seconds=15, ttl_seconds=24 * 3600):
+        self.collection = collection
+        self.workers = workers
+        self.max_queued = max_queued
+        self.progress_interval = progress_interval
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ld-job")
+        self._pending = 0
+        self._active = set()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        self._indexes_ready = False
+
+    def _ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        try:
+            ensure_ttl_index(self.collection, "finishedAt", self.ttl_seconds)
+        except PyMongoError as e:
+            print(f"❌ Could not ensure the ld_jobs TTL index: {e}")
+        self._indexes_ready = True
+
+    def _ensure_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name="ld-job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self):
+        while True:
+            time.sleep(self.heartbeat_seconds)
+            with self._lock:
+                active = list(self._active)
+            try:
+                if active:
+                    self.collection.update_many(
+                        {"_id": {"$in": active}, "status": {"$in": ACTIVE_STATES}},
+                        {"$set": {"updatedAt": datetime.now(timezone.utc)}}
+                    )
+                self.reap_orphans()
+            except PyMongoError as e:
+                print(f"❌ LD job heartbeat failed: {e}")
+
+    def _orphan_filter(self):
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.lease_seconds)
+        return {"status": {"$in": ACTIVE_STATES}, "updatedAt": {"$lt": cutoff}}
+
+    def _orphan_update(self):
+        now = datetime.now(timezone.utc)
+        return {"$set": {
+            "status": "failed",
+            "error": "The server restarted before the analysis finished. Please try again.",
+            "updatedAt": now,
+            "finishedAt": now
+        }}
+
+    def reap_orphans(self):
+        """Mark every queued/running job whose lease expired as failed; returns how many."""
+        return self.collection.update_many(self._orphan_filter(), self._orphan_update()).modified_count
+
+    def submit(self, user_id, refresh=False):
+        with self._lock:
+            if self._pending >= self.max_queued:
+                raise QueueFullError("Too many identification jobs queued")
+            self._pending += 1
+
+        self._ensure_indexes()
+        self._ensure_heartbeat()
+        job_id = uuid.uuid4().hex
+        now = datetime.now(timezone.utc)
+        try:
+            self.collection.insert_one({
+                "_id": job_id,
+                "userID": user_id,
+                "status": "queued",
+                "progress": {"fraction": 0.0, "characters": 0, "chunks": 0},
+                "createdAt": now,
+                "updatedAt": now
+            })
+            with self._lock:
+                self._active.add(job_id)
+            self._executor.submit(self._run, job_id, user_id, refresh)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._active.discard(job_id)
+            raise
+        return job_id
+
+    def _update(self, job_id, fields):
+        fields["updatedAt"] = datetime.now(timezone.utc)
+        if fields.get("status") in ("done", "failed"):
+            fields["finishedAt"] = fields["updatedAt"]
+        self.collection.update_one({"_id": job_id}, {"$set": fields})
+
+    def _run(self, job_id, user_id, refresh=False):
+        try:
+            self._update(job_id, {"status": "running", "startedAt": datetime.now(timezone.utc)})
+            last_write = [0.0]
+
+            def on_progress(characters, chunks):
+                # Throttle progress writes; the model can stream dozens of chunks per second
+                now = time.monotonic()
+                if now - last_write[0] < self.progress_interval:
+                    return
+                last_write[0] = now
+                self._update(job_id, {"progress": {
+                    "fraction": round(min(0.95, characters / self.EXPECTED_RESPONSE_CHARS), 3),
+                    "characters": characters,
+                    "chunks": chunks
+                }})
+
+            response, status_code = run_ld_identification(user_id, on_progress=on_progress, refresh=refresh)
+            if status_code == 200 and response.get("status", True):
+                self._update(job_id, {"status": "done", "result": response, "progress.fraction": 1.0})
+            else:
+                self._update(job_id, {
+                    "status": "failed",
+                    "error": response.get("error") or response.get("message"),
+                    "httpStatus": status_code
+                })
+        except Exception as e:
+            print(f"❌ LD identification job {job_id} failed: {e}")
+            self._update(job_id, {"status": "failed", "error": str(e)})
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._active.discard(job_id)
+
+    def get(self, job_id):
+        job = self.collection.find_one({"_id": job_id})
+        if not job:
+            return None
+        if job.get("status") in ACTIVE_STATES:
+            with self._lock:
+                owned = job_id in self._active
+            if not owned:
+                # Another process may own it; only its heartbeat keeps the lease alive
+                reaped = self.collection.find_one_and_update(
+                    {"_id": job_id, **self._orphan_filter()}, self._orphan_update(),
+                    return_document=ReturnDocument.AFTER
+                )
+                job = reaped or job
+        job["jobId"] = job.pop("_id")
+        for key in ("createdAt", "updatedAt", "startedAt", "finishedAt"):
+            if key in job:
+                job[key] = job[key].isoformat()
+        return job
+
+
+ld_jobs = LDJobQueue(
+    db.ld_jobs,
+    workers=Config.LD_JOB_WORKERS,
+    max_queued=Config.LD_JOB_MAX_QUEUED,
+    lease_seconds=Config.LD_JOB_LEASE_SECONDS,
+    heartbeat_seconds=Config.LD_JOB_HEARTBEAT_SECONDS,
+    ttl_seconds=Config.LD_JOB_TTL_SECONDS
+)
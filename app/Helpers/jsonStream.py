@@ -0,0 +1,119 @@
+import json
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "expect_key", "tracked", "prefix", "value_start")
+
+    def __init__(self, kind, tracked=False, prefix=""):
+        self.kind = kind
+        self.key = None
+        self.expect_key = kind == "{"
+        self.tracked = tracked
+        self.prefix = prefix
+        self.value_start = None
+
+
+class IncrementalJSONSections:
+    """
+    Incremental parser for a streamed JSON object (optionally wrapped in a ```json
+    Markdown fence). Text is fed chunk by chunk; every time a top-level member finishes,
+    `feed` returns it as a (path, value) pair, without waiting for the whole document.
+
+    Members whose key is in `nested` are not returned as a whole; each of their own
+    members is returned as soon as it closes instead, with a dotted path such as
+    "learningDisabilities.Dyslexia".
+    """
+    def __init__(self, nested=("learningDisabilities",)):
+        self.nested = set(nested)
+        self._chunks = []
+        self._joined = ""
+        self._length = 0
+        self._stack = []
+        self._started = False
+        self._finished = False
+        self._in_string = False
+        self._escape = False
+        self._key_chars = None
+
+    @property
+    def finished(self):
+        return self._finished
+
+    def _text(self):
+        if len(self._joined) != self._length:
+            self._joined = "".join(self._chunks)
+        return self._joined
+
+    def _open_value(self, frame, pos):
+        if frame.tracked and frame.value_start is None and not (frame.kind == "{" and frame.expect_key):
+            frame.value_start = pos
+
+    def _close_value(self, frame, pos, events):
+        if not frame.tracked or frame.value_start is None:
+            return
+        raw = self._text()[frame.value_start:pos].strip()
+        frame.value_start = None
+        if frame.prefix == "" and frame.key in self.nested:
+            return
+        events.append((frame.prefix + str(frame.key), json.loads(raw)))
+
+    def feed(self, text):
+        events = []
+        if self._finished or not text:
+            return events
+        base = self._length
+        self._chunks.append(text)
+        self._length += len(text)
+
+        for offset, c in enumerate(text):
+            pos = base + offset
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._key_chars is not None:
+                        self._stack[-1].key = json.loads('"' + "".join(self._key_chars) + '"')
+                        self._key_chars = None
+                        continue
+                if self._key_chars is not None:
+                    self._key_chars.append(c)
+                continue
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._stack.append(_Frame("{", tracked=True))
+                continue
+            if c in " \t\r\n":
+                continue
+
+            frame = self._stack[-1]
+            if c == '"':
+                self._in_string = True
+                if frame.kind == "{" and frame.expect_key:
+                    self._key_chars = []
+                else:
+                    self._open_value(frame, pos)
+            elif c == ":":
+                frame.expect_key = False
+            elif c == ",":
+                self._close_value(frame, pos, events)
+                if frame.kind == "{":
+                    frame.expect_key = True
+            elif c in "{[":
+                self._open_value(frame, pos)
+                is_root = len(self._stack) == 1
+                tracked = is_root and c == "{" and frame.key in self.nested
+                self._stack.append(_Frame(c, tracked=tracked, prefix=f"{frame.key}." if tracked else ""))
+            elif c in "}]":
+                self._close_value(frame, pos, events)
+                self._stack.pop()
+                if not self._stack:
+                    self._finished = True
+                    break
+            else:
+                self._open_value(frame, pos)
+        return events
@@ -0,0 +1,132 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.Config.config import Config
+from app.Helpers.userHelper import check_diagnosed, has_complete_assessment
+from app.Helpers.diagnosisHelper import run_ld_identification, SupersededError
+
+
+class SpeculativeDiagnosis:
+    """
+    Start the learning-disability identification in the background as soon as a user's
+    history, dyslexia and dysgraphia data are all stored, so the model's answer is usually
+    in the result cache before the loading screen asks for it. Speculative runs only warm
+    the cache: the student may still be adding tasks, so nothing is saved as their
+    diagnosis until they request it themselves.
+
+    Every write calls `notify(user_id)`. Writes are debounced: the run is scheduled
+    `debounce_seconds` after the last write, so a burst of task uploads starts only one
+    run. Each write also gives the user a new data generation; a run started for an older
+    generation stops at its next streamed chunk and the newer data gets a fresh run.
+    A user's entry is dropped once their latest run finishes or is skipped, and users
+    who are already diagnosed are skipped.
+    """
+    def __init__(self, debounce_seconds=20.0, workers=1, enabled=True):
+        self.debounce_seconds = debounce_seconds
+        self.enabled = enabled
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ld-speculative")
+        self._lock = threading.Lock()
+        self._generation = {}
+        self._generations = itertools.count(1)  # Process-wide, so a re-created entry never reuses a number
+        self._timers = {}
+        self._running = {}
+        self.counters = {"notified": 0, "scheduled": 0, "skipped": 0, "superseded": 0, "completed": 0, "failed": 0}
+
+    def notify(self, user_id):
+        if not self.enabled or not user_id:
+            return
+        with self._lock:
+            self.counters["notified"] += 1
+            generation = next(self._generations)
+            self._generation[user_id] = generation
+            timer = self._timers.pop(user_id, None)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(self.debounce_seconds, self._fire, args=(user_id, generation))
+            timer.daemon = True
+            self._timers[user_id] = timer
+        timer.start()
+
+    def _is_current(self, user_id, generation):
+        with self._lock:
+            return self._generation.get(user_id) == generation
+
+    def _forget(self, user_id, generation):
+        # Must be called with _lock held; keeps the entry if newer data arrived meanwhile
+        if self._generation.get(user_id) == generation and user_id not in self._timers:
+            del self._generation[user_id]
+
+    def _fire(self, user_id, generation):
+        with self._lock:
+            if self._generation.get(user_id) != generation:
+                return
+            self._timers.pop(user_id, None)
+        try:
+            status = check_diagnosed(user_id)
+            # check_diagnosed returns (message, 404) for an unknown user
+            diagnosed = isinstance(status, dict) and status.get("isDiagnosed", False)
+            eligible = not diagnosed and has_complete_assessment(user_id)
+        except Exception as e:
+            print(f"❌ Speculative diagnosis check failed for user {user_id}: {e}")
+            with self._lock:
+                self._forget(user_id, generation)
+            return
+        if not eligible:
+            with self._lock:
+                self.counters["skipped"] += 1
+                self._forget(user_id, generation)
+            return
+
+        with self._lock:
+            previous = self._running.get(user_id)
+            self.counters["scheduled"] += 1
+            future = self._executor.submit(self._run, user_id, generation, previous[1] if previous else None)
+            self._running[user_id] = (generation, future)
+
+    def _run(self, user_id, generation, previous=None):
+        # A superseded run for the same user stops at its next chunk; let it finish first
+        # so this run is not coalesced onto it
+        if previous is not None:
+            wait([previous])
+        if not self._is_current(user_id, generation):
+            with self._lock:
+                self.counters["superseded"] += 1
+                if self._running.get(user_id, (None,))[0] == generation:
+                    del self._running[user_id]
+            return
+
+        def on_progress(characters, chunks):
+            if not self._is_current(user_id, generation):
+                raise SupersededError(f"Newer assessment data for user {user_id}")
+
+        print(f"🔮 Speculative identification for user {user_id}")
+        try:
+            response, status_code = run_ld_identification(user_id, on_progress=on_progress, persist=False)
+        except SupersededError:
+            response, status_code = None, None
+        with self._lock:
+            if self._generation.get(user_id) != generation:
+                self.counters["superseded"] += 1
+            elif status_code == 200 and response.get("status", True):
+                self.counters["completed"] += 1
+            else:
+                self.counters["failed"] += 1
+            if self._running.get(user_id, (None,))[0] == generation:
+                del self._running[user_id]
+            self._forget(user_id, generation)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                "pending": len(self._timers),
+                "running": len(self._running),
+            }
+
+
+speculative_diagnosis = SpeculativeDiagnosis(
+    debounce_seconds=Config.LD_SPECULATIVE_DEBOUNCE_SECONDS,
+    workers=Config.LD_SPECULATIVE_WORKERS,
+    enabled=Config.LD_SPECULATIVE
+)
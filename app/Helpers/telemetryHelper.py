@@ -0,0 +1,247 @@
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from pymongo.errors import BulkWriteError, CollectionInvalid, PyMongoError
+
+from app.Config.config import Config
+from app.Helpers.userHelper import db
+
+
+def ensure_timeseries_collection(database, name, expire_after_seconds=None):
+    """
+    Create `name` as a time-series collection (timeField "timestamp", metaField "meta")
+    unless it already exists. Returns the collection.
+    """
+    options = {"timeseries": {"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"}}
+    if expire_after_seconds:
+        options["expireAfterSeconds"] = expire_after_seconds
+    try:
+        database.create_collection(name, **options)
+    except CollectionInvalid:
+        pass  # Already created (by this or another worker)
+    return database[name]
+
+
+class WriteBehindBuffer:
+    """
+    Buffers documents in memory and writes them with insert_many from a background
+    thread, once `batch_size` documents are waiting or the oldest has waited
+    `flush_interval_ms`. add() never does a database round trip. When `max_buffered`
+    documents are waiting (MongoDB slow or down), add() waits up to `block_ms` for room
+    and then drops the document and counts it, so callers are never stalled for long.
+    Batches MongoDB rejects are logged and counted, not retried. flush() and close()
+    (registered with atexit) write out whatever is left.
+    """
+    def __init__(self, collection_factory, batch_size=500, flush_interval_ms=1000, max_buffered=20000,
+                 block_ms=0):
+        self.collection_factory = collection_factory
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_buffered = max_buffered
+        self.block = block_ms / 1000.0
+        self._collection = None
+        self._buffer = deque()
+        self._oldest = None
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self.added = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._write_seconds = 0.0
+
+    def _ensure_writer(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+            self._thread.start()
+
+    def add(self, doc):
+        """Queue one document; returns False if it was dropped because the buffer is full."""
+        with self._cond:
+            if self._closed:
+                self.dropped += 1
+                return False
+            self._ensure_writer()
+            if len(self._buffer) >= self.max_buffered:
+                if not self.block or not self._cond.wait_for(
+                        lambda: len(self._buffer) < self.max_buffered, timeout=self.block):
+                    self.dropped += 1
+                    return False
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(doc)
+            self.added += 1
+            if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()  # Start the flush timer / a full batch is ready
+            return True
+
+    def _take_batch(self):
+        with self._cond:
+            while True:
+                if self._buffer:
+                    waited = time.monotonic() - self._oldest
+                    if (len(self._buffer) >= self.batch_size or waited >= self.flush_interval
+                            or self._flush_requested or self._closed):
+                        break
+                    self._cond.wait(self.flush_interval - waited)
+                elif self._closed:
+                    return None
+                else:
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            self._oldest = time.monotonic() if self._buffer else None
+            self._in_flight = len(batch)
+            self._cond.notify_all()  # Room for producers waiting on a full buffer
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                if self._collection is None:
+                    self._collection = self.collection_factory()
+                self._collection.insert_many(batch, ordered=False)
+                written = len(batch)
+            except BulkWriteError as e:
+                written = e.details.get("nInserted", 0)
+                print(f"❌ Failed to write {len(batch) - written} telemetry documents: {e}")
+            except PyMongoError as e:
+                written = 0
+                print(f"❌ Failed to write {len(batch)} telemetry documents: {e}")
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                self.written += written
+                self.failed += len(batch) - written
+                self.batches += 1
+                self._write_seconds += elapsed
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def flush(self, timeout=10.0):
+        """Write out everything buffered so far; returns False if it did not finish in time."""
+        with self._cond:
+            if self._thread is None:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._buffer and not self._in_flight, timeout=timeout)
+
+    def close(self, timeout=10.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "buffered": len(self._buffer),
+                "added": self.added,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "meanBatchSize": round(self.written / self.batches, 1) if self.batches else 0.0,
+                "writesPerSecond": round(self.written / self._write_seconds, 1) if self._write_seconds else None,
+            }
+
+
+class EmotionTelemetry:
+    """Every face-emotion detection, persisted through a WriteBehindBuffer."""
+    def __init__(self, buffer, enabled=True):
+        self.buffer = buffer
+        self.enabled = enabled
+
+    def record(self, user_id, emotion, confidence, box=None, at=None):
+        if not self.enabled:
+            return False
+        return self.buffer.add({
+            "timestamp": at or datetime.now(timezone.utc),
+            "meta": {"userID": user_id},
+            "emotion": emotion,
+            "confidence": float(confidence),
+            "box": box
+        })
+
+    def stats(self):
+        return {"enabled": self.enabled, **self.buffer.stats()}
+
+
+emotion_telemetry = EmotionTelemetry(
+    WriteBehindBuffer(
+        lambda: ensure_timeseries_collection(
+            db, "emotion_telemetry", expire_after_seconds=Config.EMOTION_TELEMETRY_RETENTION_SECONDS
+        ),
+        batch_size=Config.EMOTION_TELEMETRY_BATCH_SIZE,
+        flush_interval_ms=Config.EMOTION_TELEMETRY_FLUSH_MS,
+        max_buffered=Config.EMOTION_TELEMETRY_MAX_BUFFERED,
+        block_ms=Config.EMOTION_TELEMETRY_BLOCK_MS
+    ),
+    enabled=Config.EMOTION_TELEMETRY
+)
+
+
+@atexit.register
+def _flush_on_exit():
+    emotion_telemetry.buffer.flush(timeout=5.0)
+    emotion_telemetry.buffer.close(timeout=5.0)
+
+
+def benchmark_writes(documents=20000, batch_sizes=(100, 500, 1000), collection_name="emotion_telemetry_bench"):
+    """
+    Documents written per second to a scratch time-series collection: one insert_one per
+    document (what a per-request write would do) against the write-behind buffer at
+    several batch sizes. The scratch collection is dropped afterwards.
+    """
+    def make_docs(n):
+        now = datetime.now(timezone.utc)
+        return [{"timestamp": now, "meta": {"userID": f"bench-{i % 50}"}, "emotion": "Neutral",
+                 "confidence": 0.9, "box": [0, 0, 10, 10]} for i in range(n)]
+
+    db.drop_collection(collection_name)
+    collection = ensure_timeseries_collection(db, collection_name)
+    rows = []
+    try:
+        docs = make_docs(min(documents, 5000))
+        started = time.perf_counter()
+        for doc in docs:
+            collection.insert_one(doc)
+        elapsed = time.perf_counter() - started
+        rows.append({"mode": "insert_one", "documents": len(docs), "seconds": round(elapsed, 3),
+                     "writesPerSecond": round(len(docs) / elapsed, 1)})
+
+        for batch_size in batch_sizes:
+            buffer = WriteBehindBuffer(lambda: collection, batch_size=batch_size, flush_interval_ms=50,
+                                       max_buffered=documents, block_ms=1000)
+            docs = make_docs(documents)
+            started = time.perf_counter()
+            for doc in docs:
+                buffer.add(doc)
+            enqueued = time.perf_counter() - started
+            buffer.flush(timeout=120.0)
+            elapsed = time.perf_counter() - started
+            buffer.close()
+            rows.append({"mode": f"write-behind batch {batch_size}", "documents": len(docs),
+                         "seconds": round(elapsed, 3), "writesPerSecond": round(buffer.written / elapsed, 1),
+                         "addMicroseconds": round(enqueued / len(docs) * 1e6, 2)})
+    finally:
+        db.drop_collection(collection_name)
+    return rows
+
+
+if __name__ == "__main__":
+    for row in benchmark_writes():
+        print(row)
@@ -1,8 +1,10 @@
 from flask import json
-from pymongo import MongoClient
+from pymongo import MongoClient, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from app.Config.config import Config
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
+from datetime import datetime, timezone
 
 # Initialize MongoDB client
 client = MongoClient(Config.MONGO_URI)
@@ -17,7 +19,11 @@ def user_exists(email):
 def signup(name, email, password):
     if user_exists(email):
         return {"status": False, "message": "User already exists"}
-    db.users.insert_one({"name": name, "email": email, "password": password, "isDiagnosed": False})
+    try:
+        db.users.insert_one({"name": name, "email": email, "password": password, "isDiagnosed": False})
+    except DuplicateKeyError:
+        # A concurrent signup with the same email won the unique index on users.email
+        return {"status": False, "message": "User already exists"}
     return {"status": True, "message": "User created successfully"}
 
 def login(email, password):
@@ -61,27 +67,63 @@ def HistoryAssesment(data):
         return {"status": False, "message": "Assessment already exists for this user"}
 
     # If no existing assessment, insert new one
-    db.history.insert_one({"userId": user_id, "assessmentData": data["assessmentData"]})
+    try:
+        db.history.insert_one({"userId": user_id, "assessmentData": data["assessmentData"]})
+    except DuplicateKeyError:
+        # A concurrent submit for the same user won the unique index on history.userId
+        return {"status": False, "message": "Assessment already exists for this user"}
     return {"status": True, "message": "Assessment data saved successfully"}
 
+# Task arrays per collection; each is capped to the most recent N tasks so documents stay small
+TASK_COLLECTIONS = {
+    "writingTasks": ("dysgraphia_diagnosis", Config.DYSGRAPHIA_MAX_TASKS),
+    "audioTask": ("dyslexia_diagnosis", Config.DYSLEXIA_MAX_TASKS)
+}
+def _push_tasks_update(field, tasks):
+    _, max_tasks = TASK_COLLECTIONS[field]
+    return {"$push": {field: {"$each": tasks, "$slice": -max_tasks}}}
+
+def push_tasks(field, userID, tasks):
+    # Single round trip: creates the user's document on the first upload, appends afterwards
+    name, _ = TASK_COLLECTIONS[field]
+    try:
+        db[name].update_one({"userID": userID}, _push_tasks_update(field, tasks), upsert=True)
+    except DuplicateKeyError:
+        # A concurrent first upload for the same user inserted the document; append to it
+        db[name].update_one({"userID": userID}, _push_tasks_update(field, tasks), upsert=True)
+
+def add_tasks_bulk(field, items):
+    """
+    Append tasks for several users with one unordered bulk_write.
+    `items` is an iterable of (userID, tasks); tasks of the same user are merged.
+    """
+    name, _ = TASK_COLLECTIONS[field]
+    grouped = {}
+    for userID, tasks in items:
+        grouped.setdefault(userID, []).extend(tasks)
+    ops = [UpdateOne({"userID": userID}, _push_tasks_update(field, tasks), upsert=True)
+           for userID, tasks in grouped.items() if tasks]
+    if not ops:
+        return {"users": 0, "taskCount": 0, "upserted": 0}
+    try:
+        result = db[name].bulk_write(ops, ordered=False)
+        upserted = result.upserted_count
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        # Lost upsert races against concurrent first uploads; the documents exist now
+        upserted = e.details.get("nUpserted", 0)
+        db[name].bulk_write([ops[err["index"]] for err in errors], ordered=False)
+    return {
+        "users": len(ops),
+        "taskCount": sum(len(tasks) for tasks in grouped.values()),
+        "upserted": upserted
+    }
+
 def add_dysgraphia_image_data(data, userID):
     try:
-        # Check if document exists for this user
-        doc = db.dysgraphia_diagnosis.find_one({"userID": userID})
-        
-        if not doc:
-            # Create new document with initial writing task
-            db.dysgraphia_diagnosis.insert_one({
-                "_id": ObjectId(),  # Generate a new ObjectId for the document
-                "userID": userID,
-                "writingTasks": data["writingTasks"]
-            })
-        else:
-            # Add new tasks to existing array
-            db.dysgraphia_diagnosis.update_one(
-                {"userID": userID},
-                {"$push": {"writingTasks": {"$each": data["writingTasks"]}}}
-            )
+        push_tasks("writingTasks", userID, data["writingTasks"])
 
         return {
             "status": True, 
@@ -94,32 +136,25 @@ def add_dysgraphia_image_data(data, userID):
     
 def add_dylexia_data(data, userID):
     try:
-        # Check if document exists for this user
-        doc = db.dyslexia_diagnosis.find_one({"userID": userID})
-        
-        if not doc:
-            # Create new document with initial writing task
-            db.dyslexia_diagnosis.insert_one({
-                "_id": ObjectId(),  # Generate a new ObjectId for the document
-                "userID": userID,
-                "audioTask": data["audioTask"]
-            })
-        else:
-            # Add new tasks to existing array
-            db.dyslexia_diagnosis.update_one(
-                {"userID": userID},
-                {"$push": {"audioTask": {"$each": data["audioTask"]}}}
-            )
+        push_tasks("audioTask", userID, data["audioTask"])
 
         return {
             "status": True, 
-            "message": "Writing data added successfully",
+            "message": "Audio data added successfully",
             "taskCount": len(data["audioTask"])
         }
     except Exception as e:
-        print(f"Error in add_dysgraphia_image_data: {str(e)}")
-        return {"status": False, "message": f"Error adding writing data: {str(e)}"}
+        print(f"Error in add_dylexia_data: {str(e)}")
+        return {"status": False, "message": f"Error adding audio data: {str(e)}"}
     
+def has_complete_assessment(userID):
+    # History plus at least one reading (audio) and one writing task
+    return bool(
+        db.history.find_one({"userId": userID}, {"_id": 1})
+        and db.dyslexia_diagnosis.find_one({"userID": userID, "audioTask.0": {"$exists": True}}, {"_id": 1})
+        and db.dysgraphia_diagnosis.find_one({"userID": userID, "writingTasks.0": {"$exists": True}}, {"_id": 1})
+    )
+
 def get_user_assessment_data(userID):
     try:
         # Get data from all collections
@@ -168,9 +203,12 @@ def save_model_response(user_id, data):
         if not user:
             return {"status": False, "message": "User not found"}
 
-        # Insert the structured data into the 'assessment_results' collection.
-        insert_result = db.assessment_results_collection.insert_one(data)
-        print(f"✅ Inserted document ID: {insert_result.inserted_id}")
+        # One result per user: a re-diagnosis replaces the previous result
+        saved = db.assessment_results_collection.find_one_and_replace(
+            {"userID": user_id}, data, projection={"_id": True}, upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        print(f"✅ Saved document ID: {saved['_id']}")
 
         # Optionally, update the user record to reflect that a diagnosis has been made.
         db.users.update_one(
@@ -178,7 +216,7 @@ def save_model_response(user_id, data):
             {"$set": {"isDiagnosed": True}}
         )
 
-        return {"status": True, "message": "Model response saved successfully", "inserted_id": str(insert_result.inserted_id)}
+        return {"status": True, "message": "Model response saved successfully", "inserted_id": str(saved["_id"])}
 
 
     except Exception as e:
@@ -191,8 +229,8 @@ def get_assessment_result(user_id):
         if not ObjectId.is_valid(user_id):
             return {"status": False, "message": "Invalid user ID format"}
 
-        # Find the assessment result for the user
-        result = db.assessment_results_collection.find_one({"userID": user_id})
+        # Find the newest assessment result for the user (older data may hold several)
+        result = db.assessment_results_collection.find_one({"userID": user_id}, sort=[("_id", DESCENDING)])
         
         if not result:
             return {"status": False, "message": "No assessment results found"}
@@ -210,4 +248,26 @@ def get_assessment_result(user_id):
         return {
             "status": False,
             "message": f"Error retrieving assessment result: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+def start_partial_result(user_id):
+    # Reset the sections streamed so far for this user's identification
+    doc = {"userID": user_id, "status": "streaming", "sections": {}, "startedAt": datetime.now(timezone.utc)}
+    try:
+        db.ld_partial_results.replace_one({"userID": user_id}, doc, upsert=True)
+    except DuplicateKeyError:
+        # A concurrent stream for the same user inserted the document; reset it instead
+        db.ld_partial_results.replace_one({"userID": user_id}, doc, upsert=True)
+
+def save_partial_section(user_id, path, value):
+    # `path` is dotted ("learningDisabilities.Dyslexia"), which Mongo stores as nested fields
+    db.ld_partial_results.update_one(
+        {"userID": user_id},
+        {"$set": {f"sections.{path}": value, "updatedAt": datetime.now(timezone.utc)}}
+    )
+
+def finish_partial_result(user_id, status):
+    db.ld_partial_results.update_one(
+        {"userID": user_id},
+        {"$set": {"status": status, "updatedAt": datetime.now(timezone.utc)}}
+    )
\ No newline at end of file
@@ -0,0 +1,244 @@
+import threading
+import time
+import queue
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+import torch
+
+from app.Model.EmotionDetection.session import SessionStore
+from app.Model.EmotionDetection.utlis import FacePreprocessor
+
+
+class _PendingFace:
+    __slots__ = ("crop", "session_id", "future", "enqueued_at")
+
+    def __init__(self, crop, session_id=None):
+        self.crop = crop
+        self.session_id = session_id
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+def _stack_states(states):
+    """Concatenate per-session ((h1, c1), (h2, c2)) LSTM states along the batch dimension."""
+    return tuple(
+        (torch.cat([s[layer][0] for s in states], dim=1), torch.cat([s[layer][1] for s in states], dim=1))
+        for layer in range(2)
+    )
+
+
+def _split_states(state, count):
+    """Inverse of _stack_states: one ((h1, c1), (h2, c2)) tuple per batch row."""
+    return [
+        tuple((h[:, i:i + 1].clone(), c[:, i:i + 1].clone()) for h, c in state)
+        for i in range(count)
+    ]
+
+def summarize(values):
+    """Mean/p50/p95/max of a sequence of timings (or sizes), rounded for JSON output."""
+    if not values:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "max": round(float(arr.max()), 3),
+    }
+
+
+class BatchStats:
+    """
+    Rolling statistics about the batches formed by InferenceBatcher.
+    Only the last `window` batches/requests are kept so memory stays constant.
+    """
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.total_batches = 0
+        self.total_requests = 0
+        self.size_histogram = {}
+        self._batch_sizes = deque(maxlen=window)
+        self._queue_waits_ms = deque(maxlen=window)
+        self._inference_ms = deque(maxlen=window)
+
+    def record(self, batch_size, queue_waits_ms, inference_ms):
+        with self._lock:
+            self.total_batches += 1
+            self.total_requests += batch_size
+            self.size_histogram[batch_size] = self.size_histogram.get(batch_size, 0) + 1
+            self._batch_sizes.append(batch_size)
+            self._queue_waits_ms.extend(queue_waits_ms)
+            self._inference_ms.append(inference_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "totalBatches": self.total_batches,
+                "totalRequests": self.total_requests,
+                "batchSizeHistogram": {str(k): v for k, v in sorted(self.size_histogram.items())},
+                "batchSize": summarize(self._batch_sizes),
+                "queueWaitMs": summarize(self._queue_waits_ms),
+                "inferenceMs": summarize(self._inference_ms),
+            }
+
+
+class InferenceBatcher:
+    """
+    Collects face crops from concurrent /users/facedetection requests and runs them
+    through the ResNet50 backbone and the LSTM head as a single batch. Crops are
+    preprocessed directly into the slots of one preallocated input tensor.
+
+    A batch is dispatched as soon as it holds `max_batch_size` crops or the oldest
+    queued crop has waited `max_wait_ms`, whichever comes first.
+
+    Crops submitted with a session id advance that session's LSTM state by one step.
+    A new session's ring buffer is seeded with its first frame repeated to
+    `sequence_length`, so the first state comes from a full window like the ones the
+    Aff-Wild2 LSTM was trained on. Every `anchor_interval` frames the state is rebuilt
+    from the ring buffer, which keeps the effective context close to that length.
+    Crops without a session id fall back to a sequence of the repeated frame.
+
+    infer() gives up after `timeout_s` (None waits forever); a crop whose caller gave up
+    before its batch was dispatched is dropped instead of being run.
+    """
+    def __init__(self, backbone, lstm, max_batch_size=16, max_wait_ms=15, sequence_length=10,
+                 sessions=None, anchor_interval=50, timeout_s=None):
+        self.backbone = backbone
+        self.lstm = lstm
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.sequence_length = sequence_length
+        self.sessions = sessions if sessions is not None else SessionStore(window=sequence_length)
+        self.anchor_interval = max(1, int(anchor_interval))
+        self.timeout_s = timeout_s
+        self.preprocessor = FacePreprocessor(batch_size=self.max_batch_size)
+        self.stats = BatchStats()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="fer-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, face_crop, session_id=None):
+        """
+        Queue a BGR uint8 face crop (as sliced from the cv2 frame) and return a Future
+        that resolves to the 7-class emotion probabilities for that face.
+        """
+        self._ensure_worker()
+        pending = _PendingFace(face_crop, session_id)
+        self._queue.put(pending)
+        return pending.future
+
+    def infer(self, face_crop, session_id=None, timeout=None):
+        """
+        Blocking submit(); raises concurrent.futures.TimeoutError after `timeout` seconds
+        (default `timeout_s`) without a result.
+        """
+        future = self.submit(face_crop, session_id)
+        try:
+            return future.result(timeout=timeout if timeout is not None else self.timeout_s)
+        except FutureTimeoutError:
+            future.cancel()  # Only succeeds while the crop is still queued
+            raise
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Drop crops whose callers timed out; the rest can no longer be cancelled
+            batch = [p for p in self._collect() if p.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            waits_ms = [(started - p.enqueued_at) * 1000.0 for p in batch]
+            try:
+                outputs = self._forward(batch)
+            except Exception as e:
+                for p in batch:
+                    p.future.set_exception(e)
+                continue
+            inference_ms = (time.perf_counter() - started) * 1000.0
+            for p, out in zip(batch, outputs):
+                p.future.set_result(out)
+            self.stats.record(len(batch), waits_ms, inference_ms)
+
+    def _forward(self, batch):
+        with torch.inference_mode():
+            for slot, p in enumerate(batch):
+                self.preprocessor.fill(slot, p.crop)
+            x = self.preprocessor.batch(len(batch))
+            features = torch.nn.functional.relu(self.backbone.extract_features(x))
+            outputs = [None] * len(batch)
+            pending = list(range(len(batch)))
+            while pending:
+                # A session can have two frames in one batch; they must be stepped in order.
+                seen, current, deferred = set(), [], []
+                for i in pending:
+                    sid = batch[i].session_id
+                    if sid is not None and sid in seen:
+                        deferred.append(i)
+                        continue
+                    if sid is not None:
+                        seen.add(sid)
+                    current.append(i)
+                self._advance(batch, features, current, outputs)
+                pending = deferred
+        return outputs
+
+    def _advance(self, batch, features, indices, outputs):
+        steps, replays = [], []
+        for i in indices:
+            sid = batch[i].session_id
+            if sid is None:
+                replays.append((i, None, features[i].expand(self.sequence_length, -1)))
+                continue
+            session = self.sessions.touch(sid)
+            if not session.features:
+                # First frame: fill the window with it rather than replaying a 1-frame sequence
+                session.features.extend([features[i].clone()] * (self.sequence_length - 1))
+            session.features.append(features[i].clone())
+            session.frames += 1
+            if session.state is None or session.steps_since_anchor >= self.anchor_interval:
+                replays.append((i, session, torch.stack(tuple(session.features))))
+            else:
+                steps.append((i, session))
+
+        if steps:
+            x = torch.stack([features[i] for i, _ in steps])
+            probs, state = self.lstm.step(x, _stack_states([s.state for _, s in steps]))
+            for (i, session), row_state, row in zip(steps, _split_states(state, len(steps)), probs):
+                session.state = row_state
+                session.steps_since_anchor += 1
+                outputs[i] = row.numpy()
+
+        by_length = {}
+        for item in replays:
+            by_length.setdefault(item[2].shape[0], []).append(item)
+        for items in by_length.values():
+            probs, state = self.lstm.run(torch.stack([seq for _, _, seq in items]))
+            for (i, session, _), row_state, row in zip(items, _split_states(state, len(items)), probs):
+                if session is not None:
+                    session.state = row_state
+                    session.steps_since_anchor = 0
+                outputs[i] = row.numpy()
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import mediapipe as mp
+
+from app.Model.EmotionDetection.batching import summarize
+
+
+class FaceMeshPoolStats:
+    """Rolling acquire/process timings of FaceMeshPool (last `window` requests)."""
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.pinned_hits = 0
+        self.owner_switches = 0
+        self._setup_ms = deque(maxlen=window)
+        self._process_ms = deque(maxlen=window)
+
+    def record(self, setup_ms, process_ms, pinned_hit, switched):
+        with self._lock:
+            self.requests += 1
+            self.pinned_hits += int(pinned_hit)
+            self.owner_switches += int(switched)
+            self._setup_ms.append(setup_ms)
+            self._process_ms.append(process_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "pinnedHits": self.pinned_hits,
+                "ownerSwitches": self.owner_switches,
+                "setupMs": summarize(self._setup_ms),
+                "processMs": summarize(self._process_ms),
+            }
+
+
+class _PooledMesh:
+    __slots__ = ("mesh", "owner", "last_used")
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.owner = None
+        self.last_used = 0.0
+
+
+class FaceMeshPool:
+    """
+    Thread-safe pool of long-lived MediaPipe FaceMesh graphs running in video
+    (tracking) mode, so consecutive frames can skip full face detection.
+
+    An instance is pinned to the session that used it last. A session gets its own
+    instance back when it is free; otherwise it takes the least recently used free
+    instance, whose tracking state is reset because it belongs to another face.
+    """
+    def __init__(self, size=4, **face_mesh_kwargs):
+        self.size = max(1, int(size))
+        self.face_mesh_kwargs = dict(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+        )
+        self.face_mesh_kwargs.update(face_mesh_kwargs)
+        self.stats = FaceMeshPoolStats()
+        self._cond = threading.Condition()
+        self._free = [_PooledMesh(mp.solutions.face_mesh.FaceMesh(**self.face_mesh_kwargs))
+                      for _ in range(self.size)]
+        self._pins = {}
+
+    def _take(self, session_id):
+        """Pick a free instance for `session_id`. Must be called with the condition held."""
+        if session_id is not None:
+            pinned = self._pins.get(session_id)
+            if pinned is not None and pinned in self._free:
+                self._free.remove(pinned)
+                return pinned, True
+        # Prefer instances nobody is tracking, then the least recently used one.
+        pooled = min(self._free, key=lambda p: (p.owner is not None, p.last_used))
+        self._free.remove(pooled)
+        return pooled, False
+
+    @contextmanager
+    def acquire(self, session_id=None, timeout=None):
+        started = time.perf_counter()
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free, timeout=timeout):
+                raise TimeoutError("No FaceMesh instance available")
+            pooled, pinned_hit = self._take(session_id)
+
+        switched = not pinned_hit and pooled.owner is not None and pooled.owner != session_id
+        if switched or session_id is None:
+            # Anonymous frames cannot be matched to a face track, so always start clean.
+            pooled.mesh.reset()
+        setup_ms = (time.perf_counter() - started) * 1000.0
+
+        process_started = time.perf_counter()
+        try:
+            yield pooled.mesh
+        finally:
+            process_ms = (time.perf_counter() - process_started) * 1000.0
+            with self._cond:
+                if pooled.owner is not None and self._pins.get(pooled.owner) is pooled:
+                    del self._pins[pooled.owner]
+                pooled.owner = session_id
+                if session_id is not None:
+                    self._pins[session_id] = pooled
+                pooled.last_used = time.monotonic()
+                self._free.append(pooled)
+                self._cond.notify()
+            self.stats.record(setup_ms, process_ms, pinned_hit, switched)
+
+    def close(self):
+        with self._cond:
+            for pooled in self._free:
+                pooled.mesh.close()
+            self._free = []
+            self._pins = {}
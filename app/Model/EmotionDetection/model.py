@@ -25,7 +25,7 @@ class Bottleneck(nn.Module):
         self.relu = nn.ReLU()
         
     def forward(self, x):
-        identity = x.clone()
+        identity = x
         x = self.relu(self.batch_norm1(self.conv1(x)))
         x = self.relu(self.batch_norm2(self.conv2(x)))
         x = self.conv3(x)
@@ -114,10 +114,38 @@ class LSTMPyTorch(nn.Module):
         x = self.fc(x[:, -1, :])
         x = self.softmax(x)
         return x
-pth_backbone_model = ResNet50(7, channels=3)
-pth_backbone_model.load_state_dict(torch.load('app/models/FER_static_ResNet50_AffectNet.pt'))
-pth_backbone_model.eval()
 
-pth_LSTM_model = LSTMPyTorch()
-pth_LSTM_model.load_state_dict(torch.load('app/models/FER_dinamic_LSTM_Aff-Wild2.pt'))
-pth_LSTM_model.eval()
+    def run(self, x, state=None):
+        """
+        Same as forward, but starts from `state` and also returns the final
+        ((h1, c1), (h2, c2)) so the caller can continue the sequence later.
+        """
+        state1, state2 = state if state is not None else (None, None)
+        x, state1 = self.lstm1(x, state1)
+        x, state2 = self.lstm2(x, state2)
+        x = self.fc(x[:, -1, :])
+        x = self.softmax(x)
+        return x, (state1, state2)
+
+    def step(self, x, state=None):
+        """
+        Advance the LSTM by a single frame. `x` is (batch, 512) and `state` is the
+        value returned by the previous `step`/`run` call (or None to start fresh).
+        """
+        return self.run(x.unsqueeze(1), state)
+
+BACKBONE_WEIGHTS = 'app/models/FER_static_ResNet50_AffectNet.pt'
+LSTM_WEIGHTS = 'app/models/FER_dinamic_LSTM_Aff-Wild2.pt'
+
+# Checkpoints are loaded on demand (see app.Model.registry) rather than at import time.
+def load_backbone(path=BACKBONE_WEIGHTS):
+    pth_backbone_model = ResNet50(7, channels=3)
+    pth_backbone_model.load_state_dict(torch.load(path))
+    pth_backbone_model.eval()
+    return pth_backbone_model
+
+def load_lstm(path=LSTM_WEIGHTS):
+    pth_LSTM_model = LSTMPyTorch()
+    pth_LSTM_model.load_state_dict(torch.load(path))
+    pth_LSTM_model.eval()
+    return pth_LSTM_model
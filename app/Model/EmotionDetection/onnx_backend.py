@@ -0,0 +1,148 @@
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from app.Model.EmotionDetection.optimize import _FeatureModule, fuse_batch_norm
+
+
+BACKBONE_FILE = "fer_backbone.onnx"
+LSTM_FILE = "fer_lstm.onnx"
+
+
+class _LSTMStateModule(nn.Module):
+    """LSTMPyTorch with its (h, c) state as explicit inputs/outputs, for ONNX export."""
+    def __init__(self, lstm):
+        super(_LSTMStateModule, self).__init__()
+        self.lstm = lstm
+
+    def forward(self, x, h1, c1, h2, c2):
+        probs, ((h1, c1), (h2, c2)) = self.lstm.run(x, ((h1, c1), (h2, c2)))
+        return probs, h1, c1, h2, c2
+
+
+def export_onnx(backbone, lstm, out_dir, opset=17):
+    """
+    Export the BatchNorm-fused ResNet50 feature extractor and the stateful LSTM to ONNX.
+
+    Conv2dSame computes its padding from the input size; inputs are always 224x224, so
+    the padding is traced as a constant and only the batch axis is dynamic. The LSTM
+    graph takes a (batch, time, 512) sequence plus the state of both layers, which covers
+    both a full-window run and a single step (time = 1).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    feature_module = _FeatureModule(fuse_batch_norm(backbone)).eval()
+    torch.onnx.export(
+        feature_module,
+        (torch.zeros(1, 3, 224, 224),),
+        os.path.join(out_dir, BACKBONE_FILE),
+        input_names=["input"],
+        output_names=["features"],
+        dynamic_axes={"input": {0: "batch"}, "features": {0: "batch"}},
+        opset_version=opset,
+    )
+
+    lstm_module = _LSTMStateModule(lstm).eval()
+    h1 = torch.zeros(1, 1, lstm.lstm1.hidden_size)
+    h2 = torch.zeros(1, 1, lstm.lstm2.hidden_size)
+    state_axes = {1: "batch"}
+    torch.onnx.export(
+        lstm_module,
+        (torch.zeros(1, 10, lstm.lstm1.input_size), h1, h1.clone(), h2, h2.clone()),
+        os.path.join(out_dir, LSTM_FILE),
+        input_names=["x", "h1", "c1", "h2", "c2"],
+        output_names=["probs", "h1_out", "c1_out", "h2_out", "c2_out"],
+        dynamic_axes={
+            "x": {0: "batch", 1: "time"}, "probs": {0: "batch"},
+            "h1": state_axes, "c1": state_axes, "h2": state_axes, "c2": state_axes,
+            "h1_out": state_axes, "c1_out": state_axes, "h2_out": state_axes, "c2_out": state_axes,
+        },
+        opset_version=opset,
+    )
+
+
+def _session(path, threads):
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise RuntimeError("FER_BACKEND='onnx' requires the onnxruntime package") from e
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+class OnnxBackbone:
+    """ONNX Runtime ResNet50 feature extractor with the same `extract_features` interface."""
+    def __init__(self, path, threads=0):
+        self.session = _session(path, threads)
+
+    def extract_features(self, x):
+        features = self.session.run(None, {"input": np.ascontiguousarray(x.numpy())})[0]
+        return torch.from_numpy(features)
+
+
+class OnnxLSTM:
+    """ONNX Runtime LSTM head with the same forward/run/step interface as LSTMPyTorch."""
+    def __init__(self, path, threads=0, hidden_sizes=(512, 256)):
+        self.session = _session(path, threads)
+        self.hidden_sizes = hidden_sizes
+
+    def run(self, x, state=None):
+        batch = x.shape[0]
+        if state is None:
+            state = tuple(
+                (torch.zeros(1, batch, size), torch.zeros(1, batch, size)) for size in self.hidden_sizes
+            )
+        (h1, c1), (h2, c2) = state
+        probs, h1, c1, h2, c2 = self.session.run(None, {
+            "x": np.ascontiguousarray(x.numpy(), dtype=np.float32),
+            "h1": h1.numpy(), "c1": c1.numpy(), "h2": h2.numpy(), "c2": c2.numpy(),
+        })
+        to_tensor = torch.from_numpy
+        return to_tensor(probs), ((to_tensor(h1), to_tensor(c1)), (to_tensor(h2), to_tensor(c2)))
+
+    def step(self, x, state=None):
+        return self.run(x.unsqueeze(1), state)
+
+    def __call__(self, x):
+        return self.run(x)[0]
+
+
+def load_onnx_models(backbone, lstm, onnx_dir, threads=0, export_if_missing=True):
+    """Load (exporting first if needed) the ONNX Runtime counterparts of the torch models."""
+    backbone_path = os.path.join(onnx_dir, BACKBONE_FILE)
+    lstm_path = os.path.join(onnx_dir, LSTM_FILE)
+    if export_if_missing and not (os.path.exists(backbone_path) and os.path.exists(lstm_path)):
+        export_onnx(backbone, lstm, onnx_dir)
+    return OnnxBackbone(backbone_path, threads), OnnxLSTM(lstm_path, threads)
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.Config.config import Config
+    from app.Model.EmotionDetection.model import load_backbone, load_lstm
+    from app.Model.EmotionDetection.optimize import (
+        build_inference_models, check_parity, measure_latency, print_report, random_input_batches
+    )
+
+    parser = argparse.ArgumentParser(description="Export the FER models to ONNX and compare ORT with torch")
+    parser.add_argument("--out-dir", default=Config.FER_ONNX_DIR)
+    parser.add_argument("--threads", type=int, default=Config.FER_ONNX_THREADS)
+    args = parser.parse_args()
+
+    pth_backbone_model, pth_LSTM_model = load_backbone(), load_lstm()
+    export_onnx(pth_backbone_model, pth_LSTM_model, args.out_dir)
+    inputs = torch.cat(random_input_batches(count=4, batch_size=8, seed=1))
+    reference = (pth_backbone_model, pth_LSTM_model)
+    candidates = {
+        "torch eager": reference,
+        "torch fused": build_inference_models(pth_backbone_model, pth_LSTM_model, mode="fused"),
+        "onnxruntime": load_onnx_models(pth_backbone_model, pth_LSTM_model, args.out_dir, args.threads, False),
+    }
+    print_report({
+        name: {"parity": check_parity(reference, pair, inputs), "latency": measure_latency(*pair, inputs)}
+        for name, pair in candidates.items()
+    })
@@ -0,0 +1,165 @@
+import copy
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+
+# Named presets for Config.FER_INFERENCE_MODE. Only modes checked against the real
+# weights are listed; add others (channels_last, int8, TorchScript) once benchmark_modes
+# has been run on real face crops for them.
+INFERENCE_MODES = {
+    "eager": dict(fuse_bn=False),
+    "fused": dict(fuse_bn=True),
+}
+
+
+class _FeatureModule(nn.Module):
+    """Exposes ResNet.extract_features as forward() so it can be exported or traced."""
+    def __init__(self, backbone):
+        super(_FeatureModule, self).__init__()
+        self.backbone = backbone
+
+    def forward(self, x):
+        return self.backbone.extract_features(x)
+
+
+class OptimizedBackbone:
+    """
+    Wraps an optimised feature module behind the `extract_features` interface the
+    batcher calls on the plain ResNet50.
+    """
+    def __init__(self, module):
+        self.module = module
+
+    def extract_features(self, x):
+        return self.module(x)
+
+
+def fuse_batch_norm(backbone):
+    """
+    Return an eval-mode copy of the ResNet50 with every BatchNorm folded into the
+    convolution before it (including the Conv2dSame stem and the downsample paths).
+    """
+    model = copy.deepcopy(backbone).eval()
+    model.conv_layer_s2_same = fuse_conv_bn_eval(model.conv_layer_s2_same, model.batch_norm1)
+    model.batch_norm1 = nn.Identity()
+    for layer in (model.layer1, model.layer2, model.layer3, model.layer4):
+        for block in layer:
+            block.conv1 = fuse_conv_bn_eval(block.conv1, block.batch_norm1)
+            block.batch_norm1 = nn.Identity()
+            block.conv2 = fuse_conv_bn_eval(block.conv2, block.batch_norm2)
+            block.batch_norm2 = nn.Identity()
+            block.conv3 = fuse_conv_bn_eval(block.conv3, block.batch_norm3)
+            block.batch_norm3 = nn.Identity()
+            if block.i_downsample is not None:
+                conv, bn = block.i_downsample[0], block.i_downsample[1]
+                block.i_downsample = nn.Sequential(fuse_conv_bn_eval(conv, bn))
+    return model
+
+
+def random_input_batches(count=8, batch_size=4, seed=0):
+    """
+    Preprocessed-looking random inputs for quick parity and latency checks. Pass real
+    face crops to benchmark_modes for numbers that reflect production accuracy.
+    """
+    from app.Model.EmotionDetection.utlis import FacePreprocessor
+
+    rng = np.random.default_rng(seed)
+    preprocessor = FacePreprocessor(batch_size=batch_size)
+    batches = []
+    for _ in range(count):
+        for slot in range(batch_size):
+            preprocessor.fill(slot, rng.integers(0, 256, size=(224, 224, 3), dtype=np.uint8))
+        batches.append(preprocessor.batch(batch_size).clone())
+    return batches
+
+
+def build_inference_models(backbone, lstm, mode="fused"):
+    """
+    Build the (backbone, lstm) pair used by InferenceBatcher for one of INFERENCE_MODES.
+
+    - fuse_bn: fold every BatchNorm into its convolution
+
+    The originals are never modified; callers run the result under torch.inference_mode.
+    """
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown FER inference mode '{mode}', expected one of {sorted(INFERENCE_MODES)}")
+    options = INFERENCE_MODES[mode]
+
+    model = fuse_batch_norm(backbone) if options["fuse_bn"] else copy.deepcopy(backbone).eval()
+    return OptimizedBackbone(_FeatureModule(model)), copy.deepcopy(lstm).eval()
+
+
+def _predict(backbone, lstm, inputs, sequence_length=10):
+    with torch.inference_mode():
+        features = torch.nn.functional.relu(backbone.extract_features(inputs))
+        sequences = features.unsqueeze(1).expand(-1, sequence_length, -1).contiguous()
+        return lstm(sequences)
+
+
+def check_parity(reference, optimized, inputs):
+    """
+    Compare emotion probabilities of an optimised (backbone, lstm) pair with the FP32
+    reference pair on the same inputs. Returns the max absolute probability difference
+    and the fraction of inputs whose predicted class is unchanged.
+    """
+    expected = _predict(*reference, inputs)
+    actual = _predict(*optimized, inputs)
+    return {
+        "maxAbsDiff": float((expected - actual).abs().max()),
+        "top1Agreement": float((expected.argmax(dim=1) == actual.argmax(dim=1)).float().mean()),
+    }
+
+
+def measure_latency(backbone, lstm, inputs, batch_sizes=(1, 8), iterations=20, warmup=3):
+    """Mean ms per batch (and per face) of one (backbone, lstm) pair for each batch size."""
+    latency = {}
+    for batch_size in batch_sizes:
+        x = inputs[:batch_size]
+        for _ in range(warmup):
+            _predict(backbone, lstm, x)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            _predict(backbone, lstm, x)
+        batch_ms = (time.perf_counter() - start) / iterations * 1000.0
+        latency[batch_size] = {"batchMs": batch_ms, "perFaceMs": batch_ms / batch_size}
+    return latency
+
+
+def benchmark_modes(backbone, lstm, modes=None, batch_sizes=(1, 8), iterations=20, warmup=3, inputs=None):
+    """
+    Latency (ms per batch and per face) of every inference mode, with an accuracy
+    parity check against the FP32 weights, so the fastest acceptable mode can be
+    chosen for the deployment CPUs.
+    """
+    modes = modes or list(INFERENCE_MODES)
+    inputs = inputs if inputs is not None else torch.cat(random_input_batches(count=4, batch_size=8, seed=1))
+    reference = (backbone, lstm)
+    report = {}
+    for mode in modes:
+        optimized = build_inference_models(backbone, lstm, mode=mode)
+        report[mode] = {
+            "parity": check_parity(reference, optimized, inputs),
+            "latency": measure_latency(*optimized, inputs, batch_sizes, iterations, warmup),
+        }
+    return report
+
+
+def print_report(report):
+    for name, entry in report.items():
+        latency = ", ".join(
+            f"bs={bs}: {v['batchMs']:.1f} ms ({v['perFaceMs']:.1f} ms/face)" for bs, v in entry["latency"].items()
+        )
+        parity = entry["parity"]
+        print(f"{name:14s} {latency} | max diff {parity['maxAbsDiff']:.5f}, top-1 agree {parity['top1Agreement']:.2%}")
+
+
+if __name__ == "__main__":
+    from app.Model.EmotionDetection.model import load_backbone, load_lstm
+
+    print(f"torch threads: {torch.get_num_threads()}")
+    results = benchmark_modes(load_backbone(), load_lstm())
+    print_report(results)
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import deque
+
+
+class EmotionSession:
+    """
+    Temporal state of one student's camera stream: a ring buffer with the most recent
+    per-frame backbone features and the LSTM (h, c) state carried between frames.
+    """
+    __slots__ = ("features", "state", "steps_since_anchor", "frames", "last_seen")
+
+    def __init__(self, window):
+        self.features = deque(maxlen=window)
+        self.state = None
+        self.steps_since_anchor = 0
+        self.frames = 0
+        self.last_seen = time.monotonic()
+
+    def reset_state(self):
+        self.state = None
+        self.steps_since_anchor = 0
+
+
+class SessionStore:
+    """
+    Keyed store of EmotionSession objects. Sessions that have not received a frame
+    for `ttl_seconds` are evicted, so memory is bounded by the number of active students.
+    """
+    def __init__(self, window=10, ttl_seconds=600, sweep_interval=30):
+        self.window = window
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def touch(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = EmotionSession(self.window)
+                self._sessions[session_id] = session
+            session.last_seen = now
+            if now - self._last_sweep >= self.sweep_interval:
+                self._evict_idle(now)
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def drop(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict_idle(self, now):
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.ttl_seconds]
+        for sid in expired:
+            del self._sessions[sid]
+        self._last_sweep = now
+        return len(expired)
+
+    def evict_idle(self):
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
@@ -4,7 +4,64 @@ from PIL import Image
 from torchvision import transforms
 import math
 
+FER_INPUT_SIZE = 224
+# Per-channel means of the AffectNet ResNet50, in the BGR order the model expects
+FER_BGR_MEANS = np.array([91.4953, 103.8827, 131.0912], dtype=np.float32)
+
+class FacePreprocessor:
+    """
+    Turns cv2/NumPy face crops into normalised 3x224x224 float tensors, written
+    straight into slots of a preallocated (batch_size, 3, 224, 224) tensor.
+
+    The nearest-neighbour resize and the RGB->BGR flip are one fancy-indexing gather,
+    and the float cast plus mean subtraction is one ufunc writing into the slot, so
+    there is no PIL round trip and no intermediate tensor copies. Sampling positions
+    match PIL's NEAREST resize used by the original pth_processing.
+    """
+    def __init__(self, batch_size=1, size=FER_INPUT_SIZE):
+        self.size = size
+        self.buffer = torch.empty((batch_size, 3, size, size), dtype=torch.float32)
+        self._buffer_np = self.buffer.numpy()
+        self._means = FER_BGR_MEANS[:, None, None]
+        self._index_cache = {}
+
+    def _source_indices(self, length):
+        idx = self._index_cache.get(length)
+        if idx is None:
+            # PIL accumulates the sample position pixel by pixel; cumsum reproduces it exactly.
+            scale = length / self.size
+            steps = np.full(self.size, scale, dtype=np.float64)
+            steps[0] = scale * 0.5
+            idx = np.minimum(np.cumsum(steps).astype(np.intp), length - 1)
+            if len(self._index_cache) < 1024:
+                self._index_cache[length] = idx
+        return idx
+
+    def fill(self, slot, crop, channels="bgr"):
+        """
+        Write the preprocessed `crop` (HxWx3 uint8, in `channels` order) into batch
+        slot `slot` and return that slot as a 1x3xHxW tensor view.
+        """
+        rows = self._source_indices(crop.shape[0])
+        cols = self._source_indices(crop.shape[1])
+        channel_order = [2, 1, 0] if channels == "rgb" else [0, 1, 2]
+        gathered = crop[rows[None, :, None], cols[None, None, :], np.array(channel_order)[:, None, None]]
+        np.subtract(gathered, self._means, out=self._buffer_np[slot])
+        return self.buffer[slot:slot + 1]
+
+    def batch(self, count):
+        """The first `count` filled slots as a (count, 3, 224, 224) tensor view."""
+        return self.buffer[:count]
+
+def preprocess_face(crop, channels="bgr"):
+    """Single-crop convenience wrapper returning a new 1x3x224x224 tensor."""
+    return FacePreprocessor(batch_size=1).fill(0, crop, channels=channels)
+
 def pth_processing(fp):
+    return preprocess_face(np.asarray(fp), channels="rgb")
+
+def _pth_processing_reference(fp):
+    # Original PIL/torchvision pipeline, kept as the numerical baseline for FacePreprocessor.
     class PreprocessInput(torch.nn.Module):
         def init(self):
             super(PreprocessInput, self).init()
@@ -28,12 +85,70 @@ def pth_processing(fp):
         return img
     return get_img_torch(fp)
 
+def check_preprocess_parity(samples=50, seed=0):
+    """
+    Compare FacePreprocessor with the original PIL pipeline on random RGB crops of
+    random sizes (both up- and downscaling). Returns the largest absolute difference.
+    """
+    rng = np.random.default_rng(seed)
+    preprocessor = FacePreprocessor(batch_size=1)
+    worst = 0.0
+    for _ in range(samples):
+        h, w = rng.integers(20, 640, size=2)
+        rgb = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+        expected = _pth_processing_reference(Image.fromarray(rgb))
+        fused_rgb = preprocessor.fill(0, rgb, channels="rgb")
+        worst = max(worst, float((expected - fused_rgb).abs().max()))
+        fused_bgr = preprocessor.fill(0, np.ascontiguousarray(rgb[:, :, ::-1]), channels="bgr")
+        worst = max(worst, float((expected - fused_bgr).abs().max()))
+    return worst
+
 def norm_coordinates(normalized_x, normalized_y, image_width, image_height):
     x_px = min(math.floor(normalized_x * image_width), image_width - 1)
     y_px = min(math.floor(normalized_y * image_height), image_height - 1)
     return x_px, y_px
 
-def get_box(fl, w, h):
+def landmarks_to_array(fl):
+    """(N, 2) float array with the normalised x, y of every landmark of one face."""
+    return np.array([(lm.x, lm.y) for lm in fl.landmark], dtype=np.float64)
+
+def boxes_from_landmarks(coords, w, h, margin=0.0):
+    """
+    Pixel boxes for one or more faces from normalised landmark coordinates.
+
+    `coords` is (N, 2) for one face or (F, N, 2) for F faces. floor() and the clamp to
+    the last pixel are monotonic, so they are applied to the per-axis min/max only
+    instead of to every landmark. `margin` pads each side by that fraction of the
+    box width/height. Returns an int array of [startX, startY, endX, endY] rows.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    if coords.ndim == 2:
+        coords = coords[np.newaxis]
+    size = np.array([w, h], dtype=np.float64)
+    last = size - 1
+    start = np.minimum(np.floor(coords.min(axis=1) * size), last)
+    end = np.minimum(np.floor(coords.max(axis=1) * size), last)
+    if margin:
+        pad = np.floor((end - start) * margin)
+        start -= pad
+        end += pad
+    start = np.maximum(start, 0)
+    end = np.minimum(end, last)
+    return np.concatenate([start, end], axis=1).astype(np.int64)
+
+def get_box(fl, w, h, margin=0.0):
+    startX, startY, endX, endY = boxes_from_landmarks(landmarks_to_array(fl), w, h, margin)[0]
+    return int(startX), int(startY), int(endX), int(endY)
+
+def get_boxes(multi_face_landmarks, w, h, margin=0.0):
+    """Batched get_box for every face in a FaceMesh result; returns an (F, 4) int array."""
+    if not multi_face_landmarks:
+        return np.empty((0, 4), dtype=np.int64)
+    coords = np.stack([landmarks_to_array(fl) for fl in multi_face_landmarks])
+    return boxes_from_landmarks(coords, w, h, margin)
+
+def _get_box_reference(fl, w, h):
+    # Original per-landmark implementation, kept as the baseline for benchmark_get_box.
     idx_to_coors = {}
     for idx, landmark in enumerate(fl.landmark):
         landmark_px = norm_coordinates(landmark.x, landmark.y, w, h)
@@ -46,3 +161,37 @@ def get_box(fl, w, h):
     (startX, startY) = (max(0, x_min), max(0, y_min))
     (endX, endY) = (min(w - 1, endX), (min(h - 1, endY)))
     return startX, startY, endX, endY
+
+def benchmark_get_box(iterations=2000, num_landmarks=468, w=640, h=480, seed=0):
+    """
+    Compare get_box against the original loop on random FaceMesh-like landmarks.
+    Returns the per-call time of both in microseconds and checks the boxes match.
+    """
+    import time
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(seed)
+    faces = []
+    for _ in range(16):
+        pts = rng.uniform(-0.05, 1.05, size=(num_landmarks, 2))
+        faces.append(SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y)) for x, y in pts]))
+
+    for fl in faces:
+        assert tuple(int(v) for v in _get_box_reference(fl, w, h)) == get_box(fl, w, h)
+
+    timings = {}
+    for name, fn in (("reference", _get_box_reference), ("vectorised", get_box)):
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(faces[i % len(faces)], w, h)
+        timings[name] = (time.perf_counter() - start) / iterations * 1e6
+    timings["speedup"] = timings["reference"] / timings["vectorised"]
+    return timings
+
+if __name__ == "__main__":
+    diff = check_preprocess_parity()
+    print(f"preprocess parity : max abs diff {diff} ({'OK' if diff == 0.0 else 'MISMATCH'})")
+    result = benchmark_get_box()
+    print(f"get_box reference : {result['reference']:.1f} us/call")
+    print(f"get_box vectorised: {result['vectorised']:.1f} us/call")
+    print(f"speedup           : {result['speedup']:.1f}x")
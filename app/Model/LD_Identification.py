@@ -2,12 +2,19 @@ import base64
 import os
 import re
 import json
+import threading
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 
+from app.Config.config import Config
+
 load_dotenv()
 
+MODEL_NAME = "gemini-2.0-flash"
+# Bump whenever the system prompt or generation settings change; part of the result cache key
+PROMPT_VERSION = "2"
+
 
 
 def markdown_to_json(markdown_text):
@@ -29,28 +36,7 @@ def markdown_to_json(markdown_text):
         print("Error decoding JSON:", e)
         return None
     
-def identify(data):
-    client = genai.Client(
-        api_key=os.environ.get("GEMINI_API_KEY"),
-    )
-
-    model = "gemini-2.0-flash"
-    contents = [
-        types.Content(
-            role="user",
-            parts=[
-                types.Part.from_text(text=data),
-            ],
-        ),
-    ]
-    generate_content_config = types.GenerateContentConfig(
-        temperature=1,
-        top_p=0.95,
-        top_k=40,
-        max_output_tokens=8192,
-        response_mime_type="text/plain",
-        system_instruction=[
-            types.Part.from_text(text="""You are an advanced AI model designed to assess and analyze learning disabilities and emotional states in students. Your task is to generate a structured JSON output based on provided input, ensuring completeness, clarity, and adherence to the specified format. Your response must follow this exact JSON schema:
+SYSTEM_PROMPT = """You are an advanced AI model designed to assess and analyze learning disabilities and emotional states in students. Your task is to generate a structured JSON output based on provided input, ensuring completeness, clarity, and adherence to the specified format. Your response must follow this exact JSON schema:
 
 {
   \"studentProfile\": {
@@ -124,17 +110,88 @@ def identify(data):
    - Instead, populate with **real, relevant data** extracted from the given input.
 
 Your primary goal is to generate structured, readable, and **insightful** JSON outputs that can be directly parsed and used for further analysis. Ensure completeness, clarity, and adherence to the format strictly.
-"""),
-        ],
-    )
-    string = ""
-    for chunk in client.models.generate_content_stream(
-        model=model,
+"""
+
+# Built once: the system prompt is large and identical for every request
+GENERATE_CONTENT_CONFIG = types.GenerateContentConfig(
+    temperature=1,
+    top_p=0.95,
+    top_k=40,
+    max_output_tokens=8192,
+    response_mime_type="text/plain",
+    system_instruction=[
+        types.Part.from_text(text=SYSTEM_PROMPT),
+    ],
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Process-wide Gemini client. Its HTTP client keeps a connection pool, so requests
+    after the first reuse a kept-alive TLS connection instead of opening a new one.
+    GEMINI_BASE_URL (environment or Config) points it at another endpoint, such as the
+    local stand-in server in app/Model/gemini_stub.py.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                base_url = os.environ.get("GEMINI_BASE_URL") or Config.GEMINI_BASE_URL
+                _client = genai.Client(
+                    api_key=os.environ.get("GEMINI_API_KEY"),
+                    http_options=types.HttpOptions(
+                        base_url=base_url,
+                        timeout=Config.GEMINI_TIMEOUT_MS,
+                    ),
+                )
+    return _client
+
+
+def reset_client():
+    """Drop the shared client so the next call builds one from the current settings."""
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def stream_identify(data):
+    """
+    Send the assessment JSON to Gemini and yield the text of the answer chunk by
+    chunk as it is generated.
+    """
+    contents = [
+        types.Content(
+            role="user",
+            parts=[
+                types.Part.from_text(text=data),
+            ],
+        ),
+    ]
+    for chunk in get_client().models.generate_content_stream(
+        model=MODEL_NAME,
         contents=contents,
-        config=generate_content_config,
+        config=GENERATE_CONTENT_CONFIG,
     ):
-        print(chunk.text, end="")
-        string += chunk.text
+        if chunk.text:
+            yield chunk.text
+
+def identify(data, on_chunk=None):
+    """
+    Send the assessment JSON to Gemini and return the parsed JSON answer.
+    `on_chunk(characters, chunks)` is called after every streamed chunk, if given.
+    """
+    # Collect chunks in a list and join once; repeated string += is quadratic
+    parts = []
+    characters = 0
+    for text in stream_identify(data):
+        parts.append(text)
+        characters += len(text)
+        if on_chunk is not None:
+            on_chunk(characters, len(parts))
+    string = "".join(parts)
     print("\n\nData :\n", string)
     print("\nType of data:", type(string))
     
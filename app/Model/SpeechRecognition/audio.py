@@ -0,0 +1,195 @@
+import io
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.Config.config import Config
+
+TARGET_SAMPLE_RATE = 16000
+
+_PCM_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def find_ffmpeg():
+    """ffmpeg from Config.FFMPEG_PATH if set, otherwise the first one on PATH."""
+    if Config.FFMPEG_PATH and os.path.exists(Config.FFMPEG_PATH):
+        return Config.FFMPEG_PATH
+    return shutil.which("ffmpeg")
+
+
+def is_wav(data):
+    return len(data) >= 12 and data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+
+
+def _decode_wav(data):
+    """PCM WAV bytes -> (float32 mono samples in [-1, 1], sample rate), without touching disk."""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 3:
+        # 24-bit: widen each little-endian triple to int32
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        pcm = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        pcm = np.where(pcm & 0x800000, pcm - 0x1000000, pcm)
+        samples = pcm.astype(np.float32) / float(1 << 23)
+    elif width in _PCM_DTYPES:
+        pcm = np.frombuffer(frames, dtype=_PCM_DTYPES[width])
+        if width == 1:
+            samples = (pcm.astype(np.float32) - 128.0) / 128.0
+        else:
+            samples = pcm.astype(np.float32) / float(np.iinfo(pcm.dtype).max + 1)
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width} bytes")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+_RATE_PATTERN = re.compile(r"Audio:.*?(\d+) Hz")
+
+
+def _decode_ffmpeg(data):
+    """
+    Any container/codec ffmpeg understands (WebM/Opus, MP3, ...) -> (float32 mono samples,
+    sample rate). The upload is piped to ffmpeg's stdin and raw samples are read from its
+    stdout at the source rate; resampling is done separately so its cost is measurable.
+    """
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        raise AudioDecodeError("ffmpeg not found on PATH (or Config.FFMPEG_PATH)")
+    process = subprocess.run(
+        [ffmpeg, "-hide_banner", "-nostdin", "-i", "pipe:0", "-vn", "-ac", "1", "-f", "f32le", "pipe:1"],
+        input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if process.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg failed: {process.stderr.decode(errors='replace')[-300:]}")
+    match = _RATE_PATTERN.search(process.stderr.decode(errors="replace"))
+    if not match:
+        raise AudioDecodeError("Could not read the sample rate from ffmpeg output")
+    return np.frombuffer(process.stdout, dtype=np.float32), int(match.group(1))
+
+
+def resample(samples, rate, target_rate=TARGET_SAMPLE_RATE):
+    """Polyphase resampling (anti-aliased) to `target_rate`."""
+    if rate == target_rate or samples.size == 0:
+        return samples.astype(np.float32, copy=False)
+    from math import gcd
+    from scipy.signal import resample_poly
+
+    g = gcd(rate, target_rate)
+    return resample_poly(samples, target_rate // g, rate // g).astype(np.float32)
+
+
+def to_pcm16(samples):
+    """float32 samples -> little-endian 16-bit PCM bytes (what speech_recognition.AudioData expects)."""
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+class AudioClip:
+    __slots__ = ("samples", "sample_rate", "source_rate", "timings")
+
+    def __init__(self, samples, sample_rate, source_rate, timings):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.source_rate = source_rate
+        self.timings = timings
+
+    @property
+    def duration(self):
+        return self.samples.size / float(self.sample_rate)
+
+
+def load_audio(data, target_rate=TARGET_SAMPLE_RATE):
+    """
+    Decode an upload held in memory into a 16 kHz mono float32 buffer. The format is
+    detected from the bytes (some recordings saved as .wav are really WebM): RIFF/WAVE is
+    read with the wave module, everything else is piped through ffmpeg.
+    """
+    started = time.perf_counter()
+    samples, rate = _decode_wav(data) if is_wav(data) else _decode_ffmpeg(data)
+    decoded = time.perf_counter()
+    samples = resample(samples, rate, target_rate)
+    resampled = time.perf_counter()
+    return AudioClip(samples, target_rate, rate, {
+        "decodeMs": (decoded - started) * 1000.0,
+        "resampleMs": (resampled - decoded) * 1000.0,
+    })
+
+
+# Originals are written off the request path; a single thread keeps disk writes sequential
+_persist_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-persist")
+
+
+def _write(path, data):
+    try:
+        with open(path, "wb") as f:
+            f.write(data)
+    except OSError as e:
+        print(f"❌ Failed to persist audio upload {path}: {e}")
+
+
+def persist_async(data, path):
+    """Write the original upload to `path` in the background; returns the Future."""
+    return _persist_executor.submit(_write, path, data)
+
+
+class AudioStageStats:
+    """Per-stage timings (decode, resample, ASR) of the last `window` uploads."""
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.uploads = 0
+
+    def record(self, timings):
+        with self._lock:
+            self.uploads += 1
+            self._recent.append(dict(timings))
+
+    def snapshot(self):
+        with self._lock:
+            recent = list(self._recent)
+        stages = sorted({key for t in recent for key in t})
+        return {
+            "uploads": self.uploads,
+            "meanMs": {
+                key: round(sum(t[key] for t in recent if key in t) / sum(1 for t in recent if key in t), 3)
+                for key in stages
+            },
+        }
+
+
+audio_stats = AudioStageStats()
+
+
+if __name__ == "__main__":
+    # Decode/resample cost of every stored upload (.wav files may really be WebM)
+    import sys
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else "static/uploads/audio"
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "rb") as f:
+            payload = f.read()
+        try:
+            clip = load_audio(payload)
+        except AudioDecodeError as e:
+            print(f"{name:40s} {e}")
+            continue
+        audio_stats.record(clip.timings)
+        print(f"{name:40s} {'wav ' if is_wav(payload) else 'pipe'} {clip.source_rate:6d} Hz "
+              f"{clip.duration:6.2f} s  decode {clip.timings['decodeMs']:7.2f} ms  "
+              f"resample {clip.timings['resampleMs']:6.2f} ms")
+    print(audio_stats.snapshot())
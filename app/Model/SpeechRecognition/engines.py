@@ -0,0 +1,171 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from app.Config.config import Config
+from app.Model.SpeechRecognition.audio import TARGET_SAMPLE_RATE, to_pcm16
+
+
+class ASREngine(ABC):
+    """
+    Speech-recognition backend. Engines receive 16 kHz mono float32 buffers (see
+    audio.load_audio) and return one transcript per buffer. `max_batch_size` is how many
+    utterances the engine can decode in one forward pass; ASRPool never exceeds it.
+    Subclasses must implement transcribe(); engines that decode batches natively also
+    override transcribe_batch().
+    """
+    name = "base"
+    max_batch_size = 1
+
+    def transcribe_batch(self, clips):
+        return [self.transcribe(samples) for samples in clips]
+
+    @abstractmethod
+    def transcribe(self, samples):
+        """Transcript of one 16 kHz mono float32 buffer."""
+
+
+class GoogleASREngine(ASREngine):
+    """The original backend: Google Web Speech API through speech_recognition (network)."""
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        import speech_recognition as sr
+
+        self._sr = sr
+        self.language = language
+
+    def transcribe(self, samples):
+        sr = self._sr
+        recognizer = sr.Recognizer()
+        try:
+            audio_data = sr.AudioData(to_pcm16(samples), TARGET_SAMPLE_RATE, 2)
+            print("Sending audio to Google Speech Recognition...")
+            return recognizer.recognize_google(audio_data, language=self.language)
+        except sr.UnknownValueError:
+            return "Google Speech Recognition could not understand the audio."
+        except sr.RequestError as e:
+            return f"Could not request results from Google Speech Recognition service; {e}"
+        except Exception as e:
+            return f"Error transcribing audio: {str(e)}"
+
+
+class WhisperASREngine(ASREngine):
+    """
+    Local CPU backend: a Whisper model run by CTranslate2 (faster-whisper), loaded once.
+
+    Utterances up to 30 s (every dyslexia recording) are decoded together: their
+    log-mel features are padded to Whisper's fixed 30 s window, stacked, encoded in one
+    call and decoded with one batched generate(). Longer audio falls back to
+    faster-whisper's own segment-by-segment transcribe().
+    """
+    name = "whisper"
+
+    def __init__(self, model_size="base.en", compute_type="int8", cpu_threads=0, beam_size=1,
+                 language="en", max_batch_size=8):
+        from faster_whisper import WhisperModel
+        from faster_whisper.tokenizer import Tokenizer
+
+        self.model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+        self.beam_size = beam_size
+        self.language = language if self.model.model.is_multilingual else None
+        self.max_batch_size = max_batch_size
+        self.tokenizer = Tokenizer(
+            self.model.hf_tokenizer, self.model.model.is_multilingual, task="transcribe", language=self.language
+        )
+        self.prompt = list(self.tokenizer.sot_sequence) + [self.tokenizer.no_timestamps]
+        self.max_frames = self.model.feature_extractor.nb_max_frames
+        self.max_samples = self.model.feature_extractor.n_samples
+
+    def _features(self, samples):
+        features = self.model.feature_extractor(samples)[:, :self.max_frames]
+        return np.pad(features, ((0, 0), (0, self.max_frames - features.shape[1])))
+
+    def transcribe(self, samples):
+        return self.transcribe_batch([samples])[0]
+
+    def transcribe_batch(self, clips):
+        texts = [None] * len(clips)
+        short = [i for i, samples in enumerate(clips) if samples.size <= self.max_samples]
+        if short:
+            features = np.stack([self._features(clips[i]) for i in short]).astype(np.float32)
+            encoded = self.model.encode(features)
+            results = self.model.model.generate(
+                encoded, [self.prompt] * len(short), beam_size=self.beam_size, max_length=224
+            )
+            for i, result in zip(short, results):
+                texts[i] = self.tokenizer.decode(result.sequences_ids[0]).strip()
+        for i, samples in enumerate(clips):
+            if texts[i] is None:
+                segments, _ = self.model.transcribe(samples, beam_size=self.beam_size, language=self.language)
+                texts[i] = " ".join(s.text.strip() for s in segments)
+        return texts
+
+
+ENGINES = {"google": GoogleASREngine, "whisper": WhisperASREngine}
+
+
+def create_engine(name=None):
+    """Build the engine named by Config.ASR_ENGINE (or `name`) with its Config settings."""
+    name = name or Config.ASR_ENGINE
+    if name == "whisper":
+        return WhisperASREngine(
+            model_size=Config.ASR_WHISPER_MODEL,
+            compute_type=Config.ASR_WHISPER_COMPUTE_TYPE,
+            cpu_threads=Config.ASR_CPU_THREADS,
+            beam_size=Config.ASR_BEAM_SIZE,
+            max_batch_size=Config.ASR_MAX_BATCH_SIZE
+        )
+    if name == "google":
+        return GoogleASREngine()
+    raise ValueError(f"Unknown ASR engine {name!r}; expected one of {sorted(ENGINES)}")
+
+
+def benchmark_rtf(directory="static/uploads/audio", engine_names=("whisper",), batch_sizes=(1, 4)):
+    """
+    Real-time factor (processing seconds per second of audio, lower is better) of each
+    engine over the stored recordings, decoding them one by one and in batches.
+    Engine construction and one warm-up call are excluded from the timings.
+    """
+    import os
+    import time
+
+    from app.Model.SpeechRecognition.audio import load_audio, AudioDecodeError
+
+    clips = []
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "rb") as f:
+            try:
+                clips.append(load_audio(f.read()).samples)
+            except AudioDecodeError as e:
+                print(f"skipping {name}: {e}")
+    audio_seconds = sum(c.size for c in clips) / float(TARGET_SAMPLE_RATE)
+
+    rows = []
+    for engine_name in engine_names:
+        engine = create_engine(engine_name)
+        engine.transcribe_batch(clips[:1])
+        for batch_size in batch_sizes:
+            batch_size = min(batch_size, engine.max_batch_size)
+            started = time.perf_counter()
+            for i in range(0, len(clips), batch_size):
+                engine.transcribe_batch(clips[i:i + batch_size])
+            elapsed = time.perf_counter() - started
+            rows.append({
+                "engine": engine_name,
+                "batchSize": batch_size,
+                "recordings": len(clips),
+                "audioSeconds": round(audio_seconds, 2),
+                "seconds": round(elapsed, 2),
+                "rtf": round(elapsed / audio_seconds, 4) if audio_seconds else None,
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    names = sys.argv[1:] or ["whisper"]
+    for row in benchmark_rtf(engine_names=names):
+        print(f"{row['engine']:8s} batch {row['batchSize']:2d}: {row['recordings']} recordings, "
+              f"{row['audioSeconds']:.1f} s audio in {row['seconds']:.1f} s -> RTF {row['rtf']}")
@@ -0,0 +1,192 @@
+import re
+
+import numpy as np
+
+from app.Model.SpeechRecognition.audio import TARGET_SAMPLE_RATE
+
+
+def _runs(mask):
+    """Start/end (exclusive) indices of the True runs of a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def frame_levels(samples, frame_ms=30, hop_ms=10, sample_rate=TARGET_SAMPLE_RATE):
+    """RMS level in dBFS of overlapping frames, computed on a strided view (no copies)."""
+    frame = int(sample_rate * frame_ms / 1000)
+    hop = int(sample_rate * hop_ms / 1000)
+    if samples.size < frame:
+        samples = np.pad(samples, (0, frame - samples.size))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, frame)[::hop]
+    rms = np.sqrt(np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / frame)
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+class SpeechActivity:
+    """Result of the energy VAD pass over one recording."""
+    __slots__ = ("samples", "sample_rate", "speech", "hop", "start", "end")
+
+    def __init__(self, samples, sample_rate, speech, hop, start, end):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.speech = speech  # per-frame speech mask
+        self.hop = hop  # samples per frame step
+        self.start = start  # first/last+1 sample of the speech span (plus padding)
+        self.end = end
+
+    @property
+    def trimmed(self):
+        """The recording without leading/trailing silence (a view, not a copy)."""
+        return self.samples[self.start:self.end]
+
+    @property
+    def duration(self):
+        return self.samples.size / float(self.sample_rate)
+
+    @property
+    def trimmed_duration(self):
+        return (self.end - self.start) / float(self.sample_rate)
+
+
+def detect_speech(samples, sample_rate=TARGET_SAMPLE_RATE, frame_ms=30, hop_ms=10, threshold_db=12.0,
+                  min_speech_ms=60, pad_ms=150):
+    """
+    Energy-based voice activity detection. A frame is speech when its level is
+    `threshold_db` above the recording's noise floor (10th percentile of frame levels);
+    speech bursts shorter than `min_speech_ms` (clicks) are ignored. The speech span is
+    widened by `pad_ms` on both sides so word onsets/offsets are not clipped.
+    """
+    hop = int(sample_rate * hop_ms / 1000)
+    levels = frame_levels(samples, frame_ms, hop_ms, sample_rate)
+    floor = np.percentile(levels, 10)
+    speech = levels > floor + threshold_db
+
+    starts, ends = _runs(speech)
+    short = (ends - starts) * hop_ms < min_speech_ms
+    for s, e in zip(starts[short], ends[short]):
+        speech[s:e] = False
+
+    voiced = np.flatnonzero(speech)
+    if voiced.size == 0:
+        # No clear speech: keep everything rather than hand ASR an empty buffer
+        return SpeechActivity(samples, sample_rate, speech, hop, 0, samples.size)
+    pad = int(sample_rate * pad_ms / 1000)
+    frame = int(sample_rate * frame_ms / 1000)
+    start = max(0, int(voiced[0]) * hop - pad)
+    end = min(samples.size, int(voiced[-1]) * hop + frame + pad)
+    return SpeechActivity(samples, sample_rate, speech, hop, start, end)
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9']+", (text or "").lower())
+
+
+def align_words(expected, recognized):
+    """
+    Word-level Levenshtein alignment of the recognised text against the expected text.
+    Returns substitution/deletion/insertion counts, word error rate and the error pairs.
+    """
+    ref, hyp = _words(expected), _words(recognized)
+    n, m = len(ref), len(hyp)
+    cost = np.zeros((n + 1, m + 1), dtype=np.int32)
+    cost[:, 0] = np.arange(n + 1)
+    cost[0, :] = np.arange(m + 1)
+    hyp_arr = np.array(hyp, dtype=object)
+    for i in range(1, n + 1):
+        # Substitution/deletion are vectorised over the row; insertion needs a running min
+        row = np.minimum(cost[i - 1, :-1] + (hyp_arr != ref[i - 1]), cost[i - 1, 1:] + 1)
+        row = np.concatenate(([i], row))
+        for j in range(1, m + 1):
+            if row[j - 1] + 1 < row[j]:
+                row[j] = row[j - 1] + 1
+        cost[i] = row
+
+    errors = []
+    counts = {"substitutions": 0, "deletions": 0, "insertions": 0}
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and cost[i, j] == cost[i - 1, j - 1] + (ref[i - 1] != hyp[j - 1]):
+            if ref[i - 1] != hyp[j - 1]:
+                counts["substitutions"] += 1
+                errors.append({"type": "substitution", "expected": ref[i - 1], "recognized": hyp[j - 1]})
+            i, j = i - 1, j - 1
+        elif i > 0 and cost[i, j] == cost[i - 1, j] + 1:
+            counts["deletions"] += 1
+            errors.append({"type": "deletion", "expected": ref[i - 1], "recognized": None})
+            i -= 1
+        else:
+            counts["insertions"] += 1
+            errors.append({"type": "insertion", "expected": None, "recognized": hyp[j - 1]})
+            j -= 1
+    errors.reverse()
+
+    return {
+        **counts,
+        "expectedWords": n,
+        "recognizedWords": m,
+        "wer": round(int(cost[n, m]) / n, 3) if n else float(m > 0),
+        "errors": errors,
+    }
+
+
+def fluency_features(activity, recognized_text, expected_text, min_pause_ms=250):
+    """
+    Reading-fluency features of one recording: total and speaking duration, leading and
+    trailing silence, pauses inside the speech span, words per minute over the speech
+    span, and the word alignment against the expected sentence.
+    """
+    hop_s = activity.hop / float(activity.sample_rate)
+    speech = activity.speech
+    voiced = np.flatnonzero(speech)
+    if voiced.size:
+        inner = ~speech[voiced[0]:voiced[-1] + 1]
+        starts, ends = _runs(inner)
+        lengths = (ends - starts) * hop_s
+        pauses = lengths[lengths * 1000.0 >= min_pause_ms]
+        span_s = float(voiced[-1] - voiced[0] + 1) * hop_s
+    else:
+        pauses = np.zeros(0)
+        span_s = 0.0
+
+    alignment = align_words(expected_text, recognized_text)
+    words = alignment["recognizedWords"]
+    return {
+        "durationSeconds": round(activity.duration, 3),
+        "speakingSeconds": round(float(speech.sum()) * hop_s, 3),
+        "leadingSilenceSeconds": round(float(voiced[0]) * hop_s, 3) if voiced.size else round(activity.duration, 3),
+        "trailingSilenceSeconds": round(max(0.0, activity.duration - float(voiced[-1] + 1) * hop_s), 3)
+        if voiced.size else 0.0,
+        "pauseCount": int(pauses.size),
+        "pauseTotalSeconds": round(float(pauses.sum()), 3),
+        "longestPauseSeconds": round(float(pauses.max()), 3) if pauses.size else 0.0,
+        "wordsPerMinute": round(words / span_s * 60.0, 1) if span_s else 0.0,
+        "alignment": alignment,
+    }
+
+
+if __name__ == "__main__":
+    # How much audio the VAD removes from the stored recordings
+    import os
+    import sys
+    import time
+
+    from app.Model.SpeechRecognition.audio import load_audio, AudioDecodeError
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else "static/uploads/audio"
+    total = trimmed = 0.0
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), "rb") as f:
+            try:
+                clip = load_audio(f.read())
+            except AudioDecodeError:
+                continue
+        started = time.perf_counter()
+        activity = detect_speech(clip.samples)
+        features = fluency_features(activity, "", "")
+        ms = (time.perf_counter() - started) * 1000.0
+        total += activity.duration
+        trimmed += activity.trimmed_duration
+        print(f"{name:40s} {activity.duration:5.2f} s -> {activity.trimmed_duration:5.2f} s  "
+              f"pauses {features['pauseCount']}  vad {ms:5.2f} ms")
+    if total:
+        print(f"audio sent to ASR: {trimmed:.1f} of {total:.1f} s ({100.0 * (1 - trimmed / total):.0f}% removed)")
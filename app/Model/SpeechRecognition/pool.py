@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from app.Model.SpeechRecognition.audio import TARGET_SAMPLE_RATE
+
+
+class ASRQueueFullError(Exception):
+    pass
+
+
+class _PendingUtterance:
+    __slots__ = ("samples", "future", "enqueued_at")
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class ASRPool:
+    """
+    Bounded pool of worker threads in front of one ASR engine, which is loaded once per
+    process. Each worker takes up to `max_batch_size` queued utterances (capped by the
+    engine's own limit), waiting at most `max_wait_ms` after the oldest one for the batch
+    to fill, and transcribes them in one engine call. At most `max_queued` utterances may
+    wait; further submissions raise ASRQueueFullError instead of piling up.
+
+    Partial transcripts of streamed recordings use a separate lane of at most
+    `max_queued_partials` entries. Workers only take partials when no final utterance is
+    waiting, and submit_partial() is refused while finals are queued, so partials never
+    delay or crowd out complete recordings.
+    """
+    def __init__(self, engine, workers=1, max_batch_size=4, max_wait_ms=50, max_queued=32, max_queued_partials=4):
+        self.engine = engine
+        self.workers = max(1, int(workers))
+        self.max_batch_size = max(1, min(int(max_batch_size), engine.max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.max_queued = max_queued
+        self.max_queued_partials = max_queued_partials
+        self._finals = deque()
+        self._partials = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._threads_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.utterances = 0
+        self.partials = 0
+        self.partials_refused = 0
+        self.batches = 0
+        self._recent = deque(maxlen=500)
+
+    def _ensure_workers(self):
+        if len(self._threads) == self.workers:
+            return
+        with self._threads_lock:
+            while len(self._threads) < self.workers:
+                worker = threading.Thread(target=self._run, name=f"asr-{len(self._threads)}", daemon=True)
+                worker.start()
+                self._threads.append(worker)
+
+    def submit(self, samples):
+        """Queue a 16 kHz mono float32 buffer; returns a Future resolving to its transcript."""
+        self._ensure_workers()
+        pending = _PendingUtterance(samples)
+        with self._cond:
+            if len(self._finals) >= self.max_queued:
+                raise ASRQueueFullError("Too many recordings waiting for transcription")
+            self._finals.append(pending)
+            self._cond.notify()
+        return pending.future
+
+    def submit_partial(self, samples):
+        """Like submit() on the low-priority lane; raises ASRQueueFullError when it is full or finals wait."""
+        self._ensure_workers()
+        pending = _PendingUtterance(samples)
+        with self._cond:
+            if self._finals or len(self._partials) >= self.max_queued_partials:
+                with self._stats_lock:
+                    self.partials_refused += 1
+                raise ASRQueueFullError("ASR busy with complete recordings; partial skipped")
+            self._partials.append(pending)
+            self._cond.notify()
+        with self._stats_lock:
+            self.partials += 1
+        return pending.future
+
+    def transcribe(self, samples, timeout=None):
+        return self.submit(samples).result(timeout=timeout)
+
+    def _collect(self):
+        with self._cond:
+            while not self._finals and not self._partials:
+                self._cond.wait()
+            first = (self._finals or self._partials).popleft()
+            batch = [first]
+            deadline = first.enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if self._finals or self._partials:
+                    batch.append((self._finals or self._partials).popleft())
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                texts = self.engine.transcribe_batch([p.samples for p in batch])
+            except Exception as e:
+                for p in batch:
+                    p.future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+            for p, text in zip(batch, texts):
+                p.future.set_result(text)
+            audio_seconds = sum(p.samples.size for p in batch) / float(TARGET_SAMPLE_RATE)
+            with self._stats_lock:
+                self.utterances += len(batch)
+                self.batches += 1
+                self._recent.append((len(batch), elapsed, audio_seconds))
+
+    def stats(self):
+        with self._stats_lock:
+            recent = list(self._recent)
+            utterances, batches = self.utterances, self.batches
+            partials, partials_refused = self.partials, self.partials_refused
+        with self._cond:
+            queued, queued_partials = len(self._finals), len(self._partials)
+        busy = sum(r[1] for r in recent)
+        audio = sum(r[2] for r in recent)
+        return {
+            "engine": self.engine.name,
+            "workers": self.workers,
+            "queued": queued,
+            "queuedPartials": queued_partials,
+            "partials": partials,
+            "partialsRefused": partials_refused,
+            "utterances": utterances,
+            "batches": batches,
+            "meanBatchSize": round(sum(r[0] for r in recent) / len(recent), 3) if recent else 0.0,
+            "realTimeFactor": round(busy / audio, 4) if audio else None,
+        }
@@ -0,0 +1,378 @@
+import subprocess
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from app.Config.config import Config
+from app.Model.SpeechRecognition.audio import TARGET_SAMPLE_RATE, AudioDecodeError, find_ffmpeg, resample
+from app.Model.SpeechRecognition.fluency import _runs, detect_speech
+from app.Model.SpeechRecognition.pool import ASRQueueFullError
+
+
+class TooManyStreamsError(Exception):
+    """Raised by AudioStreamStore.open at the per-user ("user") or global ("server") limit."""
+    def __init__(self, message, scope):
+        super().__init__(message)
+        self.scope = scope
+
+
+class PCMStreamDecoder:
+    """Raw little-endian 16-bit mono PCM chunks at `sample_rate`, decoded in-process."""
+    def __init__(self, sample_rate=TARGET_SAMPLE_RATE):
+        self.sample_rate = int(sample_rate)
+        self._parts = []
+        self._carry = b""
+        self._cached = (0, np.zeros(0, dtype=np.float32))
+        self._source_samples = 0
+
+    def feed(self, data):
+        data = self._carry + data
+        usable = len(data) - len(data) % 2
+        self._carry = data[usable:]
+        if usable:
+            self._parts.append(np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0)
+            self._source_samples += usable // 2
+
+    def samples(self):
+        """Everything received so far at 16 kHz (resampled as a whole, so chunk edges add no artefacts)."""
+        if self._cached[0] != self._source_samples:
+            source = np.concatenate(self._parts) if self._parts else np.zeros(0, dtype=np.float32)
+            self._parts = [source]
+            self._cached = (self._source_samples, resample(source, self.sample_rate))
+        return self._cached[1]
+
+    def close(self, timeout=None):
+        pass
+
+
+class FFmpegStreamDecoder:
+    """
+    Container formats (WebM/Opus chunks from MediaRecorder, MP3, ...) decoded by one
+    long-lived ffmpeg process per stream: chunks are written to its stdin as they arrive
+    and a reader thread collects 16 kHz mono samples from its stdout.
+    """
+    def __init__(self):
+        ffmpeg = find_ffmpeg()
+        if not ffmpeg:
+            raise AudioDecodeError("ffmpeg not found on PATH (or Config.FFMPEG_PATH)")
+        self._process = subprocess.Popen(
+            [ffmpeg, "-hide_banner", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+             "-vn", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "-f", "f32le", "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._lock = threading.Lock()
+        self._parts = []
+        self._bytes = b""
+        self._cached = np.zeros(0, dtype=np.float32)
+        self._reader = threading.Thread(target=self._read, name="ffmpeg-stream", daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while True:
+            data = self._process.stdout.read1(65536)
+            if not data:
+                break
+            with self._lock:
+                self._bytes += data
+                usable = len(self._bytes) - len(self._bytes) % 4
+                if usable:
+                    self._parts.append(np.frombuffer(self._bytes[:usable], dtype=np.float32))
+                    self._bytes = self._bytes[usable:]
+
+    def feed(self, data):
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError) as e:
+            raise AudioDecodeError(f"ffmpeg stopped accepting audio: {e}")
+
+    def samples(self):
+        with self._lock:
+            if self._parts:
+                self._cached = np.concatenate([self._cached] + self._parts)
+                self._parts = []
+            return self._cached
+
+    def close(self, timeout=10.0):
+        """Flush: end the input and wait until ffmpeg has emitted every decoded sample."""
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        self._reader.join(timeout)
+        try:
+            self._process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+
+DECODERS = {"pcm16": PCMStreamDecoder, "webm": FFmpegStreamDecoder}
+
+
+class AudioStream:
+    """
+    One recording being uploaded in chunks. Whenever at least `partial_interval` seconds
+    of new audio have arrived and no partial transcription is running, the open segment
+    is submitted to the ASR pool's low-priority partial lane; the result is the partial
+    hypothesis.
+
+    Once the student pauses for `segment_pause_ms` and then speaks again, the audio up to
+    the middle of that pause is committed as a segment and transcribed once; later
+    partials only cover the audio after it, so the work per partial stays bounded by
+    the segment length instead of growing with the whole recording.
+
+    At finish, only the open segment still needs a transcript. A partial whose speech
+    span is unchanged (the audio after it is silence) is reused, so the answer is
+    usually ready as soon as the student stops talking.
+    """
+    def __init__(self, asr_pool, fmt="webm", sample_rate=TARGET_SAMPLE_RATE, partial_interval=1.0,
+                 vad_settings=None, segment_pause_ms=400, keep_original=False, **meta):
+        if fmt not in DECODERS:
+            raise ValueError(f"Unsupported stream format {fmt!r}; expected one of {sorted(DECODERS)}")
+        self.id = uuid.uuid4().hex
+        self.format = fmt
+        self.meta = meta
+        self.asr_pool = asr_pool
+        self.partial_interval = partial_interval
+        self.vad_settings = vad_settings or {}
+        self.segment_pause_ms = segment_pause_ms
+        # Speech spans that differ by less than the VAD padding describe the same speech
+        self._span_tolerance = int(TARGET_SAMPLE_RATE * self.vad_settings.get("pad_ms", 150) / 1000)
+        self.decoder = PCMStreamDecoder(sample_rate) if fmt == "pcm16" else FFmpegStreamDecoder()
+        self.created_at = self.last_seen = time.monotonic()
+        self.chunks = 0
+        self.bytes = 0
+        self.finished = False
+        self._lock = threading.Lock()
+        self._segments = []  # Futures of the committed segments' transcripts, in order
+        self._segment_start = 0  # First sample of the open segment
+        self._partial = ""  # Transcript of the open segment
+        self._partial_samples = 0  # Audio length the partial was computed on (or confirmed for)
+        self._partial_span = None  # (start, end) of the speech it was computed on
+        self._pending = None
+        self._pending_samples = 0
+        self._original = [] if keep_original else None
+
+    def feed(self, data):
+        with self._lock:
+            if self.finished:
+                raise ValueError("Stream already finished")
+            self.decoder.feed(data)
+            if self._original is not None:
+                self._original.append(data)
+            self.chunks += 1
+            self.bytes += len(data)
+            self.last_seen = time.monotonic()
+        self._maybe_transcribe()
+
+    def _same_span(self, a, b):
+        return a is not None and b is not None and all(abs(x - y) <= self._span_tolerance for x, y in zip(a, b))
+
+    def _segment_cut(self, activity):
+        """Sample index (in the open segment) of the middle of its last long pause followed by speech."""
+        voiced = np.flatnonzero(activity.speech)
+        if voiced.size == 0:
+            return None
+        hop_ms = activity.hop * 1000.0 / activity.sample_rate
+        starts, ends = _runs(~activity.speech[voiced[0]:voiced[-1] + 1])
+        long_pauses = np.flatnonzero((ends - starts) * hop_ms >= self.segment_pause_ms)
+        if long_pauses.size == 0:
+            return None
+        i = long_pauses[-1]
+        return int(voiced[0] + (starts[i] + ends[i]) // 2) * activity.hop
+
+    def _maybe_transcribe(self):
+        if not self.partial_interval:
+            return
+        with self._lock:
+            samples = self.decoder.samples()
+            new_audio = (samples.size - max(self._partial_samples, self._pending_samples)) / float(TARGET_SAMPLE_RATE)
+            if self._pending is not None or new_audio < self.partial_interval:
+                return
+            offset = self._segment_start
+            activity = detect_speech(samples[offset:], **self.vad_settings)
+
+            cut = self._segment_cut(activity)
+            if cut is not None:
+                segment = detect_speech(samples[offset:offset + cut], **self.vad_settings)
+                try:
+                    self._segments.append(self.asr_pool.submit_partial(segment.trimmed))
+                except ASRQueueFullError:
+                    return  # Commit it on a later chunk
+                self._segment_start = offset + cut
+                self._partial, self._partial_samples, self._partial_span = "", 0, None
+                return
+
+            span = (offset + activity.start, offset + activity.end)
+            if self._same_span(span, self._partial_span):
+                # Only silence since the last partial: it still holds
+                self._partial_samples = samples.size
+                return
+            try:
+                future = self.asr_pool.submit_partial(activity.trimmed)
+            except ASRQueueFullError:
+                return  # Partials are best effort; the final transcript is still produced
+            pending = self._pending = (future, samples.size, span, offset)
+            self._pending_samples = samples.size
+        future.add_done_callback(lambda f: self._on_partial(*pending))
+
+    def _on_partial(self, future, size, span, offset):
+        with self._lock:
+            if self._pending is not None and self._pending[0] is future:
+                self._pending = None
+            if future.exception() is None and offset == self._segment_start and size >= self._partial_samples:
+                self._partial = future.result()
+                self._partial_samples = size
+                self._partial_span = span
+
+    def _text(self):
+        done = [f.result() for f in self._segments if f.done() and f.exception() is None]
+        return " ".join(t for t in done + [self._partial] if t)
+
+    @property
+    def original(self):
+        """The uploaded bytes as received (only kept with keep_original=True)."""
+        return b"".join(self._original) if self._original is not None else None
+
+    def status(self):
+        with self._lock:
+            return {
+                "streamId": self.id,
+                "partial": self._text(),
+                "seconds": round(self.decoder.samples().size / float(TARGET_SAMPLE_RATE), 2),
+                "partialSeconds": round(self._partial_samples / float(TARGET_SAMPLE_RATE), 2),
+                "segments": len(self._segments),
+                "chunks": self.chunks,
+                "finished": self.finished,
+            }
+
+    def close(self, timeout=None):
+        """Stop accepting chunks, flush the decoder and return (samples, speech activity)."""
+        with self._lock:
+            self.finished = True
+            pending = self._pending
+        self.decoder.close()
+        if pending is not None:
+            # Wait for the in-flight partial and apply it here; its done-callback may not have run yet
+            pending[0].exception(timeout=timeout)
+            self._on_partial(*pending)
+        samples = self.decoder.samples()
+        return samples, detect_speech(samples, **self.vad_settings)
+
+    def transcript(self, timeout=None):
+        """
+        Final transcript of a closed stream. Engine errors are raised from here
+        (ASRQueueFullError when the pool is full).
+        """
+        samples = self.decoder.samples()
+        with self._lock:
+            offset = self._segment_start
+            segments = list(self._segments)
+            partial, partial_span = self._partial, self._partial_span
+
+        tail = samples[offset:]
+        tail_text = ""
+        if tail.size:
+            tail_activity = detect_speech(tail, **self.vad_settings)
+            span = (offset + tail_activity.start, offset + tail_activity.end)
+            if self._same_span(span, partial_span):
+                tail_text = partial
+            elif tail_activity.speech.any() or not segments:
+                tail_text = self.asr_pool.transcribe(tail_activity.trimmed, timeout=timeout)
+        texts = [f.result(timeout=timeout) for f in segments] + [tail_text]
+        return " ".join(t for t in texts if t)
+
+    def finish(self, timeout=None):
+        """close() and transcript() in one call: (samples, speech activity, final transcript)."""
+        samples, activity = self.close(timeout)
+        return samples, activity, self.transcript(timeout)
+
+
+class AudioStreamStore:
+    """
+    In-process registry of open streams. Streams idle for `ttl_seconds` (abandoned
+    recordings) are closed by a background sweep, which also stops their ffmpeg process.
+    Each webm stream holds an ffmpeg process and a reader thread, so at most
+    `max_streams` are open at once and at most `max_per_user` for one user_id.
+    """
+    def __init__(self, ttl_seconds=120, sweep_interval=None, max_streams=64, max_per_user=2):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval or max(1.0, ttl_seconds / 4.0)
+        self.max_streams = max_streams
+        self.max_per_user = max_per_user
+        self._streams = {}
+        self._opening = {}  # user_id -> streams being constructed (not yet in _streams)
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep, name="audio-stream-sweep", daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            self.evict_idle()
+
+    def _reserve(self, user_id):
+        with self._lock:
+            opening = sum(self._opening.values())
+            if len(self._streams) + opening >= self.max_streams:
+                raise TooManyStreamsError("Too many recordings in progress, please retry shortly", "server")
+            per_user = self._opening.get(user_id, 0) + sum(
+                1 for s in self._streams.values() if s.meta.get("user_id") == user_id
+            )
+            if user_id is not None and per_user >= self.max_per_user:
+                raise TooManyStreamsError("Too many recordings open for this user", "user")
+            self._opening[user_id] = self._opening.get(user_id, 0) + 1
+
+    def _release(self, user_id):
+        self._opening[user_id] -= 1
+        if not self._opening[user_id]:
+            del self._opening[user_id]
+
+    def open(self, *args, **kwargs):
+        """Start an AudioStream; raises TooManyStreamsError before spawning anything at a limit."""
+        user_id = kwargs.get("user_id")
+        self._reserve(user_id)
+        try:
+            stream = AudioStream(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._release(user_id)
+            raise
+        with self._lock:
+            self._release(user_id)
+            self._ensure_sweeper()
+            self._streams[stream.id] = stream
+        return stream
+
+    def get(self, stream_id):
+        with self._lock:
+            return self._streams.get(stream_id)
+
+    def pop(self, stream_id):
+        with self._lock:
+            return self._streams.pop(stream_id, None)
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [self._streams.pop(k) for k, s in list(self._streams.items()) if now - s.last_seen > self.ttl_seconds]
+        for stream in expired:
+            stream.decoder.close(timeout=1.0)
+        return len(expired)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._streams)
+
+
+audio_streams = AudioStreamStore(
+    ttl_seconds=Config.AUDIO_STREAM_TTL_SECONDS,
+    max_streams=Config.AUDIO_STREAM_MAX_OPEN,
+    max_per_user=Config.AUDIO_STREAM_MAX_OPEN_PER_USER
+)
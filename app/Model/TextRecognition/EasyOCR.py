@@ -1,14 +1,191 @@
-import easyocr
+import threading
+import time
+from concurrent.futures import Future
+
 import cv2
 import numpy as np
 
-def recognize_text_from_image(image):
+from app.Config.config import Config
+from app.Model.TextRecognition.preprocess import prepare_handwriting, PreprocessStats
+
+# Process-wide EasyOCR readers keyed by (languages, settings). Building a Reader loads
+# the CRAFT detector and the recogniser weights, so it is done once per configuration.
+# Readers are built outside _readers_lock; concurrent requests for a configuration that
+# is still being built wait on its entry in _building instead.
+_readers = {}
+_building = {}
+_readers_lock = threading.Lock()
+
+# Time spent in, and pixels removed by, the pre-OCR stage
+preprocess_stats = PreprocessStats()
+
+
+class _CachedReader:
+    __slots__ = ("reader", "lock", "last_used")
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.lock = threading.Lock()  # readtext is not documented as thread-safe
+        self.last_used = time.monotonic()
+
+
+def _reader_key(languages, settings):
+    return tuple(languages), tuple(sorted(settings.items()))
+
+
+def _evict(now, keep):
+    """Drop configurations idle for longer than OCR_READER_IDLE_SECONDS, then the least
+    recently used ones beyond OCR_READER_MAX_CONFIGS. Must be called with _readers_lock held."""
+    default_key = _reader_key(Config.OCR_LANGUAGES, {"gpu": Config.OCR_GPU})
+    for key in [k for k, c in _readers.items()
+                if k not in (keep, default_key) and now - c.last_used > Config.OCR_READER_IDLE_SECONDS]:
+        del _readers[key]
+    while len(_readers) > Config.OCR_READER_MAX_CONFIGS:
+        candidates = [k for k in _readers if k not in (keep, default_key)]
+        if not candidates:
+            break
+        del _readers[min(candidates, key=lambda k: _readers[k].last_used)]
+
+
+def get_reader(languages=None, **settings):
+    """
+    Return the shared easyocr.Reader for this language list and settings, creating it
+    on first use. The default configuration (Config.OCR_LANGUAGES) is never evicted.
+    """
+    languages = languages or Config.OCR_LANGUAGES
+    settings.setdefault("gpu", Config.OCR_GPU)
+    key = _reader_key(languages, settings)
+    with _readers_lock:
+        cached = _readers.get(key)
+        if cached is not None:
+            cached.last_used = time.monotonic()
+            _evict(cached.last_used, keep=key)
+            return cached
+        building = _building.get(key)
+        owner = building is None
+        if owner:
+            building = _building[key] = Future()
+    if not owner:
+        return building.result()  # Re-raises the builder's error
+
+    try:
+        import easyocr  # Imported lazily: it pulls in torch and is only needed for dysgraphia uploads
+
+        cached = _CachedReader(easyocr.Reader(list(languages), **settings))
+    except BaseException as e:
+        with _readers_lock:
+            del _building[key]
+        building.set_exception(e)
+        raise
+    with _readers_lock:
+        del _building[key]
+        _readers[key] = cached
+        cached.last_used = time.monotonic()
+        _evict(cached.last_used, keep=key)
+    building.set_result(cached)
+    return cached
+
+
+def preload_readers(configurations=None):
+    """Build readers ahead of the first upload; `configurations` is a list of (languages, settings)."""
+    for languages, settings in configurations or [(Config.OCR_LANGUAGES, {})]:
+        get_reader(languages, **settings)
+
+
+def loaded_reader_configs():
+    with _readers_lock:
+        return [{"languages": list(k[0]), "settings": dict(k[1])} for k in _readers]
+
+
+def prepare_for_ocr(img):
+    """Apply the configured pre-OCR stage (Config.OCR_PREPROCESS) and record its stats."""
+    if not Config.OCR_PREPROCESS:
+        return img
+    img, stats = prepare_handwriting(
+        img,
+        max_side=Config.OCR_MAX_SIDE,
+        grayscale=Config.OCR_GRAYSCALE,
+        binarize=Config.OCR_BINARIZE,
+        crop=Config.OCR_CROP
+    )
+    preprocess_stats.record(stats)
+    return img
+
+def recognize_text_from_image(image, languages=None, preprocess=True):
     npimg = np.frombuffer(image.read(), np.uint8)
     img = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
-        
-    # Initialize EasyOCR Reader for English (you can adjust languages as needed)
-    reader = easyocr.Reader(['en'])
+    if preprocess:
+        img = prepare_for_ocr(img)
+
+    # Shared EasyOCR Reader (English by default, see Config.OCR_LANGUAGES)
+    cached = get_reader(languages)
     # Run OCR on the image; detail=0 returns only the recognized text
-    result = reader.readtext(img, detail=0)
+    with cached.lock:
+        result = cached.reader.readtext(img, detail=0)
     recognized_text = " ".join(result)
-    return recognized_text
\ No newline at end of file
+    return recognized_text
+
+
+def benchmark_preprocessing(image_dir):
+    """
+    OCR every image in `image_dir` with and without the pre-OCR stage. When a sidecar
+    `<name>.txt` with the expected text exists, accuracy is the SequenceMatcher ratio
+    against it; otherwise the raw-image transcription is used as the reference.
+    """
+    import io
+    import os
+    from difflib import SequenceMatcher
+
+    get_reader()  # Exclude Reader construction from the timings
+    rows = []
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith((".png", ".jpg", ".jpeg", ".webp", ".bmp")):
+            continue
+        with open(os.path.join(image_dir, name), "rb") as f:
+            payload = f.read()
+        truth_path = os.path.join(image_dir, os.path.splitext(name)[0] + ".txt")
+        truth = open(truth_path).read().strip() if os.path.exists(truth_path) else None
+
+        row = {"image": name}
+        for label, preprocess in (("raw", False), ("prepared", True)):
+            start = time.perf_counter()
+            text = recognize_text_from_image(io.BytesIO(payload), preprocess=preprocess)
+            row[label] = {"ms": (time.perf_counter() - start) * 1000.0, "text": text}
+        reference = truth if truth is not None else row["raw"]["text"]
+        for label in ("raw", "prepared"):
+            row[label]["accuracy"] = SequenceMatcher(None, reference.lower(), row[label]["text"].lower()).ratio()
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    import io
+    import os
+    import sys
+
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        # Accuracy/latency of the pre-OCR stage over a directory of sample photos
+        results = benchmark_preprocessing(sys.argv[1])
+        for row in results:
+            print(f"{row['image']:30s} raw {row['raw']['ms']:7.0f} ms acc {row['raw']['accuracy']:.2f} | "
+                  f"prepared {row['prepared']['ms']:7.0f} ms acc {row['prepared']['accuracy']:.2f}")
+        print(preprocess_stats.snapshot())
+        sys.exit(0)
+
+    # Latency of the first (cold, builds the Reader) and steady-state dysgraphia request
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            payload = f.read()
+    else:
+        canvas = np.full((200, 900, 3), 255, dtype=np.uint8)
+        cv2.putText(canvas, "The quick brown fox", (20, 120), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (0, 0, 0), 4)
+        payload = cv2.imencode(".png", canvas)[1].tobytes()
+
+    timings = []
+    for _ in range(6):
+        start = time.perf_counter()
+        text = recognize_text_from_image(io.BytesIO(payload))
+        timings.append(time.perf_counter() - start)
+    print(f"recognized: {text!r}")
+    print(f"first request : {timings[0] * 1000:.0f} ms")
+    print(f"steady state  : {np.median(timings[1:]) * 1000:.0f} ms (median of {len(timings) - 1})")
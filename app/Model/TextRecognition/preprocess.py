@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+def _downscale(img, max_side):
+    h, w = img.shape[:2]
+    if not max_side or max(h, w) <= max_side:
+        return img
+    scale = max_side / float(max(h, w))
+    return cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def _paper_box(gray, min_area_ratio=0.2):
+    """Bounding box of the largest bright region (the sheet), or None if there is no clear one."""
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, bright = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(bright, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    if w * h < min_area_ratio * gray.shape[0] * gray.shape[1]:
+        return None
+    return x, y, x + w, y + h
+
+
+def _ink_box(binary, min_pixels=3):
+    """Bounding box of dark (ink) pixels after removing isolated specks, or None."""
+    ink = (binary == 0).astype(np.uint8)
+    ink = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+    rows = np.flatnonzero(ink.sum(axis=1) >= min_pixels)
+    cols = np.flatnonzero(ink.sum(axis=0) >= min_pixels)
+    if rows.size == 0 or cols.size == 0:
+        return None
+    return cols[0], rows[0], cols[-1] + 1, rows[-1] + 1
+
+
+def prepare_handwriting(img, max_side=1600, grayscale=True, binarize=False, crop=True,
+                        block_size=31, offset=15, padding=16):
+    """
+    Shrink a phone photo of handwriting before it reaches the OCR detector, whose cost
+    grows with pixel count:
+
+    1. downscale so the longest side is at most `max_side`
+    2. convert to grayscale
+    3. adaptive (Gaussian) binarisation with `block_size`/`offset`; it always locates the
+       ink for the crop, and is only returned as the image when `binarize` is set
+    4. crop to the sheet of paper, then to the ink inside it (plus `padding`)
+
+    Returns the prepared image and a stats dict with the time spent and the pixels removed.
+    """
+    started = time.perf_counter()
+    input_pixels = img.shape[0] * img.shape[1]
+
+    img = _downscale(img, max_side)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    binary = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, offset
+    )
+
+    out = binary if binarize else (gray if grayscale else img)
+    if crop:
+        paper = _paper_box(gray)
+        if paper is not None:
+            x0, y0, x1, y1 = paper
+            out, binary = out[y0:y1, x0:x1], binary[y0:y1, x0:x1]
+        ink = _ink_box(binary)
+        if ink is not None:
+            x0, y0, x1, y1 = ink
+            h, w = binary.shape
+            out = out[max(0, y0 - padding):min(h, y1 + padding), max(0, x0 - padding):min(w, x1 + padding)]
+
+    out = np.ascontiguousarray(out)
+    output_pixels = out.shape[0] * out.shape[1]
+    return out, {
+        "ms": (time.perf_counter() - started) * 1000.0,
+        "inputPixels": input_pixels,
+        "outputPixels": output_pixels,
+        "pixelsRemoved": input_pixels - output_pixels,
+    }
+
+
+class PreprocessStats:
+    """Running totals plus the last `window` pre-OCR stage results."""
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self.images = 0
+        self.total_ms = 0.0
+        self.total_input_pixels = 0
+        self.total_pixels_removed = 0
+        self._recent = deque(maxlen=window)
+
+    def record(self, stats):
+        with self._lock:
+            self.images += 1
+            self.total_ms += stats["ms"]
+            self.total_input_pixels += stats["inputPixels"]
+            self.total_pixels_removed += stats["pixelsRemoved"]
+            self._recent.append(stats)
+
+    def snapshot(self):
+        with self._lock:
+            recent = list(self._recent)
+            return {
+                "images": self.images,
+                "meanMs": round(self.total_ms / self.images, 3) if self.images else 0.0,
+                "pixelsRemoved": self.total_pixels_removed,
+                "removedRatio": round(self.total_pixels_removed / self.total_input_pixels, 4)
+                if self.total_input_pixels else 0.0,
+                "recentMeanMs": round(sum(s["ms"] for s in recent) / len(recent), 3) if recent else 0.0,
+            }
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal answer in the schema the system prompt asks for
+SAMPLE_RESPONSE = {
+    "studentProfile": {
+        "userID": "stub",
+        "name": "Test Student",
+        "age": 9,
+        "relationship": "Parent",
+        "preferredLearningStyle": ["Visual"],
+        "strengths": "Drawing",
+        "struggles": "Reading aloud",
+        "previousDiagnosis": "None",
+        "mainConcerns": "Slow reading",
+        "previousSupport": "None"
+    },
+    "learningDisabilities": {
+        "Dyslexia": {"confidenceScore": 0.7, "indicators": ["Letter reversals"]},
+        "Dysgraphia": {"confidenceScore": 0.4, "indicators": ["Irregular letter sizes"]}
+    },
+    "emotionAnalysis": {
+        "dominantEmotions": ["Neutral"],
+        "emotionOccurrences": {"Neutral": 10},
+        "graphData": [{"emotion": "Neutral", "count": 10}]
+    }
+}
+
+
+class StubGeminiServer:
+    """
+    Local stand-in for the Gemini streamGenerateContent endpoint. It streams a canned
+    answer as server-sent events in `chunks` pieces, `chunk_delay` seconds apart, and
+    counts requests and TCP connections so connection reuse and request coalescing can
+    be checked without network access. Point the app at it with GEMINI_BASE_URL.
+    """
+    def __init__(self, host="127.0.0.1", port=0, response=None, chunks=8, chunk_delay=0.05):
+        self.text = "```json\n" + json.dumps(response or SAMPLE_RESPONSE, indent=2) + "\n```"
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, so a pooled client reuses the socket
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.requests += 1
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                size = -(-len(stub.text) // stub.chunks)
+                for i in range(0, len(stub.text), size):
+                    event = {"candidates": [{
+                        "content": {"role": "model", "parts": [{"text": stub.text[i:i + size]}]}
+                    }]}
+                    self._write_chunk(f"data: {json.dumps(event)}\r\n\r\n".encode())
+                    time.sleep(stub.chunk_delay)
+                self._write_chunk(b"")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    # Sequential calls should share one connection; concurrent duplicate calls one request
+    import os
+    from app.Helpers.singleFlight import SingleFlight
+    from app.Model import LD_Identification
+
+    stub = StubGeminiServer().start()
+    os.environ["GEMINI_BASE_URL"] = stub.base_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    LD_Identification.reset_client()
+
+    for _ in range(5):
+        result = LD_Identification.identify("{}")
+    print(f"sequential: 5 calls -> {stub.requests} requests over {stub.connections} connection(s)")
+    assert result == SAMPLE_RESPONSE
+
+    flights = SingleFlight()
+    before = stub.requests
+    threads = [threading.Thread(target=flights.do, args=("user-1", LD_Identification.identify, "{}"))
+               for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"concurrent: 10 duplicate calls -> {stub.requests - before} request(s), {flights.stats()}")
+    stub.stop()
@@ -0,0 +1,177 @@
+import threading
+import time
+
+from app.Config.config import Config
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of heavy models. Each entry is loaded by its loader on first
+    use (or by a background warm-up thread) so importing the routes and serving
+    auth/Mongo-only endpoints never waits for torch, MediaPipe or OCR weights.
+    """
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._status = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+            self._status[name] = {"state": "pending"}
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+            self._status[name] = {"state": "loading"}
+            started = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._status[name] = {"state": "failed", "error": str(e)}
+                raise
+            self._models[name] = model
+            self._status[name] = {"state": "loaded", "loadSeconds": round(time.perf_counter() - started, 3)}
+            return model
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def peek(self, name):
+        """The model if it is already loaded, without triggering a load."""
+        return self._models.get(name)
+
+    def warm_up(self, names=None, background=True):
+        """Load `names` (default: every registered model), optionally in a daemon thread."""
+        names = list(names) if names else list(self._loaders)
+
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                    print(f"✅ Model '{name}' loaded")
+                except Exception as e:
+                    print(f"❌ Failed to load model '{name}': {e}")
+
+        if not background:
+            run()
+            return None
+        self._warmup_thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def status(self):
+        with self._lock:
+            return {name: dict(state) for name, state in self._status.items()}
+
+    def failed(self):
+        """Names of the models whose last load attempt raised."""
+        with self._lock:
+            return [name for name, state in self._status.items() if state["state"] == "failed"]
+
+    def ready(self, names=None):
+        """True once every model in `names` (default: every registered model) is loaded."""
+        names = list(self._loaders) if names is None else names
+        return all(name in self._models for name in names)
+
+
+models = ModelRegistry()
+
+
+def _load_fer_models():
+    from app.Model.EmotionDetection.model import load_backbone, load_lstm
+
+    backbone, lstm = load_backbone(), load_lstm()
+    if Config.FER_BACKEND == "onnx":
+        from app.Model.EmotionDetection.onnx_backend import load_onnx_models
+        return load_onnx_models(backbone, lstm, Config.FER_ONNX_DIR, Config.FER_ONNX_THREADS)
+    from app.Model.EmotionDetection.optimize import build_inference_models
+    return build_inference_models(backbone, lstm, mode=Config.FER_INFERENCE_MODE)
+
+
+def _load_fer_batcher():
+    from app.Model.EmotionDetection.batching import InferenceBatcher
+    from app.Model.EmotionDetection.session import SessionStore
+
+    backbone, lstm = models.get("fer_models")
+    # Batches face crops from concurrent requests into one ResNet50 + LSTM forward
+    return InferenceBatcher(
+        backbone,
+        lstm,
+        max_batch_size=Config.FER_MAX_BATCH_SIZE,
+        max_wait_ms=Config.FER_MAX_WAIT_MS,
+        sessions=SessionStore(window=10, ttl_seconds=Config.FER_SESSION_TTL_SECONDS),
+        anchor_interval=Config.FER_STATE_ANCHOR_INTERVAL,
+        timeout_s=Config.FER_INFER_TIMEOUT_SECONDS
+    )
+
+
+def _load_face_mesh_pool():
+    from app.Model.EmotionDetection.face_mesh_pool import FaceMeshPool
+
+    return FaceMeshPool(size=Config.FACE_MESH_POOL_SIZE)
+
+
+def _load_ocr_reader():
+    from app.Model.TextRecognition.EasyOCR import get_reader
+
+    return get_reader(Config.OCR_LANGUAGES)
+
+
+def _load_asr_pool():
+    from app.Model.SpeechRecognition.engines import create_engine
+    from app.Model.SpeechRecognition.pool import ASRPool
+
+    return ASRPool(
+        create_engine(Config.ASR_ENGINE),
+        workers=Config.ASR_WORKERS,
+        max_batch_size=Config.ASR_MAX_BATCH_SIZE,
+        max_wait_ms=Config.ASR_MAX_WAIT_MS,
+        max_queued=Config.ASR_MAX_QUEUED,
+        max_queued_partials=Config.ASR_MAX_QUEUED_PARTIALS
+    )
+
+
+models.register("fer_models", _load_fer_models)
+models.register("fer_batcher", _load_fer_batcher)
+models.register("face_mesh_pool", _load_face_mesh_pool)
+models.register("ocr_reader", _load_ocr_reader)
+models.register("asr_pool", _load_asr_pool)
+
+
+def measure_cold_start(runs=3):
+    """
+    Startup benchmark: time, in fresh interpreters, from process start until
+    create_app() returns (the app can serve /login) and until every registered
+    model has finished loading.
+    """
+    import subprocess
+    import sys
+
+    script = (
+        "import time; t0 = time.perf_counter()\n"
+        "from app.Config.config import Config; Config.MODEL_WARMUP = False\n"
+        "from app import create_app; create_app(); t1 = time.perf_counter()\n"
+        "from app.Model.registry import models; models.warm_up(background=False); t2 = time.perf_counter()\n"
+        "print(t1 - t0, t2 - t0)\n"
+    )
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        app_ready, models_ready = map(float, out.stdout.strip().splitlines()[-1].split())
+        results.append({"appReadySeconds": app_ready, "modelsReadySeconds": models_ready})
+    return results
+
+
+if __name__ == "__main__":
+    for i, run in enumerate(measure_cold_start(), 1):
+        print(f"run {i}: app ready in {run['appReadySeconds']:.2f}s, all models loaded in {run['modelsReadySeconds']:.2f}s")
@@ -1,9 +1,37 @@
+import threading
 from flask import Flask
 from pymongo import MongoClient
 from flask_cors import CORS
 from app.Config.config import Config  # Corrected import path
+from app.Model.registry import models
+from app.Helpers.indexHelper import ensure_indexes
 from .routes import main, user  # Import the new user route
 
+def check_mongo(db, status, create_indexes=False):
+    # Runs in the background so a slow or unreachable MongoDB does not delay startup
+    try:
+        # Attempt to list collections to verify connection
+        db.list_collection_names()
+        status.update({"state": "connected"})
+        print("MongoDB connection successful")
+    except Exception as e:
+        status.update({"state": "failed", "error": str(e)})
+        print(f"MongoDB connection failed: {e}")
+        return
+
+    if create_indexes:
+        # Idempotent; also available as `python -m app.Helpers.indexHelper ensure`
+        try:
+            rows = ensure_indexes(db)
+            status["indexes"] = rows
+            for row in rows:
+                if row["status"] == "created":
+                    print(f"✅ Created index {row['collection']}.{','.join(row['keys'])}")
+                elif row["status"] == "failed":
+                    print(f"❌ Index {row['collection']}.{','.join(row['keys'])} could not be created: {row['error']}")
+        except Exception as e:
+            print(f"❌ Index bootstrap failed: {e}")
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
@@ -13,17 +41,21 @@ def create_app():
     db = client[app.config['MONGO_DBNAME']]
 
     # Test MongoDB connection
-    try:
-        # Attempt to list collections to verify connection
-        db.list_collection_names()
-        print("MongoDB connection successful")
-    except Exception as e:
-        print(f"MongoDB connection failed: {e}")
+    app.extensions['mongo_status'] = {"state": "checking"}
+    threading.Thread(
+        target=check_mongo,
+        args=(db, app.extensions['mongo_status'], app.config['MONGO_ENSURE_INDEXES']),
+        daemon=True
+    ).start()
 
     CORS(app)  # Enable cross-origin requests
     
     # Register Blueprints
     app.register_blueprint(main.bp)
     app.register_blueprint(user.bp_user)  # Register the new user blueprint
+
+    # Load models in the background; routes that need one before it is ready load it on demand
+    if app.config['MODEL_WARMUP']:
+        models.warm_up(app.config['MODEL_WARMUP_NAMES'], background=True)
     
     return app
\ No newline at end of file
@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.Helpers.userHelper import login, signup  # Corrected import path
+from app.Model.registry import models
+from app.Config.config import Config
 
 bp = Blueprint('main', __name__)
 
@@ -28,4 +30,22 @@ def signup_route():
         return jsonify(response)
     except Exception as e:
         print(f"Error in signup: {str(e)}")  # Log the error
-        return jsonify({"message": "Server error"}), 500
\ No newline at end of file
+        return jsonify({"message": "Server error"}), 500
+
+@bp.route('/ready', methods=['GET'])
+def readiness_route():
+    """
+    Readiness probe: reports which models are loaded and whether MongoDB answered.
+    Returns 503 until MongoDB and the Config.READY_REQUIRED_MODELS are ready; optional
+    models that failed to load are listed under "failed". Auth routes are served regardless.
+    """
+    mongo = current_app.extensions.get('mongo_status', {"state": "unknown"})
+    model_status = models.status()
+    ready = models.ready(Config.READY_REQUIRED_MODELS) and mongo.get("state") == "connected"
+    return jsonify({
+        "ready": ready,
+        "mongo": mongo,
+        "models": model_status,
+        "required": Config.READY_REQUIRED_MODELS,
+        "failed": models.failed()
+    }), (200 if ready else 503)
\ No newline at end of file
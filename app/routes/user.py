@@ -1,33 +1,31 @@
 import os
 import cv2
 import numpy as np
-import torch
 import base64
 import tempfile
-import speech_recognition as sr
-import mediapipe as mp
-from flask import Blueprint, json, request, jsonify, current_app
-from PIL import Image
+from flask import Blueprint, json, request, jsonify, Response, stream_with_context
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from difflib import SequenceMatcher
-import base64
-import tempfile
-import subprocess
-import speech_recognition as sr
-from flask import Blueprint, request, jsonify
-from datetime import datetime
-from werkzeug.utils import secure_filename
-from json import JSONDecodeError
-from collections import Counter
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Import project-specific modules
-from app.Model.EmotionDetection.model import pth_backbone_model, pth_LSTM_model
-from app.Model.EmotionDetection.utlis import pth_processing, norm_coordinates, get_box
+# Heavy models (torch, MediaPipe, EasyOCR) are loaded on first use through the registry
+from app.Model.registry import models
 from app.Model.TextRecognition.EasyOCR import recognize_text_from_image  
-from app.Model.LD_Identification import identify
-from app.Helpers.userHelper import check_diagnosed, check_assessed, HistoryAssesment, add_dysgraphia_image_data,add_dylexia_data,get_user_assessment_data,save_model_response,get_assessment_result  
+from app.Model.SpeechRecognition.audio import load_audio, persist_async, audio_stats, AudioDecodeError
+from app.Model.SpeechRecognition.pool import ASRQueueFullError
+from app.Model.SpeechRecognition.fluency import detect_speech, fluency_features
+from app.Model.SpeechRecognition.streaming import audio_streams, TooManyStreamsError
+from app.Helpers.userHelper import check_diagnosed, check_assessed, HistoryAssesment, add_dysgraphia_image_data,add_dylexia_data,get_assessment_result,add_tasks_bulk,TASK_COLLECTIONS  
+from app.Helpers.diagnosisHelper import run_ld_identification, stream_ld_identification, ld_flights
+from app.Helpers.speculativeHelper import speculative_diagnosis
+from app.Helpers.jobHelper import ld_jobs, QueueFullError
+from app.Helpers.cacheHelper import ld_result_cache
+from app.Helpers.emotionHelper import emotion_store, ANONYMOUS_SESSION
+from app.Helpers.telemetryHelper import emotion_telemetry
 from app.Model.RL.rl_agent import EmotionRLAgent
+from app.Config.config import Config
 
 
 # Initialize Flask Blueprint
@@ -56,12 +54,8 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Initialize Face Mesh
-mp_face_mesh = mp.solutions.face_mesh
 DICT_EMO = {0: 'Neutral', 1: 'Happiness', 2: 'Sadness', 3: 'Surprise', 4: 'Fear', 5: 'Disgust', 6: 'Anger'}
 
-emotion_history = []  # Fixed typo from `emotion_hitsory`
-
 ### 📌 **Face Detection Route**
 @bp_user.route('/users/facedetection', methods=['POST'])
 def face_detection_route(): 
@@ -69,45 +63,84 @@ def face_detection_route():
         if 'image' not in request.files:
             return jsonify({"message": "No image file provided"}), 400
 
+        from app.Model.EmotionDetection.utlis import get_box
+
+        face_mesh_pool = models.get("face_mesh_pool")
+        fer_batcher = models.get("fer_batcher")
+
         file = request.files['image']
+        session_id = request.form.get('userID') or None
         npimg = np.frombuffer(file.read(), np.uint8)
         img = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         h, w, _ = img.shape
 
-        with mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5) as face_mesh:
-
+        with face_mesh_pool.acquire(session_id) as face_mesh:
             results = face_mesh.process(img_rgb)
-            if results.multi_face_landmarks:
-                for fl in results.multi_face_landmarks:
-                    startX, startY, endX, endY = get_box(fl, w, h)
-                    cur_face = img_rgb[startY:endY, startX:endX]
-                    cur_face = pth_processing(Image.fromarray(cur_face))
-
-                    features = torch.nn.functional.relu(
-                        pth_backbone_model.extract_features(cur_face)
-                    ).detach().numpy()
-
-                    lstm_features = [features] * 10
-                    lstm_f = torch.from_numpy(np.vstack(lstm_features))
-                    lstm_f = torch.unsqueeze(lstm_f, 0)
-
-                    output = pth_LSTM_model(lstm_f).detach().numpy()
-                    cl = np.argmax(output)
-                    label = DICT_EMO[cl]
-
-                    emotion_history.append(label)
-                    return jsonify({
-                        "emotion": label,
-                        "confidence": float(output[0][cl]),
-                        "box": [int(startX), int(startY), int(endX), int(endY)]
-                    })
-            else:
-                return jsonify({"message": "No face detected"}), 400
+
+        if results.multi_face_landmarks:
+            for fl in results.multi_face_landmarks:
+                startX, startY, endX, endY = get_box(fl, w, h, margin=Config.FER_BOX_MARGIN)
+                cur_face = img[startY:endY, startX:endX]
+
+                try:
+                    output = fer_batcher.infer(cur_face, session_id=session_id)
+                except FutureTimeoutError:
+                    return jsonify({"message": "Emotion detection is busy, please retry"}), 503
+                cl = int(np.argmax(output))
+                label = DICT_EMO[cl]
+
+                confidence = float(output[cl])
+                box = [int(startX), int(startY), int(endX), int(endY)]
+                emotion_store.append(session_id or ANONYMOUS_SESSION, label, confidence)
+                # Buffered; written to MongoDB in batches off the request path
+                emotion_telemetry.record(session_id or ANONYMOUS_SESSION, label, confidence, box)
+                return jsonify({
+                    "emotion": label,
+                    "confidence": confidence,
+                    "box": box
+                })
+        else:
+            return jsonify({"message": "No face detected"}), 400
+    except Exception as e:
+        return jsonify({"message": f"Server error: {str(e)}"}), 500
+
+@bp_user.route('/users/facedetection/stats', methods=['GET'])
+def face_detection_stats_route():
+    """
+    Batch-size and queue-wait statistics of the face-emotion inference batcher,
+    used to tune FER_MAX_BATCH_SIZE / FER_MAX_WAIT_MS for the deployment nodes.
+    """
+    fer_batcher = models.peek("fer_batcher")
+    face_mesh_pool = models.peek("face_mesh_pool")
+    stats = {
+        "backend": Config.FER_BACKEND,
+        "inferenceMode": Config.FER_INFERENCE_MODE,
+        "maxBatchSize": Config.FER_MAX_BATCH_SIZE,
+        "maxWaitMs": Config.FER_MAX_WAIT_MS,
+        "loaded": fer_batcher is not None
+    }
+    if fer_batcher is not None:
+        stats.update({"activeSessions": len(fer_batcher.sessions), **fer_batcher.stats.snapshot()})
+    if face_mesh_pool is not None:
+        stats["faceMesh"] = {"poolSize": face_mesh_pool.size, **face_mesh_pool.stats.snapshot()}
+    stats["emotionStore"] = emotion_store.stats()
+    stats["telemetry"] = emotion_telemetry.stats()
+    return jsonify(stats)
+
+@bp_user.route('/users/emotions/aggregates', methods=['GET'])
+def emotion_aggregates_route():
+    """
+    Windowed emotion aggregates of one student (query parameter userID): per window the
+    label counts, dominant emotion, mean and EMA of confidence. Windows are configured in
+    Config.EMOTION_WINDOWS and updated on every detection, so polling is cheap.
+    """
+    session_id = request.args.get('userID') or ANONYMOUS_SESSION
+    try:
+        return jsonify({
+            "userID": session_id,
+            "windows": emotion_store.aggregates(session_id)
+        })
     except Exception as e:
         return jsonify({"message": f"Server error: {str(e)}"}), 500
 
@@ -128,6 +161,12 @@ def check_assessed_route(user_id):
     except Exception as e:
         return jsonify({"message": "Server error", "isAssessed": False}), 500
 
+@bp_user.route('/users/dysgraphia_image/stats', methods=['GET'])
+def dysgraphia_image_stats_route():
+    from app.Model.TextRecognition.EasyOCR import preprocess_stats, loaded_reader_configs
+
+    return jsonify({"preprocess": preprocess_stats.snapshot(), "readers": loaded_reader_configs()})
+
 ### 📌 **Dysgraphia Image Processing**
 @bp_user.route('/users/dysgraphia_image', methods=['POST'])
 def dysgraphia_image():
@@ -135,41 +174,74 @@ def dysgraphia_image():
         if 'image' not in request.files:
             return jsonify({'status': 'error', 'message': 'No image file provided'}), 400
 
-        image = request.files['image']
-        task = request.form.get('task')
-        text = request.form.get('text')
+        # Several images may be sent at once, each with its own task/text field (same order)
+        images = request.files.getlist('image')
+        tasks = request.form.getlist('task')
+        texts = request.form.getlist('text')
         user_id = request.form.get('user_id')
 
-        if not image or not task:
+        if not images or len(tasks) != len(images) or not all(images) or not all(tasks):
             return jsonify({'status': 'error', 'message': 'Missing required fields'}), 400
-
-        recognized_text = recognize_text_from_image(image)
-        print(recognized_text)
-
-        writing_data = {
-            "writingTasks": [
-                {
-                    "task": task,
-                    "originalText": text,
-                    "recognizedText": recognized_text,
-                    "timestamp": datetime.now().isoformat()
-                }
-            ]
-        }
+        texts += [None] * (len(images) - len(texts))
+
+        writing_tasks = []
+        for image, task, text in zip(images, tasks, texts):
+            recognized_text = recognize_text_from_image(image)
+            print(recognized_text)
+            writing_tasks.append({
+                "task": task,
+                "originalText": text,
+                "recognizedText": recognized_text,
+                "timestamp": datetime.now().isoformat()
+            })
+
+        writing_data = {"writingTasks": writing_tasks}
         print(f"\n\n\n Writing Data: {writing_data}")
+        # All tasks of the request are appended in one upsert
         response = add_dysgraphia_image_data(writing_data, user_id)
+        if response.get("status"):
+            speculative_diagnosis.notify(user_id)
 
-        return jsonify({
+        result = {
             'status': 'success',
             'message': 'Image processed successfully',
-            'task': task,
-            'recognized_text': recognized_text
-        })
+            'task': writing_tasks[0]["task"],
+            'recognized_text': writing_tasks[0]["recognizedText"]
+        }
+        if len(writing_tasks) > 1:
+            result['tasks'] = [{'task': t["task"], 'recognized_text': t["recognizedText"]} for t in writing_tasks]
+        return jsonify(result)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
 
+@bp_user.route('/users/tasks/bulk', methods=['POST'])
+def bulk_tasks_route():
+    """
+    Append already-processed tasks for one or more students, e.g. when importing results.
+    Body: {"items": [{"userID": "...", "writingTasks": [...], "audioTask": [...]}, ...]}.
+    Each task collection is written with a single bulk_write.
+    """
+    try:
+        items = (request.get_json(silent=True) or {}).get("items")
+        if not isinstance(items, list) or not all(isinstance(i, dict) and i.get("userID") for i in items):
+            return jsonify({"status": False, "message": "items must be a list of objects with a userID"}), 400
+
+        written = {}
+        for field in TASK_COLLECTIONS:
+            entries = [(i["userID"], i[field]) for i in items if isinstance(i.get(field), list) and i[field]]
+            if entries:
+                written[field] = add_tasks_bulk(field, entries)
+
+        for user_id in {i["userID"] for i in items}:
+            speculative_diagnosis.notify(user_id)
+        return jsonify({"status": True, "written": written})
+    except Exception as e:
+        print(f"❌ Error in bulk task ingestion: {str(e)}")
+        return jsonify({"status": False, "message": f"Error adding tasks: {str(e)}"}), 500
+
+
 # Configure upload folder and allowed extensions
 UPLOAD_FOLDER = 'static/uploads/audio'
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'webm'}
@@ -181,47 +253,47 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Convert WEBM to WAV using FFmpeg
-def convert_to_wav(input_path, output_path):
-    if not os.path.exists(input_path):
-        print(f"❌ Error: Input file not found at {input_path}")
-        return False
-
-    ffmpeg_path = "C:/ffmpeg/bin/ffmpeg.exe"  # 🔹 Update this with your FFmpeg path
-    command = [
-        ffmpeg_path, "-y", "-i", input_path, "-acodec", "pcm_s16le",
-        "-ar", "16000", "-ac", "1", output_path
-    ]
-
-    try:
-        subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        print("✅ Conversion successful!")
-        return True
-    except Exception as e:
-        print(f"❌ Error converting file: {e}")
-        return False
-
-
-# Transcribe audio using Google Speech Recognition
-def transcribe_audio(file_path):
-    recognizer = sr.Recognizer()
+# Transcribe a 16 kHz mono buffer with the configured ASR engine (Config.ASR_ENGINE)
+def transcribe_audio(samples):
     try:
-        print(f"Transcribing audio file: {file_path}")
-        with sr.AudioFile(file_path) as source:
-            audio_data = recognizer.record(source)
-
-        print("Sending audio to Google Speech Recognition...")
-        text = recognizer.recognize_google(audio_data)
+        # Engine is loaded once per process; the pool batches concurrent recordings
+        text = models.get("asr_pool").transcribe(samples)
         print(f"\n\n\n Transcription successful: {text}")
-        print(f"\n\n\n Emotion History: {emotion_history}")
         return text
-    except sr.UnknownValueError:
-        return "Google Speech Recognition could not understand the audio."
-    except sr.RequestError as e:
-        return f"Could not request results from Google Speech Recognition service; {e}"
+    except ASRQueueFullError:
+        raise
     except Exception as e:
         return f"Error transcribing audio: {str(e)}"
 
+# Store one read-aloud answer (transcript, emotions, fluency features) for the student
+def save_audio_task(user_id, question, activity, transcription):
+    # Reading-fluency features from the same VAD pass, stored with the task
+    fluency = fluency_features(activity, transcription, question, min_pause_ms=Config.AUDIO_MIN_PAUSE_MS)
+    emotions = [e["emotion"] for e in emotion_store.recent(user_id or ANONYMOUS_SESSION, 10)]
+
+    audio_data = {
+        "audioTask": [
+            {
+                "originalText": question,
+                "recognizedText": transcription,
+                "timestamp": datetime.now().isoformat(),
+                "emotions": emotions,
+                "fluency": fluency
+            }
+        ]
+    }
+    print(f"\n\n\n Audio Data: {audio_data}")
+
+    response = add_dylexia_data(audio_data, user_id)
+    if response.get("status"):
+        speculative_diagnosis.notify(user_id)
+    return fluency
+
+@bp_user.route('/users/dyslexia_audio/stats', methods=['GET'])
+def dyslexia_audio_stats():
+    asr_pool = models.peek("asr_pool")
+    return jsonify({"stages": audio_stats.snapshot(), "asr": asr_pool.stats() if asr_pool is not None else None})
+
 # API Route for processing audio
 @bp_user.route('/users/dyslexia_audio', methods=['POST'])
 def process_audio():
@@ -252,60 +324,168 @@ def process_audio():
         return jsonify({'error': 'No audio file selected'}), 400
 
     if allowed_file(audio_file.filename):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = secure_filename(f"{timestamp}_{audio_file.filename}")
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-
-        # Save the uploaded file
-        audio_file.save(file_path)
-        print(f"✅ File saved at: {file_path}")
-
-        # If file is WEBM, convert to WAV
-        if file_path.endswith('.webm'):
-            converted_path = file_path.replace(".webm", ".wav")
-            print("🔄 Converting WEBM to WAV...")
-            if convert_to_wav(file_path, converted_path):
-                file_path = converted_path
-            else:
-                return jsonify({'error': 'Failed to convert WebM to WAV'}), 500
+        payload = audio_file.read()
+        filename = file_path = None
+        if Config.AUDIO_PERSIST_UPLOADS:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = secure_filename(f"{timestamp}_{audio_file.filename}")
+            file_path = os.path.join(UPLOAD_FOLDER, filename)
+            # Keep the original for later review without delaying the response
+            persist_async(payload, file_path)
+
+        # Decode (WAV in-process, anything else through a piped ffmpeg) and resample to 16 kHz mono
+        try:
+            clip = load_audio(payload)
+        except AudioDecodeError as e:
+            print(f"❌ Error decoding audio: {e}")
+            return jsonify({'error': 'Failed to decode audio'}), 500
+
+        # Energy VAD: only the speech span (without leading/trailing silence) goes to ASR
+        vad_started = time.perf_counter()
+        activity = detect_speech(
+            clip.samples,
+            threshold_db=Config.AUDIO_VAD_THRESHOLD_DB,
+            pad_ms=Config.AUDIO_VAD_PAD_MS
+        )
+        vad_ms = (time.perf_counter() - vad_started) * 1000.0
 
         # Transcribe the audio
-        transcription = transcribe_audio(file_path)
+        asr_started = time.perf_counter()
+        try:
+            transcription = transcribe_audio(activity.trimmed if Config.AUDIO_VAD_TRIM else clip.samples)
+        except ASRQueueFullError as e:
+            return jsonify({'error': str(e)}), 503
+        asr_ms = (time.perf_counter() - asr_started) * 1000.0
 
-        emotions = emotion_history[-10:]
+        timings = dict(clip.timings, vadMs=vad_ms, asrMs=asr_ms)
+        audio_stats.record(timings)
+        print(f"⏱️ Audio stages: {', '.join(f'{k} {v:.0f}' for k, v in timings.items())}")
 
-
-        audio_data = {
-            "audioTask": [
-                {
-                    "originalText": question,
-                    "recognizedText": transcription,
-                    "timestamp": datetime.now().isoformat(),
-                    "emotions": emotions
-                }
-            ]
-        }
-        print(f"\n\n\n Audio Data: {audio_data}")
-    
-        response = add_dylexia_data(audio_data, user_id)
+        fluency = save_audio_task(user_id, question, activity, transcription)
 
         return jsonify({
             'success': True,
             'filename': filename,
             'file_path': file_path,
             'transcription': transcription,
-            'expected': sentence
+            'expected': sentence,
+            'fluency': fluency
         })
 
     print("❌ Invalid file format")
     return jsonify({'error': 'Invalid file format'}), 400
 
+@bp_user.route('/users/dyslexia_audio/stream', methods=['POST'])
+def open_audio_stream():
+    """
+    Start a streamed recording. Chunks are then POSTed to
+    /users/dyslexia_audio/stream/<id>/chunk while the student is still reading;
+    GET /users/dyslexia_audio/stream/<id> returns the partial transcript, and
+    POST .../finish returns the same result as /users/dyslexia_audio.
+    `format` is "webm" (MediaRecorder chunks, decoded by ffmpeg) or "pcm16"
+    (raw 16-bit mono PCM at `sampleRate`).
+    """
+    data = request.get_json(silent=True) or request.form
+    user_id = data.get('userID')
+    if not user_id:
+        return jsonify({'error': 'No user ID provided'}), 400
+    try:
+        asr_pool = models.get("asr_pool")
+    except Exception as e:
+        print(f"❌ Speech recognition unavailable: {e}")
+        return jsonify({'error': 'Speech recognition is unavailable'}), 503
+    try:
+        stream = audio_streams.open(
+            asr_pool,
+            fmt=data.get('format', 'webm'),
+            sample_rate=int(data.get('sampleRate', 16000)),
+            partial_interval=Config.AUDIO_STREAM_PARTIAL_INTERVAL_SECONDS,
+            vad_settings={"threshold_db": Config.AUDIO_VAD_THRESHOLD_DB, "pad_ms": Config.AUDIO_VAD_PAD_MS},
+            segment_pause_ms=Config.AUDIO_STREAM_SEGMENT_PAUSE_MS,
+            keep_original=Config.AUDIO_PERSIST_UPLOADS,
+            user_id=user_id,
+            question=data.get('question', 'Unknown question')
+        )
+    except TooManyStreamsError as e:
+        return jsonify({'error': str(e)}), (429 if e.scope == "user" else 503)
+    except (ValueError, AudioDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'streamId': stream.id}), 201
+
+@bp_user.route('/users/dyslexia_audio/stream/<stream_id>/chunk', methods=['POST'])
+def audio_stream_chunk(stream_id):
+    stream = audio_streams.get(stream_id)
+    if stream is None:
+        return jsonify({'error': 'Stream not found'}), 404
+    try:
+        stream.feed(request.get_data())
+    except AudioDecodeError as e:
+        print(f"❌ Error decoding audio stream: {e}")
+        return jsonify({'error': 'Failed to decode audio'}), 500
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(stream.status())
+
+@bp_user.route('/users/dyslexia_audio/stream/<stream_id>', methods=['GET'])
+def audio_stream_status(stream_id):
+    stream = audio_streams.get(stream_id)
+    if stream is None:
+        return jsonify({'error': 'Stream not found'}), 404
+    return jsonify(stream.status())
+
+@bp_user.route('/users/dyslexia_audio/stream/<stream_id>/finish', methods=['POST'])
+def finish_audio_stream(stream_id):
+    stream = audio_streams.pop(stream_id)
+    if stream is None:
+        return jsonify({'error': 'Stream not found'}), 404
+
+    started = time.perf_counter()
+    timeout = Config.AUDIO_STREAM_FINISH_TIMEOUT_SECONDS
+    try:
+        samples, activity = stream.close(timeout)
+    except AudioDecodeError as e:
+        print(f"❌ Error decoding audio stream: {e}")
+        return jsonify({'error': 'Failed to decode audio'}), 500
+    except FutureTimeoutError:
+        return jsonify({'error': 'Transcription timed out, please retry'}), 503
+    try:
+        transcription = stream.transcript(timeout)
+        print(f"\n\n\n Transcription successful: {transcription}")
+    except ASRQueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except FutureTimeoutError:
+        return jsonify({'error': 'Transcription timed out, please retry'}), 503
+    except Exception as e:
+        # Same as transcribe_audio: the task is still stored, with the error as its transcript
+        transcription = f"Error transcribing audio: {str(e)}"
+    audio_stats.record({"streamFinishMs": (time.perf_counter() - started) * 1000.0})
+
+    filename = file_path = None
+    if stream.original is not None:
+        extension = 'webm' if stream.format == 'webm' else 'pcm'
+        filename = secure_filename(f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_stream_{stream.id[:8]}.{extension}")
+        file_path = os.path.join(UPLOAD_FOLDER, filename)
+        persist_async(stream.original, file_path)
+
+    question = stream.meta['question']
+    fluency = save_audio_task(stream.meta['user_id'], question, activity, transcription)
+    return jsonify({
+        'success': True,
+        'filename': filename,
+        'file_path': file_path,
+        'transcription': transcription,
+        'expected': question,
+        'fluency': fluency
+    })
+
 @bp_user.route('/users/submitassesment', methods=['POST'])
 def submit_assesment_route():
     try:
         data = request.get_json()
         response = HistoryAssesment(data)
         print(f"\n\n response : {response} ")
+        if isinstance(response, dict) and response.get("status"):
+            speculative_diagnosis.notify(data.get("userId"))
         return jsonify(response)
     except Exception as e:
         return jsonify({"message": "Server error"}), 500
@@ -327,63 +507,86 @@ def ld_identification():
         print("❌ No user ID provided!")
         return jsonify({'error': 'No user ID provided'}), 400
 
-    assessment_data = get_user_assessment_data(user_id)
-    if not assessment_data:
-        print("❌ No assessment data found for user")
-        return jsonify({'error': 'No assessment data found'}), 404
+    # "refresh": true skips the result cache and asks the model for a fresh diagnosis
+    response, status_code = run_ld_identification(user_id, refresh=bool(data.get('refresh')))
+    return jsonify(response), status_code
+
+@bp_user.route('/users/ld_identification/stream', methods=['GET', 'POST'])
+def stream_ld_identification_route():
+    """
+    Server-sent events version of /users/ld_identification: each section of the answer
+    is pushed as soon as the model has finished generating it.
+    GET takes ?userID=...&refresh=1 (for EventSource); POST takes the usual JSON body.
+    """
+    if request.method == 'GET':
+        user_id = request.args.get('userID')
+        refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    else:
+        data = request.get_json(silent=True) or {}
+        user_id = data.get('userID')
+        refresh = bool(data.get('refresh'))
+    if not user_id:
+        return jsonify({'error': 'No user ID provided'}), 400
+
+    def events():
+        for event, payload in stream_ld_identification(user_id, refresh=refresh):
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        # Disable proxy buffering so every event reaches the client as it is produced
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp_user.route('/users/ld_identification/jobs', methods=['POST'])
+def submit_ld_identification_job():
+    """
+    Queue a learning-disability identification and return its job id immediately.
+    Poll GET /users/ld_identification/jobs/<job_id> for status and progress.
+    """
+    data = request.get_json(silent=True)
+    if not data or not data.get('userID'):
+        return jsonify({'error': 'No user ID provided'}), 400
 
-    print(f"📊 Assessment Data: {assessment_data}")
     try:
-        assessment_json_str = json.dumps(assessment_data)
-    except TypeError as e:
-        print(f"❌ JSON Serialize Error: {e}")
-        return jsonify({'error': 'Assessment data contains non-serializable values'}), 500
+        job_id = ld_jobs.submit(data['userID'], refresh=bool(data.get('refresh')))
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 429
+    except Exception as e:
+        print(f"❌ Failed to queue identification job: {e}")
+        return jsonify({'error': 'Failed to queue identification job'}), 500
+    return jsonify({'jobId': job_id, 'status': 'queued'}), 202
 
-    # Call AI model for learning disability analysis
+@bp_user.route('/users/ld_identification/jobs/<job_id>', methods=['GET'])
+def ld_identification_job_status(job_id):
     try:
-        model_response = identify(assessment_json_str)
-        
-        print("\n=== Model Response Debug ===")
-        print(f"🔍 Response Type: {type(model_response)}")
-        print(f"📝 Raw Response: {repr(model_response)[:200]}...")  # Show first 200 chars
-        
-        # Transform JSON into a structured MongoDB document
-        Data = {
-            "userID": user_id,
-            "name": model_response["studentProfile"]["name"],
-            "age": model_response["studentProfile"]["age"],
-            "relationship": model_response["studentProfile"]["relationship"],
-            "preferredLearningStyle": model_response["studentProfile"]["preferredLearningStyle"],
-            "strengths": model_response["studentProfile"]["strengths"],
-            "struggles": model_response["studentProfile"]["struggles"],
-            "previousDiagnosis": model_response["studentProfile"]["previousDiagnosis"],
-            "mainConcerns": model_response["studentProfile"]["mainConcerns"],
-            "previousSupport": model_response["studentProfile"]["previousSupport"],
-            "learningDisabilities": [
-                {
-                    "type": key,
-                    "confidenceScore": model_response["learningDisabilities"][key]["confidenceScore"],
-                    "indicators": model_response["learningDisabilities"][key]["indicators"]
-                } for key in model_response["learningDisabilities"]
-            ],
-            "emotionAnalysis": {
-                "dominantEmotions": model_response["emotionAnalysis"]["dominantEmotions"],
-                "emotionOccurrences": model_response["emotionAnalysis"]["emotionOccurrences"],
-                "graphData": model_response["emotionAnalysis"]["graphData"]
-            }
-        }
-      
-        # Save the model response to MongoDB
-        response = save_model_response(user_id, Data)
-        return jsonify(response)
-    
-    except JSONDecodeError as e:
-        print(f"❌ JSON Parsing Error from Model Response: {e}")
-        return jsonify({'error': 'Invalid JSON response from AI model'}), 500
+        job = ld_jobs.get(job_id)
     except Exception as e:
-        print(f"❌ Unexpected Error: {e}")
-        return jsonify({'error': 'An error occurred while processing the request'}), 500
+        print(f"❌ Failed to read identification job: {e}")
+        return jsonify({'error': 'Failed to read job status'}), 500
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
     
+@bp_user.route('/users/ld_identification/cache/stats', methods=['GET'])
+def ld_identification_cache_stats():
+    return jsonify(ld_result_cache.stats())
+
+@bp_user.route('/users/ld_identification/flights/stats', methods=['GET'])
+def ld_identification_flight_stats():
+    return jsonify(ld_flights.stats())
+
+@bp_user.route('/users/ld_identification/speculative/stats', methods=['GET'])
+def ld_identification_speculative_stats():
+    return jsonify(speculative_diagnosis.stats())
+
+@bp_user.route('/users/ld_identification/prompt/stats', methods=['GET'])
+def ld_identification_prompt_stats():
+    from app.Helpers.compactionHelper import prompt_stats
+
+    return jsonify(prompt_stats.snapshot())
+
 @bp_user.route('/users/assessmentresult', methods=['POST'])
 def assessment_result():
     try:
@@ -408,8 +611,9 @@ def assessment_result():
 @bp_user.route('/users/rl_action', methods=['GET'])
 def rl_action():
     """
-    This route computes the most frequent emotion from the last 10 entries in emotion_history,
-    uses that as the current state, and then returns an adaptive action selected by the RL agent.
+    This route takes the most frequent emotion among the student's last 10 emotion detections
+    (query parameter userID) from the incrementally maintained window aggregates, uses that
+    as the current state, and then returns an adaptive action selected by the RL agent.
     
     Expected Response:
     {
@@ -420,18 +624,20 @@ def rl_action():
     }
     """
     try:
+        session_id = request.args.get('userID') or ANONYMOUS_SESSION
+        # Counts and dominant emotion of the last 10 detections, updated as frames arrive
+        window = emotion_store.aggregates(session_id).get(Config.EMOTION_RL_WINDOW, {})
+        required = Config.EMOTION_WINDOWS[Config.EMOTION_RL_WINDOW].get("frames", 10)
+
         # Ensure we have at least 10 emotion entries
-        if len(emotion_history) < 10:
+        if window.get("frames", 0) < required:
             return jsonify({
-                "error": "Not enough emotion data. At least 10 emotion entries required.",
-                "currentCount": len(emotion_history)
+                "error": f"Not enough emotion data. At least {required} emotion entries required.",
+                "currentCount": window.get("frames", 0)
             }), 400
         
-        # Get the last 10 emotion detections
-        last_ten = emotion_history[-10:]
-        # Use Counter to compute frequency and determine the most common emotion (the "state")
-        emotion_counter = Counter(last_ten)
-        current_state, count = emotion_counter.most_common(1)[0]
+        # The most common emotion in the window is the "state"
+        current_state = window["dominant"]
         
         # Use the RL agent to choose an action based on the current state (emotion)
         action = emotion_rl_agent.choose_action(current_state)
@@ -443,8 +649,9 @@ def rl_action():
         return jsonify({
             "state": current_state,
             "action": action,
-            "last_ten_emotions": last_ten,
-            "emotion_counts": dict(emotion_counter)
+            "last_ten_emotions": window.get("labels", []),
+            "emotion_counts": window["counts"],
+            "confidence_ema": window["confidenceEma"]
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -17,10 +17,12 @@ const AudioRecordingComponent = () => {
   const [currentQuestionIndex, setCurrentQuestionIndex] = useState(0);
   const [responses, setResponses] = useState([]);
   const [isCompleted, setIsCompleted] = useState(false);
+  const [partial, setPartial] = useState("");
 
   const mediaRecorderRef = useRef(null);
   const audioChunksRef = useRef([]);
   const audioStreamRef = useRef(null);
+  const uploadStreamRef = useRef(null);
 
   const currentQuestion = questions[currentQuestionIndex];
 
@@ -64,17 +66,76 @@ const AudioRecordingComponent = () => {
     }
   }, [isCompleted, navigate]);
 
+  // Open a streamed upload so the server transcribes while the student is still reading.
+  // Returns null when streaming is unavailable; the whole recording is uploaded at the end instead.
+  const openUploadStream = async () => {
+    try {
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/users/dyslexia_audio/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ userID, question: currentQuestion, format: "webm" }),
+      });
+      if (!response.ok) return null;
+      const { streamId } = await response.json();
+      return { id: streamId, uploads: Promise.resolve(), failed: false };
+    } catch (error) {
+      console.error("Streaming upload unavailable:", error);
+      return null;
+    }
+  };
+
+  const sendChunk = (uploadStream, chunk) => {
+    // Chained so chunks reach the server in recording order
+    uploadStream.uploads = uploadStream.uploads
+      .then(async () => {
+        if (uploadStream.failed) return;
+        const response = await fetch(
+          `${process.env.REACT_APP_API_URL}/users/dyslexia_audio/stream/${uploadStream.id}/chunk`,
+          { method: "POST", body: chunk }
+        );
+        if (!response.ok) throw new Error(`Server error: ${response.status}`);
+        const state = await response.json();
+        if (state.partial) setPartial(state.partial);
+      })
+      .catch((error) => {
+        console.error("Error streaming audio chunk:", error);
+        uploadStream.failed = true;
+      });
+  };
+
+  const finishUploadStream = async (uploadStream) => {
+    await uploadStream.uploads;
+    if (uploadStream.failed) return false;
+    try {
+      setStatus("Finishing transcription...");
+      const response = await fetch(
+        `${process.env.REACT_APP_API_URL}/users/dyslexia_audio/stream/${uploadStream.id}/finish`,
+        { method: "POST" }
+      );
+      if (!response.ok) throw new Error(`Server error: ${response.status}`);
+      handleResult(await response.json());
+      return true;
+    } catch (error) {
+      console.error("Error finishing audio stream:", error);
+      return false;
+    }
+  };
+
   const startRecording = async () => {
     setStatus("Recording... Speak clearly.");
     setIsRecording(true);
+    setPartial("");
 
     try {
       audioChunksRef.current = [];
+      const uploadStream = await openUploadStream();
+      uploadStreamRef.current = uploadStream;
       const mediaRecorder = new MediaRecorder(audioStreamRef.current, { mimeType: "audio/webm" });
 
       mediaRecorder.ondataavailable = (event) => {
         if (event.data.size > 0) {
           audioChunksRef.current.push(event.data);
+          if (uploadStream) sendChunk(uploadStream, event.data);
         }
       };
 
@@ -84,6 +145,10 @@ const AudioRecordingComponent = () => {
           return;
         }
 
+        if (uploadStream && (await finishUploadStream(uploadStream))) {
+          return;
+        }
+
         const webmBlob = new Blob(audioChunksRef.current, { type: "audio/webm" });
         const wavBlob = await convertWebMtoWav(webmBlob);
 
@@ -96,7 +161,8 @@ const AudioRecordingComponent = () => {
       };
 
       mediaRecorderRef.current = mediaRecorder;
-      mediaRecorder.start();
+      // With a stream open, emit a chunk every 500 ms instead of one blob at the end
+      mediaRecorder.start(uploadStream ? 500 : undefined);
     } catch (error) {
       console.error("Error starting recording:", error);
       setStatus(`Error: ${error.message}`);
@@ -187,6 +253,19 @@ const AudioRecordingComponent = () => {
     return new Blob([view], { type: "audio/wav" });
   };
 
+  const handleResult = (result) => {
+    setPartial("");
+    setResponses([...responses, { question: currentQuestion, response: result.transcription }]);
+
+    if (currentQuestionIndex < questions.length - 1) {
+      setCurrentQuestionIndex(currentQuestionIndex + 1);
+      setStatus("Next question ready.");
+    } else {
+      setIsCompleted(true);
+      setStatus("All questions completed! Redirecting to assessment...");
+    }
+  };
+
   const sendAudioToServer = async (audioBlob) => {
     try {
       setStatus("Uploading response...");
@@ -206,16 +285,7 @@ const AudioRecordingComponent = () => {
         throw new Error(`Server error: ${response.status}`);
       }
 
-      const result = await response.json();
-      setResponses([...responses, { question: currentQuestion, response: result.transcription }]);
-
-      if (currentQuestionIndex < questions.length - 1) {
-        setCurrentQuestionIndex(currentQuestionIndex + 1);
-        setStatus("Next question ready.");
-      } else {
-        setIsCompleted(true);
-        setStatus("All questions completed! Redirecting to assessment...");
-      }
+      handleResult(await response.json());
     } catch (error) {
       console.error("Error sending audio:", error);
       setStatus(`Error: ${error.message}`);
@@ -239,6 +309,9 @@ const AudioRecordingComponent = () => {
               </button>
             </div>
             <p className="text-center text-sm italic mt-4">{status}</p>
+            {partial && (
+              <p className="text-center text-sm text-gray-500 mt-2">Heard so far: {partial}</p>
+            )}
             <div className="mt-4">
               <p className="text-gray-600 text-sm">
                 Question {currentQuestionIndex + 1} of {questions.length}
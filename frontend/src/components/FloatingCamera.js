@@ -52,6 +52,7 @@ const FloatingCamera = ({ onEmotionCapture }) => {
     const blob = await fetch(imageData).then(res => res.blob());
     const formData = new FormData();
     formData.append('image', blob, 'capture.jpg');
+    formData.append('userID', localStorage.getItem('userId') || '');
 
     try {
       const response = await axios.post(`${process.env.REACT_APP_API_URL}/users/facedetection`, formData, {
@@ -21,6 +21,8 @@ const LoadingAssessmentPage = () => {
   
   const [steps, setSteps] = useState(assessmentSteps);
   const LEARNING_PATTERNS_STEP_INDEX = 4; // Index of "Identifying learning patterns" step
+  const JOB_POLL_INTERVAL_MS = 2000;
+  const JOB_MAX_POLLS = 150; // Give up after ~5 minutes of polling
   
   // Get userID from localStorage
   const userID = localStorage.getItem("userId") || "unknown_user";
@@ -31,7 +33,8 @@ const LoadingAssessmentPage = () => {
     try {
       setIsProcessing(false); // Pause the progress while waiting for server
       
-      const response = await fetch(`${process.env.REACT_APP_API_URL}/users/ld_identification`, {
+      // Queue the analysis, then poll the job until the server reports it finished
+      const response = await fetch(`${process.env.REACT_APP_API_URL}/users/ld_identification/jobs`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -39,12 +42,29 @@ const LoadingAssessmentPage = () => {
         body: JSON.stringify({ userID }),
       });
 
-      alert("Learning patterns analysis result:", response);
       if (!response.ok) {
         throw new Error(`Server error: ${response.status}`);
       }
 
-      const result = await response.json();
+      const { jobId } = await response.json();
+      let job;
+      let polls = 0;
+      do {
+        if (polls++ >= JOB_MAX_POLLS) {
+          throw new Error("The analysis is taking too long. Please try again later.");
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const statusResponse = await fetch(`${process.env.REACT_APP_API_URL}/users/ld_identification/jobs/${jobId}`);
+        if (!statusResponse.ok) {
+          throw new Error(`Server error: ${statusResponse.status}`);
+        }
+        job = await statusResponse.json();
+      } while (job.status === "queued" || job.status === "running");
+
+      if (job.status !== "done") {
+        throw new Error(job.error || "Analysis failed");
+      }
+      const result = job.result;
       console.log("Learning patterns analysis result:", result);
       
       // Resume progress after successful response
@@ -0,0 +1,39 @@
+"""
+The helper lookups listed in indexHelper.HELPER_QUERIES must be served by the declared
+indexes. Runs against a scratch database on Config.MONGO_URI; skipped when no MongoDB
+is reachable.
+"""
+import uuid
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+
+from app.Config.config import Config
+from app.Helpers.indexHelper import check_query_plans, ensure_indexes
+
+
+@pytest.fixture(scope="module")
+def scratch_db():
+    client = pymongo.MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command("ping")
+    except pymongo.errors.PyMongoError as e:
+        pytest.skip(f"MongoDB not reachable: {e}")
+    name = f"{Config.MONGO_DBNAME}_index_test_{uuid.uuid4().hex[:8]}"
+    yield client[name]
+    client.drop_database(name)
+    client.close()
+
+
+def test_declared_indexes_are_created(scratch_db):
+    rows = ensure_indexes(scratch_db)
+    assert [row for row in rows if row["status"] == "failed"] == []
+
+
+def test_helper_queries_use_indexes(scratch_db):
+    ensure_indexes(scratch_db)
+    rows = check_query_plans(scratch_db)
+    assert [row["query"] for row in rows if not row["usesIndex"]] == []
+    # get_assessment_result's newest-first sort must come from the (userID, _id) index
+    assert [row["query"] for row in rows if row["blockingSort"]] == []
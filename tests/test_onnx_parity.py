@@ -0,0 +1,47 @@
+"""
+The ONNX Runtime backend must match the PyTorch models it was exported from. Uses
+seeded, randomly initialised weights so it runs without the trained checkpoints;
+skipped when onnxruntime (or the ONNX exporter) is not installed.
+"""
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from app.Model.EmotionDetection.model import LSTMPyTorch, ResNet50
+from app.Model.EmotionDetection.onnx_backend import load_onnx_models
+from app.Model.EmotionDetection.optimize import check_parity, random_input_batches
+
+# Emotion probabilities; ORT fuses and reorders float32 ops, so allow rounding noise
+MAX_ABS_DIFF = 1e-4
+
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    torch.manual_seed(0)
+    backbone, lstm = ResNet50(7, channels=3).eval(), LSTMPyTorch().eval()
+    onnx_dir = tmp_path_factory.mktemp("onnx")
+    return (backbone, lstm), load_onnx_models(backbone, lstm, str(onnx_dir))
+
+
+def test_window_probabilities_match_torch(models):
+    reference, onnx_pair = models
+    inputs = torch.cat(random_input_batches(count=2, batch_size=4, seed=1))
+    # Random weights give near-uniform probabilities, so only the difference is asserted
+    assert check_parity(reference, onnx_pair, inputs)["maxAbsDiff"] <= MAX_ABS_DIFF
+
+
+def test_stateful_step_matches_torch(models):
+    (_, lstm), (_, onnx_lstm) = models
+    torch.manual_seed(2)
+    window, frame = torch.randn(3, 10, 512), torch.randn(3, 512)
+    with torch.inference_mode():
+        _, state = lstm.run(window)
+        expected, expected_state = lstm.step(frame, state)
+    _, onnx_state = onnx_lstm.run(window)
+    actual, actual_state = onnx_lstm.step(frame, onnx_state)
+    assert float((expected - actual).abs().max()) <= MAX_ABS_DIFF
+    for (h, c), (onnx_h, onnx_c) in zip(expected_state, actual_state):
+        assert float((h - onnx_h).abs().max()) <= MAX_ABS_DIFF
+        assert float((c - onnx_c).abs().max()) <= MAX_ABS_DIFF
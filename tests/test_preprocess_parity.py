@@ -0,0 +1,41 @@
+"""
+FacePreprocessor must reproduce the original PIL/torchvision pipeline
+(utlis._pth_processing_reference) on fixed inputs.
+"""
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+Image = pytest.importorskip("PIL.Image")
+
+from app.Model.EmotionDetection.utlis import (
+    FacePreprocessor, _pth_processing_reference, check_preprocess_parity, preprocess_face
+)
+
+# Same nearest-neighbour samples and float32 mean subtraction: the outputs are identical
+MAX_ABS_DIFF = 1e-5
+
+
+def test_random_crops_match_reference():
+    assert check_preprocess_parity(samples=30, seed=0) <= MAX_ABS_DIFF
+
+
+@pytest.mark.parametrize("height, width", [(224, 224), (20, 20), (37, 640), (639, 48), (225, 223)])
+def test_fixed_sizes_match_reference(height, width):
+    rgb = np.random.default_rng(height * 1000 + width).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    expected = _pth_processing_reference(Image.fromarray(rgb))
+    actual = preprocess_face(np.ascontiguousarray(rgb[:, :, ::-1]), channels="bgr")
+    assert actual.shape == expected.shape == (1, 3, 224, 224)
+    assert float((expected - actual).abs().max()) <= MAX_ABS_DIFF
+
+
+def test_batch_slots_are_independent():
+    rng = np.random.default_rng(1)
+    crops = [rng.integers(0, 256, size=(h, h, 3), dtype=np.uint8) for h in (50, 300, 224)]
+    preprocessor = FacePreprocessor(batch_size=len(crops))
+    for slot, crop in enumerate(crops):
+        preprocessor.fill(slot, crop)
+    batch = preprocessor.batch(len(crops))
+    for slot, crop in enumerate(crops):
+        assert torch.equal(batch[slot:slot + 1], preprocess_face(crop))